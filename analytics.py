@@ -0,0 +1,64 @@
+import pandas as pd
+
+from schema import CONTENT_TYPES, PLATFORMS, STATUSES
+
+STATUS_DTYPE = pd.CategoricalDtype(STATUSES, ordered=True)
+CONTENT_TYPE_DTYPE = pd.CategoricalDtype([''] + CONTENT_TYPES)
+PLATFORM_DTYPE = pd.CategoricalDtype(PLATFORMS)
+
+
+def posts_frame(posts):
+    """One row per post with categorical status, content type and platform list"""
+    df = pd.DataFrame.from_records(
+        [
+            {
+                'id': post.get('id'),
+                'date': post.get('date'),
+                'status': post.get('status') or 'Draft',
+                'content_type': post.get('content_type') or '',
+                'content_pillar': post.get('content_pillar') or '',
+                'platforms': post.get('platforms') or [],
+            }
+            for post in posts
+        ],
+        columns=['id', 'date', 'status', 'content_type', 'content_pillar', 'platforms'],
+    )
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+    df['status'] = df['status'].astype(STATUS_DTYPE)
+    df['content_type'] = df['content_type'].astype(CONTENT_TYPE_DTYPE)
+    df['content_pillar'] = df['content_pillar'].str.strip().astype('category')
+    return df.dropna(subset=['date'])
+
+
+def platform_frame(df):
+    """One row per (post, platform) pair"""
+    exploded = df[['id', 'date', 'platforms']].explode('platforms').dropna(subset=['platforms'])
+    return exploded.rename(columns={'platforms': 'platform'}).astype({'platform': PLATFORM_DTYPE})
+
+
+def posts_per_week_by_platform(df):
+    """Weeks (starting Sunday) down the index, platforms across, post counts in the cells"""
+    exploded = platform_frame(df)
+    week = exploded['date'].dt.to_period('W-SAT').dt.start_time.rename('week')
+    return exploded.groupby([week, 'platform'], observed=False).size().unstack(fill_value=0)
+
+
+def status_funnel(df, freq='M'):
+    """Posts per status for each period, with statuses in workflow order"""
+    period = df['date'].dt.to_period(freq).dt.start_time.rename('period')
+    return df.groupby([period, 'status'], observed=False).size().unstack(fill_value=0)
+
+
+def pillar_distribution(df):
+    """Number of posts per content pillar, largest first"""
+    pillars = df['content_pillar'][df['content_pillar'] != '']
+    return pillars.value_counts().loc[lambda counts: counts > 0]
+
+
+def cadence_gaps(df, min_days=3):
+    """Stretches of at least min_days days with no posts between the first and last post"""
+    dates = pd.Series(df['date'].drop_duplicates().sort_values().to_numpy())
+    gaps = pd.DataFrame({'after': dates.shift(), 'before': dates})
+    gaps['empty_days'] = (gaps['before'] - gaps['after']).dt.days - 1
+    gaps = gaps[gaps['empty_days'] >= min_days].astype({'empty_days': int})
+    return gaps.sort_values('empty_days', ascending=False).reset_index(drop=True)
@@ -1,10 +1,27 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import calendar
-import json
-import gspread
-from google.oauth2.service_account import Credentials
+import io
+import os
+import threading
+import time
+import uuid
+from bulk import add_platforms, duplicate_to_month, remove_platforms, set_status, shift_dates
+from exporter import FORMATS as EXPORT_FORMATS, export_file
+from ids import IdAllocator
+from importer import import_stream
+from instrumentation import Metrics, instrument, log_to_file, post_count, sheet_call_size
+from journal import MemoryJournal, SheetsJournal, SnapshotSchedule, SQLiteJournal, apply_entry, clear_entry, create_entry, delete_entry, restore_target, update_entry
+from post_store import PostStore
+from recurrence import FREQUENCIES, describe, expand, materialize, occurrence, parse_occurrence_id, with_exception, with_override
+from render import GRID_CLICK_JS, PLATFORM_EMOJIS, month_grid_html, quarter_html, week_grid_html
+from replica import ReplicaBackend
+from schema import CONTENT_TYPES, PLATFORMS, STATUSES
+from search import SearchIndex
+from startup import BackgroundLoad, WarmCache
+from storage import MemoryBackend, SheetsBackend, SQLiteBackend, version_of
+from views import VIEWS, add_months, group_by_date, shift_anchor, view_title, visible_range
+from write_queue import WriteQueue, merge_posts
 
 # Page configuration
 st.set_page_config(
@@ -82,6 +99,42 @@ st.markdown("""
     div[data-testid="stHorizontalBlock"] {
         gap: 0.5rem;
     }
+    .month-grid {
+        display: grid;
+        grid-template-columns: repeat(7, minmax(0, 1fr));
+        gap: 0.5rem;
+    }
+    .month-grid a.post-card, .month-grid a.day-number {
+        display: block;
+        text-decoration: none !important;
+    }
+    .quarter-grid {
+        display: grid;
+        grid-template-columns: repeat(3, minmax(0, 1fr));
+        gap: 1rem;
+    }
+    .mini-grid {
+        display: grid;
+        grid-template-columns: repeat(7, minmax(0, 1fr));
+        gap: 4px;
+        text-align: center;
+    }
+    .mini-day-name {
+        color: rgba(255, 255, 255, 0.6);
+        font-size: 12px;
+    }
+    .mini-day {
+        display: block;
+        padding: 6px 0;
+        border-radius: 6px;
+        background: rgba(255, 255, 255, 0.05);
+        color: white !important;
+        font-size: 13px;
+    }
+    .mini-day.has-posts {
+        background: rgba(59, 130, 246, 0.5);
+        font-weight: bold;
+    }
     .platform-badge {
         font-size: 14px;
         margin-right: 4px;
@@ -97,99 +150,514 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Configuration
-CONTENT_TYPES = ['Carousel', 'Video', 'Image', 'Reel', 'Story', 'Article', 'Infographic']
-STATUSES = ['Draft', 'Copy Ready', 'Scheduled', 'Published']
-PLATFORMS = ['Instagram', 'Facebook', 'LinkedIn', 'Twitter', 'TikTok', 'YouTube']
+# Shared cache configuration (seconds)
+CACHE_TTL = int(os.environ.get('CALENDAR_CACHE_TTL', 600))
+REVISION_CHECK_TTL = int(os.environ.get('CALENDAR_REVISION_CHECK_TTL', 15))
+# Full posts (with notes and comments) kept in the shared detail cache
+DETAIL_CACHE_SIZE = int(os.environ.get('CALENDAR_DETAIL_CACHE_SIZE', 256))
+
+# Background write queue configuration
+FLUSH_INTERVAL = float(os.environ.get('CALENDAR_FLUSH_INTERVAL', 2))
+FLUSH_BATCH_SIZE = int(os.environ.get('CALENDAR_FLUSH_BATCH_SIZE', 50))
+
+# Posts per page in the agenda view
+AGENDA_PAGE_SIZE = 20
+
+# Results per page in search
+SEARCH_PAGE_SIZE = 10
+
+# Posts written per storage call when importing, and read per call when exporting
+IMPORT_CHUNK_SIZE = int(os.environ.get('CALENDAR_IMPORT_CHUNK_SIZE', 500))
+EXPORT_CHUNK_SIZE = int(os.environ.get('CALENDAR_EXPORT_CHUNK_SIZE', 500))
+
+# Journal entries between snapshots, and the most a session replays before reloading instead
+SNAPSHOT_EVERY = int(os.environ.get('CALENDAR_SNAPSHOT_EVERY', 500))
+MAX_REPLAY = 1000
+# Writers journal a change just after storing it, so after a replay the journal is read
+# again until a read this many seconds later, catching entries that landed after the first
+JOURNAL_SETTLE = float(os.environ.get('CALENDAR_JOURNAL_SETTLE', 5))
+
+# Performance log: when set, every timed operation and rerun is appended here as a JSON line
+PERF_LOG = os.environ.get('CALENDAR_PERF_LOG')
+SHEET_METHODS = ['get', 'batch_get', 'batch_update', 'batch_clear', 'append_rows', 'update', 'col_values', 'row_values', 'acell', 'clear']
+STORAGE_METHODS = ['load', 'load_summaries', 'get', 'get_many', 'bulk_import', 'apply_batch', 'compact', 'revision', 'lease_ids']
+JOURNAL_METHODS = ['append', 'head', 'entries', 'history', 'save_snapshot', 'snapshot_before', 'latest_snapshot_seq']
+
+# Local copy of the post summaries drawn on a cold start while storage loads ('' turns it off),
+# kept beside the app's other data files, and how long a new session waits for live posts
+# before drawing that copy instead
+WARM_CACHE_PATH = os.environ.get('CALENDAR_WARM_CACHE', 'calendar_warm_cache.json')
+WARM_START_WAIT = 0.5
+
+# Local replica of the sheet that serves every read and write while syncing in the background
+# ('' talks to the sheet directly), and seconds between syncs when nothing is written
+REPLICA_PATH = os.environ.get('CALENDAR_REPLICA_PATH', 'calendar_replica.db')
+REPLICA_SYNC_INTERVAL = float(os.environ.get('CALENDAR_REPLICA_SYNC_INTERVAL', 15))
 
 # Google Sheets Configuration
 SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
     'https://www.googleapis.com/auth/drive'
 ]
+# Connections kept open to Google; sessions, the write queue and the journal share them
+HTTP_POOL_SIZE = int(os.environ.get('CALENDAR_HTTP_POOL_SIZE', 16))
 
 @st.cache_resource
-def get_gsheet_connection():
-    """Create a connection to Google Sheets"""
+def get_metrics():
+    """Create the process-wide registry of operation timings"""
+    metrics = Metrics()
+    if PERF_LOG:
+        log_to_file(PERF_LOG)
+    return metrics
+
+def connect_gsheet(account_info, metrics):
+    """Authorize once over a pooled HTTP session and open the calendar sheet"""
+    # Imported here so the page can draw (and the sqlite and memory backends run) without the Google client stack
+    import gspread
+    from google.auth.transport.requests import AuthorizedSession
+    from google.oauth2.service_account import Credentials
+    from requests.adapters import HTTPAdapter
+    
+    credentials = Credentials.from_service_account_info(account_info, scopes=SCOPES)
+    session = AuthorizedSession(credentials)
+    session.mount('https://', HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE))
+    client = gspread.Client(credentials, session=session)
+    sheet = client.open_by_key(account_info["sheet_key"]).sheet1
+    
+    # SheetsBackend writes the header (and migrates older layouts) itself
+    return instrument(sheet, metrics, 'sheets', SHEET_METHODS, sheet_call_size)
+
+def open_storage(backend, account_info, metrics):
+    """Create the storage backend; plain Python, as it runs on the startup thread"""
+    if backend == 'sqlite':
+        storage = SQLiteBackend(os.environ.get('CALENDAR_DB_PATH', 'calendar.db'))
+    elif backend == 'memory':
+        storage = MemoryBackend()
+    else:
+        if account_info is None:
+            raise RuntimeError("gcp_service_account is missing from secrets.toml")
+        if not REPLICA_PATH:
+            storage = SheetsBackend(connect_gsheet(account_info, metrics))
+        else:
+            storage = ReplicaBackend(
+                REPLICA_PATH,
+                lambda: instrument(SheetsBackend(connect_gsheet(account_info, metrics)), metrics, 'remote', STORAGE_METHODS, post_count),
+                # Every server shares the sheet's journal, so history and restore see all their changes
+                open_journal=lambda remote: instrument(SheetsJournal(remote.sheet.spreadsheet), metrics, 'remote_journal', JOURNAL_METHODS, post_count),
+                sync_interval=REPLICA_SYNC_INTERVAL,
+                snapshot_every=SNAPSHOT_EVERY
+            )
+            instrument(storage, metrics, 'replica', ['sync'])
+            # A new replica has nothing to show until it has pulled from the sheet once
+            if not storage.wait_for_first_sync():
+                raise storage.last_error
+    return instrument(storage, metrics, 'storage', STORAGE_METHODS, post_count)
+
+@st.cache_resource
+def get_startup():
+    """Start opening storage and loading posts in the background, once per process"""
+    backend = os.environ.get('CALENDAR_BACKEND', 'sheets').lower()
+    account_info = None
+    if backend == 'sheets':
+        try:
+            account_info = dict(st.secrets["gcp_service_account"])
+        except Exception:
+            # Reported by get_storage once opening fails
+            pass
+    metrics = get_metrics()
+    return BackgroundLoad(
+        lambda: open_storage(backend, account_info, metrics),
+        warm_cache=WarmCache(WARM_CACHE_PATH) if WARM_CACHE_PATH else None
+    )
+
+@st.cache_resource
+def get_storage():
+    """The storage backend selected by CALENDAR_BACKEND (sheets, sqlite or memory), once it is open"""
     try:
-        credentials = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=SCOPES
-        )
-        client = gspread.authorize(credentials)
-        sheet = client.open_by_key(st.secrets["gcp_service_account"]["sheet_key"]).sheet1
-        
-        # Initialize headers if sheet is empty
-        if sheet.row_count == 0 or not sheet.row_values(1):
-            sheet.update('A1:B1', [['id', 'data']])
-        
-        return sheet
+        return get_startup().storage()
     except Exception as e:
-        st.error(f"Error connecting to Google Sheets: {str(e)}")
-        st.info("Make sure you've set up secrets.toml correctly and shared the sheet with your service account email.")
+        st.error(f"Error connecting to storage: {str(e)}")
+        if os.environ.get('CALENDAR_BACKEND', 'sheets').lower() == 'sheets':
+            st.info("Make sure you've set up secrets.toml correctly and shared the sheet with your service account email.")
         return None
 
+@st.cache_resource
+def get_journal():
+    """Create the process-wide operation journal next to the posts, starting it with a snapshot of them"""
+    storage = get_storage()
+    try:
+        if isinstance(storage, ReplicaBackend):
+            # Opened, and started with a snapshot, by the sync thread once the sheet is reachable
+            return instrument(storage.journal, get_metrics(), 'journal', JOURNAL_METHODS, post_count)
+        if isinstance(storage, SheetsBackend):
+            journal = SheetsJournal(storage.sheet.spreadsheet)
+        elif isinstance(storage, SQLiteBackend):
+            journal = SQLiteJournal(storage.path)
+        elif isinstance(storage, MemoryBackend):
+            journal = MemoryJournal()
+        else:
+            return None
+        instrument(journal, get_metrics(), 'journal', JOURNAL_METHODS, post_count)
+        if journal.latest_snapshot_seq() is None:
+            # Everything written before the journal began can only be restored from here
+            seq = journal.head()
+            journal.save_snapshot(seq, storage.load())
+        return journal
+    except Exception as e:
+        st.error(f"Error opening the journal, history and restore are off: {str(e)}")
+        return None
+
+@st.cache_data(ttl=REVISION_CHECK_TTL, show_spinner=False)
+def current_revision():
+    """Read the storage revision token, shared by all sessions for a few seconds"""
+    storage = get_storage()
+    return storage.revision() if storage else None
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_posts(revision):
+    """Download and parse every post summary once per revision, with the journal seq they include
+
+    Each session gets its own copy.
+    """
+    journal = get_journal()
+    startup = get_startup()
+    preloaded = startup.take(revision)
+    if preloaded is not None:
+        # Read before the journal was open, so its position is unknown and the next change reloads in full
+        return preloaded, None
+    # Read the head first: entries logged during the load are replayed again later, which is harmless.
+    # A replica's journal runs ahead of its local posts, so a replica always reloads in full (from the local file)
+    journal_seq = journal.head() if journal and not isinstance(get_storage(), ReplicaBackend) else None
+    posts = get_storage().load_summaries()
+    if startup.warm_cache:
+        startup.warm_cache.save_in_background(revision, posts)
+    return posts, journal_seq
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=DETAIL_CACHE_SIZE, show_spinner=False)
+def fetch_post_details(post_id, version):
+    """Read one full post from storage, shared by all sessions; least recently used posts are dropped first"""
+    return get_storage().get(post_id)
+
 def load_posts():
-    """Load posts from Google Sheets"""
+    """Load posts from the shared cache, fetching from storage only when it has changed"""
     try:
-        sheet = get_gsheet_connection()
-        if not sheet:
-            return [], 1
+        storage = get_storage()
+        if not storage:
+            return [], None, None
         
-        # Get all records (skip header row)
-        all_values = sheet.get_all_values()
-        
-        if len(all_values) <= 1:  # Only header or empty
-            return [], 1
-        
-        posts = []
-        for row in all_values[1:]:  # Skip header
-            if len(row) >= 2 and row[1]:  # Has data
-                try:
-                    post = json.loads(row[1])
-                    posts.append(post)
-                except json.JSONDecodeError:
-                    continue
-        
-        # Calculate next_id
-        next_id = max([p.get('id', 0) for p in posts], default=0) + 1
-        
-        return posts, next_id
+        revision = current_revision()
+        posts, journal_seq = fetch_posts(revision)
+        return posts, revision, journal_seq
     except Exception as e:
         st.error(f"Error loading posts: {str(e)}")
-        return [], 1
+        return [], None, None
+
+def load_store():
+    """Replace this session's posts with the shared copy at the latest revision"""
+    posts, st.session_state.revision, st.session_state.journal_seq = load_posts()
+    st.session_state.store = PostStore(posts)
+    # Until this session changes them, its posts are the same as every other session's at this revision
+    st.session_state.shared_store_revision = st.session_state.store.revision
+    # A full load reads the journal head before the posts, so it has nothing to settle
+    st.session_state.journal_settle_at = None
+    mark_search_outdated()
+
+def clear_shared_cache():
+    """Drop cached posts and revision so every session picks up the latest write"""
+    fetch_posts.clear()
+    current_revision.clear()
+
+def invalidate_cache():
+    """Drop cached posts after a local write and remember the revision it produced"""
+    clear_shared_cache()
+    try:
+        st.session_state.revision = current_revision()
+    except Exception:
+        st.session_state.revision = None
+
+def sync_with_storage():
+    """Reload this session's posts if another session has changed storage"""
+    if st.session_state.get('warm_start'):
+        if not get_startup().wait(0):
+            return
+        # Storage has answered: swap the saved copy for the live posts
+        del st.session_state.warm_start
+        load_store()
+        # Edits made while the saved copy was showing may not have reached storage yet
+        queue = get_write_queue()
+        for post_id, post in (queue.pending_changes() if queue else {}).items():
+            if post is None:
+                st.session_state.store.remove(post_id)
+            else:
+                st.session_state.store.add(post)
+        return
+    queue = get_write_queue()
+    if queue and queue.pending_count():
+        # Reloading now would hide edits that haven't been flushed yet
+        return
+    try:
+        revision = current_revision()
+    except Exception:
+        return
+    if revision != st.session_state.revision:
+        if replay_journal():
+            st.session_state.revision = revision
+            # The revision can include a change whose entry isn't in the journal yet
+            st.session_state.journal_settle_at = time.time() + JOURNAL_SETTLE
+            snapshot_if_due()
+        else:
+            load_store()
+    elif st.session_state.get('journal_settle_at'):
+        settled = time.time() >= st.session_state.journal_settle_at
+        if not replay_journal(required=False):
+            load_store()
+        elif settled:
+            st.session_state.journal_settle_at = None
+
+def replay_journal(required=True):
+    """Apply journal entries logged since this session loaded; False when a full reload is needed instead
+
+    With required=False, finding no new entries is fine: storage is known not to have changed since.
+    """
+    journal = get_journal()
+    journal_seq = st.session_state.get('journal_seq')
+    if not journal or journal_seq is None:
+        return False
+    try:
+        entries = journal.entries(after=journal_seq)
+    except Exception:
+        return False
+    if not entries:
+        # Storage changed without a journal entry (e.g. compaction) unless nothing was expected
+        return not required
+    if len(entries) > MAX_REPLAY:
+        # Too much to catch up on
+        return False
+    
+    store = st.session_state.store
+    mark_search_outdated(None if any(entry['op'] == 'clear' for entry in entries) else [entry['post_id'] for entry in entries])
+    for entry in entries:
+        if entry['op'] == 'clear':
+            store.clear()
+            continue
+        summary = store.get(entry['post_id'])
+        post = apply_entry(summary.to_dict() if summary else None, entry)
+        if post is None:
+            store.remove(entry['post_id'])
+        else:
+            store.add(post)
+    # An entry a writer appends just after this read is still ahead of journal_seq, and
+    # sync_with_storage reads again until the journal has settled
+    st.session_state.journal_seq = entries[-1]['seq']
+    return True
+
+@st.cache_resource
+def get_snapshot_schedule():
+    """Process-wide record of the journal's newest snapshot, so sessions don't each look it up or take one"""
+    journal = get_journal()
+    return SnapshotSchedule(journal, SNAPSHOT_EVERY, get_storage().load) if journal else None
+
+def snapshot_if_due():
+    """Snapshot every post once SNAPSHOT_EVERY journal entries have piled up since the last snapshot"""
+    schedule = get_snapshot_schedule()
+    try:
+        if schedule:
+            schedule.note(st.session_state.journal_seq)
+    except Exception:
+        # Only replay gets slower without it; the next session to sync tries again
+        return
+
+@st.cache_resource
+def get_id_allocator():
+    """Create the process-wide allocator that leases blocks of post ids from storage"""
+    storage = get_storage()
+    if not storage:
+        return None
+    return IdAllocator(storage)
 
-def save_posts(posts, next_id):
-    """Save posts to Google Sheets"""
+@st.cache_resource
+def get_write_queue():
+    """Create the process-wide queue that flushes post writes in the background"""
+    storage = get_storage()
+    if not storage:
+        return None
+    return WriteQueue(
+        storage, flush_interval=FLUSH_INTERVAL, max_batch=FLUSH_BATCH_SIZE,
+        on_flush=clear_shared_cache, journal=get_journal()
+    )
+
+def current_user():
+    """Name this session's changes are recorded under in the journal"""
+    return st.session_state.get('user_name') or f"Session {st.session_state.session_id[:6]}"
+
+def get_session_queue():
+    """The write queue, with this session's name registered for its journal entries"""
+    queue = get_write_queue()
+    if queue:
+        queue.user_names[st.session_state.session_id] = current_user()
+    return queue
+
+def settle_writes(storage):
+    """Write out queued changes and, for a replica, sync them so storage and the shared journal agree"""
+    get_write_queue().flush()
+    if isinstance(storage, ReplicaBackend):
+        storage.sync()
+
+def record_changes(entries):
+    """Journal a write made directly to storage rather than through the queue"""
+    journal = get_journal()
+    if journal and entries:
+        journal.append(entries)
+
+@st.cache_resource
+def get_search_state():
+    """Process-wide search index, built on the first search and then kept current rather than rebuilt"""
+    return {'index': None, 'lock': threading.Lock()}
+
+def get_search_index():
+    """The shared search index over full posts, brought up to date with what this session has synced"""
+    state = get_search_state()
     try:
-        sheet = get_gsheet_connection()
-        if not sheet:
+        with state['lock']:
+            if state['index'] is None:
+                build_search_index(state)
+            elif 'search_outdated' in st.session_state:
+                refresh_search_index(state, st.session_state.search_outdated)
+            st.session_state.pop('search_outdated', None)
+    except Exception as e:
+        st.error(f"Error loading posts for search: {str(e)}")
+        # Titles and pillars are still searchable from this session's summaries
+        return SearchIndex(st.session_state.store)
+    return state['index']
+
+def build_search_index(state):
+    """Index every post in storage; caller holds the state lock"""
+    storage = get_storage()
+    if not storage:
+        raise RuntimeError("Storage is unavailable")
+    with get_metrics().timed('search.build_index') as timing:
+        state['index'] = SearchIndex(storage.load())
+        timing['size'] = len(state['index'])
+
+def refresh_search_index(state, post_ids):
+    """Re-read just the posts this session holds newer copies of, or no longer has; post_ids None checks every post
+
+    Caller holds the state lock.
+    """
+    index = state['index']
+    store = st.session_state.store
+    if post_ids is None:
+        changed = index.outdated(store) + list(index.missing(post['id'] for post in store))
+    else:
+        changed = index.outdated(store.get(post_id) for post_id in post_ids if post_id in store)
+        changed += [post_id for post_id in post_ids if post_id not in store]
+    queue = get_write_queue()
+    # Queued edits are indexed already, and storage still has the copy from before them
+    changed = [post_id for post_id in changed if queue.pending_post(post_id) is None]
+    if not changed:
+        return
+    if len(changed) > MAX_REPLAY:
+        # Too much to fetch post by post
+        build_search_index(state)
+        return
+    with get_metrics().timed('search.refresh_index') as timing:
+        posts = get_storage().get_many(changed)
+        for post_id in changed:
+            # A post only missing here may just not have reached this session yet, so storage decides
+            if post_id in posts:
+                index.add(posts[post_id])
+            else:
+                index.remove(post_id)
+        timing['size'] = len(changed)
+
+def mark_search_outdated(post_ids=None):
+    """Have the shared search index check posts that changed under this session; None means every post"""
+    pending = st.session_state.get('search_outdated', set())
+    st.session_state.search_outdated = None if post_ids is None or pending is None else pending | set(post_ids)
+
+def index_post(post):
+    """Bring the search index up to date with a local write, if it has been built"""
+    index = get_search_state()['index']
+    if index is not None:
+        index.add(post)
+
+def unindex_post(post_id):
+    """Drop a locally deleted post from the search index, if it has been built"""
+    index = get_search_state()['index']
+    if index is not None:
+        index.remove(post_id)
+
+def store_new_posts(posts):
+    """Queue new posts for the next background flush"""
+    queue = get_session_queue()
+    if not queue:
+        return False
+    for post in posts:
+        queue.insert(post, owner=st.session_state.session_id)
+    return True
+
+def store_post(post, base):
+    """Queue an edited post for the next background flush, checked against the copy it was based on"""
+    queue = get_session_queue()
+    if not queue:
+        return False
+    queue.update(post, base=base, owner=st.session_state.session_id)
+    return True
+
+def remove_stored_post(post_id, base):
+    """Queue a post removal for the next background flush, checked against the copy the user saw"""
+    queue = get_session_queue()
+    if not queue:
+        return False
+    queue.delete(post_id, base=base, owner=st.session_state.session_id)
+    return True
+
+def compact_posts():
+    """Rewrite storage without deleted rows and snapshot the result into the journal"""
+    try:
+        storage = get_storage()
+        if not storage:
             return False
         
-        # Clear existing data (except header)
-        sheet.clear()
-        
-        # Add header
-        sheet.update('A1:B1', [['id', 'data']])
-        
-        # Prepare data for batch update
-        if posts:
-            rows_data = [[post['id'], json.dumps(post)] for post in posts]
-            # Update all rows at once (more efficient)
-            sheet.update(f'A2:B{len(posts) + 1}', rows_data)
-        
+        # Flush first so queued writes can't land on top of the rewritten sheet
+        settle_writes(storage)
+        journal = get_journal()
+        journal_seq = journal.head() if journal else None
+        posts = storage.load()
+        storage.compact(posts)
+        if journal:
+            # Every post is loaded anyway, so this is a cheap point to replay from
+            journal.save_snapshot(journal_seq, posts)
+            get_snapshot_schedule().saved(journal_seq)
+        invalidate_cache()
         return True
     except Exception as e:
-        st.error(f"Error saving posts: {str(e)}")
+        st.error(f"Error compacting posts: {str(e)}")
         return False
 
+# Time this rerun phase by phase for the performance panel and log
+rerun_trace = get_metrics().begin_trace()
+
 # Initialize session state
-if 'posts' not in st.session_state:
-    with st.spinner('Loading calendar data...'):
-        st.session_state.posts, st.session_state.next_id = load_posts()
+if 'store' not in st.session_state:
+    startup = get_startup()
+    warm = None
+    if not startup.wait(WARM_START_WAIT) and startup.warm_cache:
+        warm = startup.warm_cache.load()
+    if warm:
+        # Draw the saved copy now; the live posts replace it when the background load finishes
+        _, st.session_state.warm_start, posts = warm
+        st.session_state.revision = st.session_state.journal_seq = None
+        st.session_state.store = PostStore(posts)
+    else:
+        with st.spinner('Loading calendar data...'):
+            load_store()
+else:
+    sync_with_storage()
 
-if 'next_id' not in st.session_state:
-    st.session_state.next_id = 1
+if 'session_id' not in st.session_state:
+    # Identifies this session's queued writes so conflicts reach the right editor
+    st.session_state.session_id = uuid.uuid4().hex
 
 if 'current_date' not in st.session_state:
     st.session_state.current_date = datetime.now()
@@ -203,79 +671,528 @@ if 'editing_post' not in st.session_state:
 if 'viewing_post' not in st.session_state:
     st.session_state.viewing_post = None
 
+if 'fast_grid' not in st.session_state:
+    st.session_state.fast_grid = False
+
+if 'calendar_view' not in st.session_state:
+    st.session_state.calendar_view = 'Month'
+
+if 'agenda_days' not in st.session_state:
+    st.session_state.agenda_days = 14
+
+if 'agenda_page' not in st.session_state:
+    st.session_state.agenda_page = 0
+
+if 'search_page' not in st.session_state:
+    st.session_state.search_page = 0
+
+if 'bulk_selection' not in st.session_state:
+    # Ids of posts picked for a bulk edit
+    st.session_state.bulk_selection = set()
+
 def get_calendar_data(year, month):
     """Get calendar data for the given month with Sunday as first day"""
     calendar.setfirstweekday(calendar.SUNDAY)
     cal = calendar.monthcalendar(year, month)
     return cal
 
-def get_posts_for_date(date_str):
-    """Get all posts for a specific date"""
-    return [p for p in st.session_state.posts if p['date'] == date_str]
+def get_posts_in_range(start, end, store=None):
+    """Get all posts dated from start to end inclusive, in date order, with recurring series expanded"""
+    store = store or st.session_state.store
+    start_date, end_date = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+    posts = store.posts_in_range(start_date, end_date)
+    occurrences = [post for series in store.series() for post in expand(series, start_date, end_date)]
+    if not occurrences:
+        return posts
+    return sorted(posts + occurrences, key=lambda post: post['date'])
+
+def find_post(key):
+    """Post summary or series occurrence for an id from a grid link, or None"""
+    try:
+        parsed = parse_occurrence_id(key)
+        if parsed is None:
+            return st.session_state.store.get(int(key))
+    except ValueError:
+        return None
+    series = st.session_state.store.get(parsed[0])
+    return occurrence(series, parsed[1]) if series and series.get('recurrence') else None
+
+def get_post_details(post_id):
+    """Full post with link, notes and comments, or None if it no longer exists"""
+    queue = get_write_queue()
+    post = queue.pending_post(post_id) if queue else None
+    if post is not None:
+        # Not flushed yet, so storage still has the previous copy
+        return post
+    summary = st.session_state.store.get(post_id)
+    try:
+        post = fetch_post_details(post_id, version_of(summary)) if get_storage() else None
+    except Exception as e:
+        st.error(f"Error loading post: {str(e)}")
+        post = None
+    if post is None:
+        return summary.to_dict() if summary else None
+    return dict(post)
+
+def stamp_post(post_data, version):
+    """Set the version and last-modified time on a post about to be written"""
+    post_data['version'] = version
+    post_data['updated_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
 
 def add_post(post_data):
     """Add a new post"""
-    post_data['id'] = st.session_state.next_id
-    st.session_state.posts.append(post_data)
-    st.session_state.next_id += 1
-    save_posts(st.session_state.posts, st.session_state.next_id)
-
-def update_post(post_id, post_data):
-    """Update an existing post"""
-    for i, post in enumerate(st.session_state.posts):
-        if post['id'] == post_id:
-            post_data['id'] = post_id
-            st.session_state.posts[i] = post_data
-            break
-    save_posts(st.session_state.posts, st.session_state.next_id)
-
-def delete_post(post_id):
-    """Delete a post"""
-    st.session_state.posts = [p for p in st.session_state.posts if p['id'] != post_id]
-    save_posts(st.session_state.posts, st.session_state.next_id)
+    try:
+        post_data['id'] = get_id_allocator().next_id()
+    except Exception as e:
+        st.error(f"Error saving post: {str(e)}")
+        return False
+    stamp_post(post_data, 1)
+    st.session_state.store.add(post_data)
+    index_post(post_data)
+    return store_new_posts([post_data])
+
+def update_post(post_id, post_data, base=None):
+    """Update an existing post; base is the copy the edit started from (default: the current one)"""
+    base = base or get_post_details(post_id) or {}
+    post_data['id'] = post_id
+    stamp_post(post_data, version_of(base) + 1)
+    st.session_state.store.update(post_data)
+    index_post(post_data)
+    store_post(post_data, base)
+
+def delete_post(post_id, base=None):
+    """Delete a post; base is the copy the user saw (default: the current one)"""
+    base = base or get_post_details(post_id)
+    st.session_state.store.remove(post_id)
+    unindex_post(post_id)
+    remove_stored_post(post_id, base)
+
+def skip_occurrence(series_id, date_str):
+    """Leave one date out of a recurring series"""
+    series = get_post_details(series_id)
+    if series:
+        update_post(series_id, with_exception(series, date_str), series)
+
+def save_occurrence(series_id, date_str, post_data):
+    """Store edits to one occurrence as overrides on its series"""
+    series = get_post_details(series_id)
+    if not series:
+        return
+    if post_data['date'] == date_str:
+        update_post(series_id, with_override(series, date_str, post_data), series)
+    else:
+        # Moving a single occurrence detaches it as a post of its own
+        update_post(series_id, with_exception(series, date_str), series)
+        add_post(post_data)
+
+def materialize_series(series_id, start_date, end_date):
+    """Turn a series' occurrences between two dates into real posts with one storage write"""
+    try:
+        storage = get_storage()
+        if not storage:
+            raise RuntimeError("Storage is unavailable")
+        series = get_post_details(series_id)
+        posts, updated = materialize(series, start_date, end_date)
+        if not posts:
+            return 0
+        
+        # Write everything queued first so the series check below sees the latest copy
+        get_write_queue().flush()
+        stored = storage.get(series_id)
+        if version_of(stored) != version_of(series):
+            raise RuntimeError("The series was changed by someone else; reopen it and try again")
+        _, conflicts = write_changes({series_id: stored}, posts, [updated], [])
+        if conflicts:
+            # Each write in a batch is checked on its own, so the new posts landed although the
+            # series still shows their dates; take them out again rather than show each date twice
+            write_changes({post['id']: post for post in posts}, [], [], [post['id'] for post in posts])
+            raise RuntimeError("The series was changed by someone else; reopen it and try again")
+        return len(posts)
+    except Exception as e:
+        st.error(f"Error creating posts: {str(e)}")
+        return 0
+
+def write_bulk(post_ids, operation):
+    """Run a bulk edit as one read and one compare-and-swap batch write; returns (written, conflicts)
+
+    operation gets the selected posts as stored and returns (new posts, changed posts, ids to delete).
+    """
+    storage = get_storage()
+    if not storage:
+        raise RuntimeError("Storage is unavailable")
+    # Queued edits go first so the bulk write builds on them instead of racing them
+    get_write_queue().flush()
+    current = storage.get_many(post_ids)
+    store = st.session_state.store
+    for post_id in set(post_ids) - set(current):
+        # Deleted by someone else since it was selected
+        store.remove(post_id)
+        unindex_post(post_id)
+    return write_changes(current, *operation(list(current.values())))
+
+def write_changes(current, inserts, updates, deletes, user=None):
+    """Write inserts, updates and deletes as one compare-and-swap batch and journal what landed
+
+    current maps the id of every updated or deleted post to its stored copy. Inserts
+    without an id get a new one. Returns (written, conflicts).
+    """
+    id_allocator = get_id_allocator()
+    for post in inserts:
+        if 'id' in post:
+            # Brought back by a restore
+            stamp_post(post, version_of(post) + 1)
+        else:
+            post['id'] = id_allocator.next_id()
+            stamp_post(post, 1)
+    for post in updates:
+        stamp_post(post, version_of(current[post['id']]) + 1)
+    conflicts = get_storage().apply_batch(
+        inserts,
+        [(post, version_of(current[post['id']])) for post in updates],
+        [(post_id, version_of(current[post_id])) for post_id in deletes]
+    )
+    
+    user = user or current_user()
+    record_changes(
+        [create_entry(post, user) for post in inserts if post['id'] not in conflicts]
+        + [update_entry(current[post['id']], post, user) for post in updates if post['id'] not in conflicts]
+        + [delete_entry(post_id, current[post_id], user) for post_id in deletes if post_id not in conflicts]
+    )
+    
+    store = st.session_state.store
+    for post in inserts + updates:
+        if post['id'] not in conflicts:
+            store.add(post)
+            index_post(post)
+    for post_id in deletes:
+        if post_id not in conflicts:
+            store.remove(post_id)
+            unindex_post(post_id)
+    for post_id, theirs in conflicts.items():
+        if theirs is None:
+            store.remove(post_id)
+            unindex_post(post_id)
+        else:
+            store.update(theirs)
+            index_post(theirs)
+    invalidate_cache()
+    return len(inserts) + len(updates) + len(deletes) - len(conflicts), len(conflicts)
+
+def run_bulk_action(operation, verb, clear_selection=False):
+    """Apply a bulk operation to the selected posts and report the outcome after the rerun"""
+    try:
+        written, conflicts = write_bulk(list(st.session_state.bulk_selection), operation)
+    except Exception as e:
+        st.error(f"Error applying bulk edit: {str(e)}")
+        return
+    report = f"{verb} {written} post(s)"
+    if conflicts:
+        report += f"; {conflicts} changed at the same time by someone else were left as they are"
+    st.session_state.bulk_report = report
+    if clear_selection:
+        st.session_state.bulk_selection.clear()
+    st.rerun()
 
 def clear_all_posts():
-    """Clear all posts from storage"""
-    st.session_state.posts = []
-    st.session_state.next_id = 1
-    save_posts([], 1)
+    """Clear all posts from storage, snapshotting them first so they can be restored"""
+    try:
+        storage = get_storage()
+        if not storage:
+            return False
+        
+        settle_writes(storage)
+        journal = get_journal()
+        journal_seq = journal.head() if journal else None
+        posts = storage.load()
+        if journal:
+            journal.save_snapshot(journal_seq, posts)
+            get_snapshot_schedule().saved(journal_seq)
+        storage.compact([])
+        record_changes([clear_entry(len(posts), current_user())])
+        st.session_state.store.clear()
+        invalidate_cache()
+        return True
+    except Exception as e:
+        st.error(f"Error clearing posts: {str(e)}")
+        return False
+
+def restore_posts(ts):
+    """Put every post back the way it was at ISO time ts with one batched write; returns (written, conflicts)"""
+    storage = get_storage()
+    journal = get_journal()
+    if not storage or not journal:
+        raise RuntimeError("Storage is unavailable")
+    settle_writes(storage)
+    target, changed = restore_target(journal, ts)
+    current = {post['id']: post for post in storage.load()}
+    
+    # Versions and timestamps move on, so only the content is compared
+    def content(post):
+        return {field: value for field, value in post.items() if field not in ('version', 'updated_at')}
+    
+    # Only changes the journal saw after ts are undone, so a post whose entries haven't
+    # reached it yet (e.g. still on another replica) is left alone
+    inserts = [dict(post) for post_id, post in target.items() if post_id not in current]
+    updates = [
+        dict(post) for post_id, post in target.items()
+        if post_id in current and post_id in changed and content(post) != content(current[post_id])
+    ]
+    deletes = [post_id for post_id in current if post_id not in target and post_id in changed]
+    written = write_changes(current, inserts, updates, deletes, user=f"{current_user()} (restore to {ts})")
+    # Simpler and no slower than patching the session's posts one by one
+    load_store()
+    return written
 
-def import_posts(imported_posts):
-    """Import posts from JSON"""
-    for post in imported_posts:
-        post['id'] = st.session_state.next_id
-        st.session_state.next_id += 1
+def import_posts(stream, progress=None):
+    """Validate and store posts from a JSON or JSON Lines stream, one chunk per storage write"""
+    storage = get_storage()
+    if not storage:
+        raise RuntimeError("Storage is unavailable")
+    id_allocator = get_id_allocator()
     
-    st.session_state.posts.extend(imported_posts)
-    save_posts(st.session_state.posts, st.session_state.next_id)
+    def write_chunk(posts):
+        for post in posts:
+            post['id'] = id_allocator.next_id()
+            stamp_post(post, 1)
+        storage.bulk_import(posts)
+        record_changes([create_entry(post, current_user()) for post in posts])
+        st.session_state.store.extend(posts)
+        for post in posts:
+            index_post(post)
+    
+    try:
+        return import_stream(stream, write_chunk, chunk_size=IMPORT_CHUNK_SIZE, progress=progress)
+    finally:
+        invalidate_cache()
+
+def build_view_html(view, start, store):
+    """Month, week or quarter HTML for the range starting at start"""
+    _, end = visible_range(view, start)
+    with get_metrics().timed(f'render.{view.lower()}_html') as timing:
+        posts_by_date = group_by_date(get_posts_in_range(start, end, store))
+        if view == 'Week':
+            html = week_grid_html(start, lambda date_str: posts_by_date.get(date_str, []))
+        elif view == 'Quarter':
+            html = quarter_html(start, {date_str: len(posts) for date_str, posts in posts_by_date.items()})
+        else:
+            html = month_grid_html(start.year, start.month, lambda date_str: posts_by_date.get(date_str, []))
+        timing['size'] = len(html)
+    return html
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=64, show_spinner=False)
+def shared_view_html(view, start, revision, _store):
+    """View HTML for the posts every session loads at a storage revision, built once for all of them"""
+    return build_view_html(view, start, _store)
+
+def render_view_html(view, anchor):
+    """Month, week or quarter HTML, shared between sessions showing the same posts"""
+    store = st.session_state.store
+    start, _ = visible_range(view, anchor)
+    revision = st.session_state.revision
+    if revision is not None and st.session_state.get('shared_store_revision') == store.revision:
+        return shared_view_html(view, start, revision, store)
+    # Edited or replayed since it was loaded, so only this session has these posts
+    key = (view, start, store.revision)
+    rendered = st.session_state.setdefault('grid_html', {})
+    if key not in rendered:
+        if len(rendered) >= 12:
+            rendered.clear()
+        rendered[key] = build_view_html(view, start, store)
+    return rendered[key]
+
+def analytics_key():
+    """Cache key for this session's posts: the storage revision while they are what every session loaded, else the store's own"""
+    store = st.session_state.store
+    revision = st.session_state.revision
+    if revision is not None and st.session_state.get('shared_store_revision') == store.revision:
+        return 'storage', revision
+    return 'session', store.revision
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=16, show_spinner=False)
+def analytics_charts(key, _load_frame):
+    """(posts per week by platform, status funnel, pillar counts) for the posts under key, aggregated once"""
+    from analytics import pillar_distribution, posts_per_week_by_platform, status_funnel
+    posts_df = _load_frame()
+    return posts_per_week_by_platform(posts_df), status_funnel(posts_df), pillar_distribution(posts_df)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=16, show_spinner=False)
+def analytics_gaps(key, min_gap, _load_frame):
+    """Cadence gaps of at least min_gap days for the posts under key"""
+    from analytics import cadence_gaps
+    return cadence_gaps(_load_frame(), min_gap)
+
+def get_posts_frame():
+    """Posts as a DataFrame for analytics, rebuilt only when this session's posts change"""
+    # pandas takes a noticeable part of a second to import, so it waits until analytics are opened
+    from analytics import posts_frame
+    store = st.session_state.store
+    cached = st.session_state.get('posts_frame')
+    if cached is None or cached[0] != store.revision:
+        cached = (store.revision, posts_frame(store))
+        st.session_state.posts_frame = cached
+    return cached[1]
+
+def end_edit():
+    """Forget merge and series-occurrence state once the edit form is saved or abandoned"""
+    st.session_state.pop('editing_base', None)
+    st.session_state.pop('merge_fields', None)
+    st.session_state.pop('editing_occurrence', None)
+
+def reset_agenda_page():
+    """Go back to the first agenda page when the visible range changes"""
+    st.session_state.agenda_page = 0
+
+def reset_search_page():
+    """Go back to the first page of results when the search changes"""
+    st.session_state.search_page = 0
+
+def handle_grid_click():
+    """Apply a click on the HTML grid: open a post, start one on a day or open a week"""
+    click = st.session_state.calendar_grid.get('click')
+    if not click:
+        return
+    action, value = click.get('action'), click.get('value')
+    if action == 'view':
+        post = find_post(value)
+        if post:
+            st.session_state.viewing_post = post
+            st.session_state.show_modal = False
+    elif action == 'add':
+        end_edit()
+        st.session_state.show_modal = True
+        st.session_state.editing_post = None
+        st.session_state.viewing_post = None
+        st.session_state.selected_date = value
+    elif action == 'week':
+        try:
+            st.session_state.current_date = datetime.strptime(value, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return
+        st.session_state.calendar_view = 'Week'
+
+# Shows the HTML grids and sends their clicks back as triggers, so the session survives a click
+calendar_grid = st.components.v2.component('calendar_grid', js=GRID_CLICK_JS, isolate_styles=False)
+
+def export_posts(export_format, start_date=None, end_date=None, status=None, platform=None):
+    """Callable that builds the export in the chosen format when the download is clicked"""
+    storage = get_storage()
+    queue = get_write_queue()
+    if not storage:
+        raise RuntimeError("Storage is unavailable")
+    
+    def build():
+        # The session only holds summaries, so export the full posts from storage once queued edits are in
+        queue.flush()
+        return export_file(storage, export_format, start_date, end_date, status, platform, chunk_size=EXPORT_CHUNK_SIZE)
+    return build
+
+rerun_trace.lap('load')
 
 # Header
 col1, col2, col3 = st.columns([2, 3, 2])
 with col1:
     st.title("📅 Content Calendar")
+with col2:
+    st.radio("View", VIEWS, key='calendar_view', horizontal=True, label_visibility='collapsed', on_change=reset_agenda_page)
+    if st.session_state.calendar_view == 'Month':
+        st.toggle("⚡ Fast grid", key='fast_grid', help="Draw the month as one block instead of a button per post")
+    elif st.session_state.calendar_view == 'Agenda':
+        st.selectbox("Days ahead", [7, 14, 30, 90], key='agenda_days', on_change=reset_agenda_page)
 with col3:
     if st.button("➕ New Post", type="primary", use_container_width=True):
+        end_edit()
         st.session_state.show_modal = True
         st.session_state.editing_post = None
         st.session_state.viewing_post = None
         st.rerun()
 
-# Month navigation
+if st.session_state.get('warm_start'):
+    saved_at = datetime.fromtimestamp(st.session_state.warm_start).strftime('%b %d, %H:%M')
+    st.info(f"⏳ Showing the calendar as saved on {saved_at} while the latest posts load...")
+
+# Search
+if st.toggle("🔍 Search", key='show_search'):
+    search_index = get_search_index()
+    st.text_input("Search", key='search_query', placeholder="Words from the title, notes, comments or pillar", label_visibility='collapsed', on_change=reset_search_page)
+    status_col, platform_col, type_col, pillar_col = st.columns(4)
+    with status_col:
+        st.selectbox("Status", ['All'] + STATUSES, key='search_status', on_change=reset_search_page)
+    with platform_col:
+        st.selectbox("Platform", ['All'] + PLATFORMS, key='search_platform', on_change=reset_search_page)
+    with type_col:
+        st.selectbox("Content Type", ['All'] + CONTENT_TYPES, key='search_type', on_change=reset_search_page)
+    with pillar_col:
+        st.selectbox("Content Pillar", ['All'] + search_index.values('content_pillar'), key='search_pillar', on_change=reset_search_page)
+    
+    search_filters = {
+        field: None if value == 'All' else value
+        for field, value in [
+            ('status', st.session_state.search_status),
+            ('platforms', st.session_state.search_platform),
+            ('content_type', st.session_state.search_type),
+            ('content_pillar', st.session_state.search_pillar),
+        ]
+    }
+    page = st.session_state.search_page
+    total, result_ids = search_index.search(st.session_state.search_query, search_filters, page * SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE)
+    if st.session_state.search_query or any(search_filters.values()):
+        st.caption(f"{total} matching post(s)")
+        if st.session_state.get('bulk_mode') and total and st.button(f"☑️ Select all {total} for bulk edit", key='search_select_all'):
+            st.session_state.bulk_selection.update(search_index.search(st.session_state.search_query, search_filters, 0, total)[1])
+            st.rerun()
+    
+    for post_id in result_ids:
+        post = st.session_state.store.get(post_id)
+        if post is None:
+            continue
+        date_col, title_col, go_col = st.columns([1, 4, 1])
+        with date_col:
+            st.write(datetime.strptime(post['date'], '%Y-%m-%d').strftime('%b %d, %Y'))
+        with title_col:
+            platforms_text = "".join(PLATFORM_EMOJIS.get(p, '📱') for p in post.get('platforms', []))
+            st.write(f"**{post['title']}** · {post.get('status', 'Draft')} {platforms_text}")
+        with go_col:
+            if st.button("📅 Go", key=f"search_go_{post_id}", use_container_width=True):
+                st.session_state.current_date = datetime.strptime(post['date'], '%Y-%m-%d')
+                st.session_state.agenda_page = 0
+                st.session_state.viewing_post = post
+                st.session_state.show_modal = False
+                st.rerun()
+    
+    page_count = -(-total // SEARCH_PAGE_SIZE)
+    if page_count > 1:
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            if st.button("‹ Previous", key='search_prev', disabled=page == 0, use_container_width=True):
+                st.session_state.search_page = page - 1
+                st.rerun()
+        with page_col:
+            st.markdown(f"<p style='text-align: center;'>Page {page + 1} of {page_count}</p>", unsafe_allow_html=True)
+        with next_col:
+            if st.button("Next ›", key='search_next', disabled=page >= page_count - 1, use_container_width=True):
+                st.session_state.search_page = page + 1
+                st.rerun()
+    st.markdown("---")
+
+rerun_trace.lap('search')
+
+# Navigation
+view = st.session_state.calendar_view
+agenda_days = st.session_state.agenda_days
 nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
 with nav_col1:
     if st.button("← Previous", use_container_width=True):
-        current = st.session_state.current_date
-        st.session_state.current_date = current - timedelta(days=current.day)
+        st.session_state.current_date = shift_anchor(view, st.session_state.current_date, -1, agenda_days)
+        st.session_state.agenda_page = 0
         st.rerun()
 
 with nav_col2:
-    st.markdown(f"<h2 style='text-align: center; color: #a855f7;'>{st.session_state.current_date.strftime('%B %Y')}</h2>", unsafe_allow_html=True)
+    st.markdown(f"<h2 style='text-align: center; color: #a855f7;'>{view_title(view, st.session_state.current_date, agenda_days)}</h2>", unsafe_allow_html=True)
 
 with nav_col3:
     if st.button("Next →", use_container_width=True):
-        current = st.session_state.current_date
-        days_in_month = calendar.monthrange(current.year, current.month)[1]
-        st.session_state.current_date = current + timedelta(days=days_in_month - current.day + 1)
+        st.session_state.current_date = shift_anchor(view, st.session_state.current_date, 1, agenda_days)
+        st.session_state.agenda_page = 0
         st.rerun()
 
 st.markdown("<br>", unsafe_allow_html=True)
@@ -283,61 +1200,236 @@ st.markdown("<br>", unsafe_allow_html=True)
 # Calendar grid
 year = st.session_state.current_date.year
 month = st.session_state.current_date.month
-cal_data = get_calendar_data(year, month)
-
-# Day headers
-days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-cols = st.columns(7)
-for i, day in enumerate(days):
-    with cols[i]:
-        st.markdown(f"<div class='day-header'>{day}</div>", unsafe_allow_html=True)
 
-# Calendar days
-for week in cal_data:
+if view == 'Agenda':
+    range_start, range_end = visible_range(view, st.session_state.current_date, agenda_days)
+    agenda_posts = get_posts_in_range(range_start, range_end)
+    page_count = max(1, -(-len(agenda_posts) // AGENDA_PAGE_SIZE))
+    page = min(st.session_state.agenda_page, page_count - 1)
+    
+    if not agenda_posts:
+        st.info("No posts scheduled in this range.")
+    
+    # Only the current page gets widgets
+    for post in agenda_posts[page * AGENDA_PAGE_SIZE:(page + 1) * AGENDA_PAGE_SIZE]:
+        date_col, title_col, view_col = st.columns([1, 4, 1])
+        with date_col:
+            st.write(datetime.strptime(post['date'], '%Y-%m-%d').strftime('%a %b %d'))
+        with title_col:
+            platforms_text = "".join(PLATFORM_EMOJIS.get(p, '📱') for p in post.get('platforms', []))
+            st.write(f"**{post['title']}** · {post.get('status', 'Draft')} {platforms_text}")
+        with view_col:
+            if st.button("👁️ View", key=f"agenda_view_{post['id']}", use_container_width=True):
+                st.session_state.viewing_post = post
+                st.session_state.show_modal = False
+                st.rerun()
+    
+    if page_count > 1:
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            if st.button("‹ Newer", disabled=page == 0, use_container_width=True):
+                st.session_state.agenda_page = page - 1
+                st.rerun()
+        with page_col:
+            st.markdown(f"<p style='text-align: center;'>Page {page + 1} of {page_count}</p>", unsafe_allow_html=True)
+        with next_col:
+            if st.button("Later ›", disabled=page >= page_count - 1, use_container_width=True):
+                st.session_state.agenda_page = page + 1
+                st.rerun()
+elif view != 'Month' or st.session_state.fast_grid:
+    # One HTML block for the whole range; clicks come back through the component
+    calendar_grid(data=render_view_html(view, st.session_state.current_date), key='calendar_grid', on_click_change=handle_grid_click)
+else:
+    cal_data = get_calendar_data(year, month)
+    month_start, month_end = visible_range('Month', st.session_state.current_date)
+    posts_by_date = group_by_date(get_posts_in_range(month_start, month_end))
+    
+    # Day headers
+    days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
     cols = st.columns(7)
-    for i, day in enumerate(week):
+    for i, day in enumerate(days):
         with cols[i]:
-            if day == 0:
-                st.markdown("<div class='calendar-day-empty'></div>", unsafe_allow_html=True)
-            else:
-                date_str = f"{year}-{month:02d}-{day:02d}"
-                day_posts = get_posts_for_date(date_str)
-                
-                container_html = "<div class='calendar-day'>"
-                container_html += f"<div class='day-number'>{day}</div>"
-                st.markdown(container_html, unsafe_allow_html=True)
-                
-                if st.button("➕", key=f"add_{date_str}", help="Add post", use_container_width=True):
-                    st.session_state.show_modal = True
-                    st.session_state.editing_post = None
-                    st.session_state.viewing_post = None
-                    st.session_state.selected_date = date_str
-                    st.rerun()
-                
-                for post in day_posts:
-                    post_html = f"<div class='post-card'>"
-                    post_html += f"<div class='post-title'>{post['title'][:35]}{'...' if len(post['title']) > 35 else ''}</div>"
-                    
-                    if post.get('platforms'):
-                        post_html += "<div class='platform-badge'>"
-                        for platform in post.get('platforms', []):
-                            emoji = {'Instagram': '📷', 'Facebook': '📘', 'LinkedIn': '💼', 'Twitter': '🐦', 'TikTok': '🎵', 'YouTube': '📹'}.get(platform, '📱')
-                            post_html += f"{emoji}"
-                        post_html += "</div>"
+            st.markdown(f"<div class='day-header'>{day}</div>", unsafe_allow_html=True)
+    
+    # Calendar days
+    for week in cal_data:
+        cols = st.columns(7)
+        for i, day in enumerate(week):
+            with cols[i]:
+                if day == 0:
+                    st.markdown("<div class='calendar-day-empty'></div>", unsafe_allow_html=True)
+                else:
+                    date_str = f"{year}-{month:02d}-{day:02d}"
+                    day_posts = posts_by_date.get(date_str, [])
                     
-                    post_html += "</div>"
-                    st.markdown(post_html, unsafe_allow_html=True)
+                    container_html = "<div class='calendar-day'>"
+                    container_html += f"<div class='day-number'>{day}</div>"
+                    st.markdown(container_html, unsafe_allow_html=True)
                     
-                    if st.button("👁️ View", key=f"view_{post['id']}", use_container_width=True):
-                        st.session_state.viewing_post = post
-                        st.session_state.show_modal = False
+                    if st.button("➕", key=f"add_{date_str}", help="Add post", use_container_width=True):
+                        end_edit()
+                        st.session_state.show_modal = True
+                        st.session_state.editing_post = None
+                        st.session_state.viewing_post = None
+                        st.session_state.selected_date = date_str
                         st.rerun()
-                
-                st.markdown("</div>", unsafe_allow_html=True)
+                    
+                    for post in day_posts:
+                        post_html = f"<div class='post-card'>"
+                        post_html += f"<div class='post-title'>{post['title'][:35]}{'...' if len(post['title']) > 35 else ''}</div>"
+                        
+                        if post.get('platforms'):
+                            post_html += "<div class='platform-badge'>"
+                            for platform in post.get('platforms', []):
+                                post_html += PLATFORM_EMOJIS.get(platform, '📱')
+                            post_html += "</div>"
+                        
+                        post_html += "</div>"
+                        st.markdown(post_html, unsafe_allow_html=True)
+                        
+                        if st.button("👁️ View", key=f"view_{post['id']}", use_container_width=True):
+                            st.session_state.viewing_post = post
+                            st.session_state.show_modal = False
+                            st.rerun()
+                    
+                    st.markdown("</div>", unsafe_allow_html=True)
+
+rerun_trace.lap('grid')
+
+# Bulk edit
+if st.session_state.get('bulk_report'):
+    st.success(f"✅ {st.session_state.pop('bulk_report')}")
+
+if st.toggle("☑️ Bulk Edit", key='bulk_mode', help="Select posts here or from search results, then change them all at once"):
+    selection = st.session_state.bulk_selection
+    range_start, range_end = visible_range(view, st.session_state.current_date, agenda_days)
+    # Occurrences of recurring series aren't stored posts, so they can't be picked here
+    range_posts = st.session_state.store.posts_in_range(range_start.strftime('%Y-%m-%d'), range_end.strftime('%Y-%m-%d'))
+    if range_posts:
+        import pandas as pd
+        table = pd.DataFrame({
+            'Select': [post['id'] in selection for post in range_posts],
+            'Date': [post['date'] for post in range_posts],
+            'Title': [post['title'] for post in range_posts],
+            'Status': [post.get('status', 'Draft') for post in range_posts],
+            'id': [post['id'] for post in range_posts],
+        })
+        # Keyed on the data revision so ticks never carry over onto rows that moved
+        edited = st.data_editor(
+            table,
+            key=f"bulk_table_{range_start:%Y%m%d}_{st.session_state.store.revision}",
+            hide_index=True,
+            disabled=['Date', 'Title', 'Status'],
+            column_config={'id': None},
+            use_container_width=True
+        )
+        for post_id, selected in zip(edited['id'], edited['Select']):
+            if selected:
+                selection.add(int(post_id))
+            else:
+                selection.discard(int(post_id))
+    
+    count_col, clear_col = st.columns([3, 1])
+    with count_col:
+        st.caption(f"{len(selection)} post(s) selected")
+    with clear_col:
+        if selection and st.button("Clear Selection", use_container_width=True):
+            selection.clear()
+            st.rerun()
+    
+    if selection:
+        status_col, platform_col = st.columns(2)
+        with status_col:
+            bulk_status = st.selectbox("New status", STATUSES, key='bulk_status')
+            if st.button("📊 Set Status", use_container_width=True):
+                run_bulk_action(lambda posts: ([], set_status(posts, bulk_status), []), "Updated")
+        with platform_col:
+            bulk_platforms = st.multiselect("Platforms", PLATFORMS, key='bulk_platforms')
+            add_col, remove_col = st.columns(2)
+            with add_col:
+                if st.button("➕ Add", disabled=not bulk_platforms, use_container_width=True):
+                    run_bulk_action(lambda posts: ([], add_platforms(posts, bulk_platforms), []), "Updated")
+            with remove_col:
+                if st.button("➖ Remove", disabled=not bulk_platforms, use_container_width=True):
+                    run_bulk_action(lambda posts: ([], remove_platforms(posts, bulk_platforms), []), "Updated")
+        
+        shift_col, duplicate_col = st.columns(2)
+        with shift_col:
+            shift_days = st.number_input("Shift by days", min_value=-365, max_value=365, value=7, key='bulk_shift')
+            if st.button("📅 Shift Dates", use_container_width=True):
+                run_bulk_action(lambda posts: ([], shift_dates(posts, int(shift_days)), []), "Moved")
+        with duplicate_col:
+            target_month = st.date_input("Duplicate into the month of", value=add_months(st.session_state.current_date, 1), key='bulk_month')
+            if st.button("📄 Duplicate", use_container_width=True):
+                run_bulk_action(lambda posts: (duplicate_to_month(posts, target_month.year, target_month.month), [], []), "Created")
+        
+        if st.checkbox(f"⚠️ Confirm deleting {len(selection)} post(s)", key='bulk_confirm_delete'):
+            if st.button("🗑️ Delete Selected", use_container_width=True):
+                run_bulk_action(lambda posts: ([], [], [post['id'] for post in posts]), "Deleted", clear_selection=True)
+    st.markdown("---")
+
+rerun_trace.lap('bulk_edit')
+
+# Edit conflicts raised when this session's queued writes met someone else's changes
+# Opening the queue waits for storage, which a warm start hasn't got yet
+write_queue = None if st.session_state.get('warm_start') else get_write_queue()
+if write_queue and isinstance(write_queue.storage, ReplicaBackend):
+    # Clashes the replica met pushing to the sheet; it can't tell whose edit lost, so everyone sees them
+    for conflict_id, conflict in write_queue.storage.take_conflicts().items():
+        write_queue.add_conflict(conflict_id, **conflict)
+for conflict_id, conflict in (write_queue.conflicts_for(st.session_state.session_id) if write_queue else {}).items():
+    mine, theirs = conflict['mine'], conflict['theirs']
+    conflict_title = (mine or theirs or {}).get('title', f"Post {conflict_id}")
+    if mine is None:
+        st.warning(f"⚠️ **{conflict_title}** was changed by someone else after you deleted it.")
+    elif theirs is None:
+        st.warning(f"⚠️ **{conflict_title}** was deleted by someone else while you were editing it.")
+    else:
+        fields = ", ".join(conflict['fields']) or "the post"
+        st.warning(f"⚠️ **{conflict_title}** was changed by someone else while you were editing it ({fields}).")
+    
+    mine_col, theirs_col, merge_col = st.columns(3)
+    with mine_col:
+        if st.button("Keep mine", key=f"keep_mine_{conflict_id}", use_container_width=True):
+            write_queue.keep_mine(conflict_id, owner=st.session_state.session_id)
+            if mine is None:
+                st.session_state.store.remove(conflict_id)
+                unindex_post(conflict_id)
+            else:
+                st.session_state.store.update(mine)
+                index_post(mine)
+            st.rerun()
+    with theirs_col:
+        if st.button("Keep theirs", key=f"keep_theirs_{conflict_id}", use_container_width=True):
+            theirs = write_queue.accept_theirs(conflict_id)
+            if theirs is None:
+                st.session_state.store.remove(conflict_id)
+                unindex_post(conflict_id)
+            else:
+                st.session_state.store.update(theirs)
+                index_post(theirs)
+            st.rerun()
+    with merge_col:
+        if mine is not None and theirs is not None and st.button("✏️ Merge", key=f"merge_{conflict_id}", use_container_width=True):
+            write_queue.accept_theirs(conflict_id)
+            merged, _ = merge_posts(conflict['base'] or theirs, mine, theirs)
+            st.session_state.editing_post = merged
+            st.session_state.editing_base = theirs
+            st.session_state.merge_fields = {field: (mine.get(field), theirs.get(field)) for field in conflict['fields']}
+            st.session_state.show_modal = True
+            st.session_state.viewing_post = None
+            st.rerun()
 
 # View Post Modal
 if st.session_state.viewing_post and not st.session_state.show_modal:
     post = st.session_state.viewing_post
+    series_id = post.get('series_id')
+    if series_id is not None:
+        series = get_post_details(series_id)
+        if series and series.get('recurrence'):
+            post = occurrence(series, post['date'])
+    else:
+        post = get_post_details(post['id']) or post
     
     st.markdown("---")
     col1, col2 = st.columns([3, 1])
@@ -346,8 +1438,11 @@ if st.session_state.viewing_post and not st.session_state.show_modal:
     with col2:
         edit_col, close_col = st.columns(2)
         with edit_col:
-            if st.button("✏️ Edit", use_container_width=True):
+            if st.button("✏️ Edit", use_container_width=True, help="Only this date" if series_id is not None else None):
+                end_edit()
                 st.session_state.editing_post = post
+                if series_id is not None:
+                    st.session_state.editing_occurrence = (series_id, post['date'])
                 st.session_state.show_modal = True
                 st.session_state.viewing_post = None
                 st.rerun()
@@ -388,7 +1483,7 @@ if st.session_state.viewing_post and not st.session_state.show_modal:
         if post.get('platforms'):
             st.markdown("**📱 Platforms:**")
             platforms_text = " ".join([
-                {'Instagram': '📷', 'Facebook': '📘', 'LinkedIn': '💼', 'Twitter': '🐦', 'TikTok': '🎵', 'YouTube': '📹'}.get(p, '📱') + f" {p}"
+                PLATFORM_EMOJIS.get(p, '📱') + f" {p}"
                 for p in post['platforms']
             ])
             st.write(platforms_text)
@@ -400,6 +1495,65 @@ if st.session_state.viewing_post and not st.session_state.show_modal:
     if post.get('comments'):
         st.markdown("**💬 Comments:**")
         st.info(post['comments'])
+    
+    recurring_id = series_id if series_id is not None else (post['id'] if post.get('recurrence') else None)
+    series_summary = st.session_state.store.get(recurring_id) if recurring_id is not None else None
+    if series_summary and series_summary.get('recurrence'):
+        st.markdown(f"**🔁 Repeats:** {describe(series_summary['recurrence'], series_summary['date'])}")
+        if series_id is not None:
+            series_col, skip_col = st.columns(2)
+            with series_col:
+                if st.button("✏️ Edit Series", use_container_width=True):
+                    end_edit()
+                    st.session_state.editing_post = get_post_details(series_id)
+                    st.session_state.show_modal = True
+                    st.session_state.viewing_post = None
+                    st.rerun()
+            with skip_col:
+                if st.button("⏭️ Skip This Date", use_container_width=True):
+                    skip_occurrence(series_id, post['date'])
+                    st.session_state.viewing_post = None
+                    st.rerun()
+        
+        with st.expander("📌 Turn occurrences into posts"):
+            first_day = datetime.strptime(post['date'], '%Y-%m-%d')
+            materialize_range = st.date_input("Occurrences between", value=(first_day, first_day + timedelta(days=30)))
+            if st.button("Create Posts", use_container_width=True) and len(materialize_range) == 2:
+                created = materialize_series(recurring_id, *(d.strftime('%Y-%m-%d') for d in materialize_range))
+                if created:
+                    st.session_state.viewing_post = None
+                    st.session_state.materialized = created
+                    st.rerun()
+                st.info("No occurrences in that range.")
+
+    journal = get_journal()
+    history_id = series_id if series_id is not None else post['id']
+    if journal and st.toggle("🕘 History", key=f"history_{history_id}"):
+        try:
+            history = journal.history(history_id)
+        except Exception as e:
+            st.error(f"Error loading history: {str(e)}")
+            history = []
+        if history:
+            st.dataframe(
+                [
+                    {
+                        'When (UTC)': entry['ts'].replace('T', ' ')[:16],
+                        'Who': entry['user'],
+                        'Change': entry['op'],
+                        'Fields': ', '.join(sorted(set(entry['changes']) - {'version', 'updated_at'})) if entry['op'] == 'update' else '',
+                    }
+                    for entry in reversed(history)
+                ],
+                hide_index=True, use_container_width=True
+            )
+        else:
+            st.caption("No recorded changes yet.")
+
+if st.session_state.get('materialized'):
+    st.success(f"✅ Created {st.session_state.pop('materialized')} posts from the series!")
+
+rerun_trace.lap('post_view')
 
 # Add/Edit Post Modal
 if st.session_state.show_modal:
@@ -407,6 +1561,13 @@ if st.session_state.show_modal:
     if st.session_state.editing_post:
         st.subheader("✏️ Edit Post")
         post = st.session_state.editing_post
+        if st.session_state.get('merge_fields'):
+            st.info("Someone else edited this post too. The form starts from your version; their values are shown below.")
+            st.dataframe(
+                [{'Field': field, 'Yours': str(values[0]), 'Theirs': str(values[1])} for field, values in st.session_state.merge_fields.items()],
+                hide_index=True,
+                use_container_width=True
+            )
     else:
         st.subheader("➕ New Post")
         post = {}
@@ -429,6 +1590,18 @@ if st.session_state.show_modal:
         
         comments = st.text_area("Comments", value=post.get('comments', ''), height=100, placeholder="Internal comments, feedback, approvals, etc.")
         
+        editing_occurrence = st.session_state.get('editing_occurrence')
+        rule = post.get('recurrence') or {}
+        if not editing_occurrence:
+            repeat_col, interval_col, until_col = st.columns(3)
+            with repeat_col:
+                repeat_options = [''] + list(FREQUENCIES)
+                repeat = st.selectbox("Repeat", repeat_options, index=repeat_options.index(rule.get('freq', '')), format_func=lambda freq: FREQUENCIES.get(freq, 'Does not repeat'))
+            with interval_col:
+                interval = st.number_input("Every (days, weeks or months)", min_value=1, max_value=52, value=rule.get('interval', 1))
+            with until_col:
+                until = st.date_input("Until", value=datetime.strptime(rule['until'], '%Y-%m-%d') if rule.get('until') else None)
+        
         col1, col2, col3 = st.columns([2, 1, 1])
         with col1:
             submit = st.form_submit_button("💾 Save Post", type="primary", use_container_width=True)
@@ -452,36 +1625,88 @@ if st.session_state.show_modal:
                 'notes': notes,
                 'comments': comments
             }
+            if not editing_occurrence and repeat:
+                # Keep the series' skipped dates and overrides
+                post_data['recurrence'] = {
+                    'exceptions': [],
+                    'overrides': {},
+                    **rule,
+                    'freq': repeat,
+                    'interval': int(interval),
+                    'until': until.strftime('%Y-%m-%d') if until else ''
+                }
             
-            with st.spinner('Saving...'):
-                if st.session_state.editing_post:
-                    update_post(st.session_state.editing_post['id'], post_data)
-                    st.success("✅ Post updated!")
-                else:
-                    add_post(post_data)
-                    st.success("✅ Post created!")
+            if editing_occurrence:
+                save_occurrence(*editing_occurrence, post_data)
+                st.success("✅ Post updated!")
+            elif st.session_state.editing_post:
+                base = st.session_state.get('editing_base') or st.session_state.editing_post
+                update_post(st.session_state.editing_post['id'], post_data, base)
+                st.success("✅ Post updated!")
+            else:
+                if not add_post(post_data):
+                    st.stop()
+                st.success("✅ Post created!")
             
             st.session_state.show_modal = False
             st.session_state.editing_post = None
+            end_edit()
             if 'selected_date' in st.session_state:
                 del st.session_state.selected_date
             st.rerun()
         
         if delete:
-            with st.spinner('Deleting...'):
-                delete_post(st.session_state.editing_post['id'])
+            if editing_occurrence:
+                skip_occurrence(*editing_occurrence)
+            else:
+                delete_post(st.session_state.editing_post['id'], st.session_state.get('editing_base') or st.session_state.editing_post)
             st.session_state.show_modal = False
             st.session_state.editing_post = None
+            end_edit()
             st.success("✅ Post deleted!")
             st.rerun()
         
         if cancel:
             st.session_state.show_modal = False
             st.session_state.editing_post = None
+            end_edit()
             if 'selected_date' in st.session_state:
                 del st.session_state.selected_date
             st.rerun()
 
+rerun_trace.lap('post_form')
+
+# Analytics
+st.markdown("---")
+if st.toggle("📈 Analytics", key='show_analytics') and len(st.session_state.store):
+    # The frame and each aggregate are only computed when the posts change
+    per_week, funnel, pillars = analytics_charts(analytics_key(), get_posts_frame)
+    
+    st.subheader("Posts per Week by Platform")
+    st.bar_chart(per_week)
+    
+    funnel_col, pillar_col = st.columns(2)
+    with funnel_col:
+        st.subheader("Status Funnel by Month")
+        st.bar_chart(funnel)
+    with pillar_col:
+        st.subheader("Content Pillars")
+        if pillars.empty:
+            st.info("No content pillars set yet.")
+        else:
+            st.bar_chart(pillars)
+    
+    st.subheader("Cadence Gaps")
+    min_gap = st.slider("Flag gaps of at least (days)", 1, 30, 3)
+    gaps = analytics_gaps(analytics_key(), min_gap, get_posts_frame)
+    if gaps.empty:
+        st.success(f"✅ No gaps of {min_gap}+ days between posts")
+    else:
+        st.metric("Longest gap", f"{gaps['empty_days'].iloc[0]} days")
+        st.dataframe(gaps, hide_index=True, use_container_width=True)
+
+rerun_trace.lap('analytics')
+
 # Sidebar
 with st.sidebar:
     try:
@@ -497,59 +1722,196 @@ with st.sidebar:
             </div>
         """, unsafe_allow_html=True)
     
+    st.text_input("👤 Your name", key='user_name', placeholder=f"Session {st.session_state.session_id[:6]}", help="Shown in post history")
+    
     st.markdown("---")
     st.header("📊 Calendar Stats")
-    st.metric("Total Posts", len(st.session_state.posts))
-    st.success("☁️ Cloud Synced")
-    
-    if st.session_state.posts:
-        status_counts = {}
-        for post in st.session_state.posts:
-            status = post.get('status', 'Draft')
-            status_counts[status] = status_counts.get(status, 0) + 1
+    st.metric("Total Posts", len(st.session_state.store))
+    
+    if st.session_state.get('warm_start'):
+        sync_status = 'loading'
+    else:
+        sync_status = write_queue.status() if write_queue else 'offline'
+    if sync_status == 'loading':
+        st.info("⏳ Loading the latest posts...")
+    elif sync_status == 'synced':
+        st.success("☁️ Synced")
+    elif sync_status == 'pending':
+        st.info(f"⏳ {write_queue.pending_count()} change(s) pending")
+    elif sync_status == 'conflict':
+        st.warning(f"⚠️ {len(write_queue.conflicts)} edit conflict(s) to resolve")
+    elif sync_status == 'error':
+        st.warning(f"⚠️ Sync failed, retrying: {write_queue.last_error}")
+    else:
+        st.error("⚠️ Storage unavailable")
+    
+    if write_queue and write_queue.pending_count():
+        if st.button("🔄 Sync Now", use_container_width=True):
+            try:
+                with st.spinner('Syncing...'):
+                    write_queue.flush()
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+            else:
+                st.rerun()
+    
+    # Opening storage would block while a warm start is still loading
+    replica = None if st.session_state.get('warm_start') else get_storage()
+    if isinstance(replica, ReplicaBackend):
+        replica_status = replica.status()
+        if replica_status == 'offline':
+            st.warning(f"📴 Offline, {replica.pending_count()} change(s) saved locally: {replica.last_error}")
+        elif replica_status == 'pending':
+            st.caption(f"💾 {replica.pending_count()} change(s) waiting to reach the sheet")
+        if replica_status != 'synced' and st.button("☁️ Sync With Sheet", use_container_width=True):
+            try:
+                with st.spinner('Syncing with the sheet...'):
+                    replica.sync()
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+            else:
+                invalidate_cache()
+                st.rerun()
+    
+    if len(st.session_state.store):
+        status_counts = st.session_state.store.status_counts()
         
         st.subheader("By Status")
         for status, count in status_counts.items():
             st.write(f"{status}: {count}")
         
-        platform_counts = {}
-        for post in st.session_state.posts:
-            for platform in post.get('platforms', []):
-                platform_counts[platform] = platform_counts.get(platform, 0) + 1
+        platform_counts = st.session_state.store.platform_counts()
         
         st.subheader("By Platform")
         for platform, count in platform_counts.items():
-            emoji = {'Instagram': '📷', 'Facebook': '📘', 'LinkedIn': '💼', 'Twitter': '🐦', 'TikTok': '🎵', 'YouTube': '📹'}.get(platform, '📱')
+            emoji = PLATFORM_EMOJIS.get(platform, '📱')
             st.write(f"{emoji} {platform}: {count}")
     
     st.markdown("---")
     st.subheader("📥 Backup")
     
-    if st.button("📤 Export", use_container_width=True):
-        json_data = json.dumps(st.session_state.posts, indent=2)
-        st.download_button(
-            label="⬇️ Download",
-            data=json_data,
-            file_name=f"calendar_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json",
-            use_container_width=True
-        )
+    with st.expander("Export options"):
+        export_format = st.selectbox("Format", list(EXPORT_FORMATS))
+        limit_dates = st.checkbox("Only a date range")
+        export_range = st.date_input("Dates", value=(datetime.now(), datetime.now() + timedelta(days=30)), disabled=not limit_dates)
+        export_status = st.selectbox("Status", ['All'] + STATUSES)
+        export_platform = st.selectbox("Platform", ['All'] + PLATFORMS)
+    
+    start_date = end_date = None
+    if limit_dates and len(export_range) == 2:
+        start_date, end_date = (d.strftime('%Y-%m-%d') for d in export_range)
+    _, extension, mime = EXPORT_FORMATS[export_format]
+    # The file is only built once the button is clicked; a warm start has no storage to build it from yet
+    export_data = b''
+    if not st.session_state.get('warm_start'):
+        try:
+            export_data = export_posts(
+                export_format, start_date, end_date,
+                status=None if export_status == 'All' else export_status,
+                platform=None if export_platform == 'All' else export_platform
+            )
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
+    st.download_button(
+        label="📤 Export",
+        data=export_data,
+        file_name=f"calendar_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+        mime=mime,
+        on_click='ignore',
+        disabled=not callable(export_data),
+        use_container_width=True
+    )
     
-    uploaded_file = st.file_uploader("📂 Import", type=['json'])
-    if uploaded_file is not None:
+    uploaded_file = st.file_uploader("📂 Import", type=['json', 'jsonl'])
+    # The uploader keeps its file across reruns, so only import each upload once
+    if uploaded_file is not None and st.session_state.get('imported_file') != (uploaded_file.name, uploaded_file.size):
+        st.session_state.imported_file = (uploaded_file.name, uploaded_file.size)
+        progress_bar = st.progress(0.0, text='Importing...')
+        
+        def report_progress(rows_read):
+            done = min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0)
+            progress_bar.progress(done, text=f'Importing... {rows_read} rows read')
+        
         try:
-            imported_posts = json.load(uploaded_file)
-            with st.spinner('Importing...'):
-                import_posts(imported_posts)
-            st.success(f"✅ Imported {len(imported_posts)} posts!")
+            st.session_state.import_report = import_posts(io.TextIOWrapper(uploaded_file, encoding='utf-8'), progress=report_progress)
             st.rerun()
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
     
+    if st.session_state.get('import_report'):
+        imported, errors = st.session_state.import_report
+        st.success(f"✅ Imported {imported} posts!")
+        if errors:
+            st.warning(f"⚠️ Skipped {len(errors)} invalid rows")
+            st.dataframe(errors, hide_index=True, use_container_width=True)
+        if st.button("Dismiss", use_container_width=True):
+            del st.session_state.import_report
+            st.rerun()
+    
+    if st.button("🧹 Compact Storage", use_container_width=True, help="Rewrite the sheet without deleted rows"):
+        with st.spinner('Compacting...'):
+            compacted = compact_posts()
+        if compacted:
+            st.success("✅ Compacted!")
+    
+    with st.expander("🕘 Restore"):
+        st.caption("Put every post back the way it was at a moment in the past (UTC). The restore itself can be undone the same way.")
+        now = datetime.now(timezone.utc)
+        restore_day = st.date_input("Day", value=now.date(), max_value=now.date())
+        restore_time = st.time_input("Time (UTC)", value=now.time().replace(second=0, microsecond=0))
+        if st.button("Restore", use_container_width=True):
+            restore_ts = datetime.combine(restore_day, restore_time, tzinfo=timezone.utc).isoformat(timespec='seconds')
+            try:
+                with st.spinner('Restoring...'):
+                    written, conflicts = restore_posts(restore_ts)
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+            else:
+                st.session_state.restore_report = f"Restored to {restore_ts}: {written} post(s) changed"
+                if conflicts:
+                    st.session_state.restore_report += f", {conflicts} changed at the same time were left as they are"
+                st.rerun()
+    
+    if st.session_state.get('restore_report'):
+        st.success(f"✅ {st.session_state.pop('restore_report')}")
+    
     st.markdown("---")
     if st.button("🗑️ Clear All", use_container_width=True):
         if st.checkbox("⚠️ Confirm deletion"):
             with st.spinner('Clearing...'):
-                clear_all_posts()
-            st.success("✅ Cleared!")
-            st.rerun()
\ No newline at end of file
+                cleared = clear_all_posts()
+            if cleared:
+                st.rerun()
+    
+    st.markdown("---")
+    if st.toggle("🐞 Performance", key='show_perf', help="Where the time goes: storage calls and render phases"):
+        last_trace = st.session_state.get('last_trace')
+        if last_trace:
+            st.caption(f"Last rerun: {last_trace['total_ms']} ms")
+            st.dataframe(last_trace['phases'], hide_index=True, use_container_width=True)
+            if last_trace['operations']:
+                st.dataframe(last_trace['operations'], hide_index=True, use_container_width=True)
+        metrics = get_metrics()
+        st.caption("Since the server started (sizes: cells for sheets.*, posts for storage.* and journal.*)")
+        st.dataframe(
+            metrics.snapshot(), hide_index=True, use_container_width=True,
+            column_order=['name', 'calls', 'mean_ms', 'p95_ms', 'max_ms', 'total_ms', 'size', 'errors']
+        )
+        metrics_col, reset_col = st.columns(2)
+        with metrics_col:
+            st.download_button("⬇️ JSON", data=metrics.to_json(), file_name="calendar_metrics.json", mime="application/json", use_container_width=True)
+        with reset_col:
+            if st.button("Reset", use_container_width=True):
+                metrics.reset()
+                st.rerun()
+
+rerun_trace.lap('sidebar')
+st.session_state.last_trace = get_metrics().end_trace().to_dict()
+
+if st.session_state.get('warm_start'):
+    # The page is already on screen; rerun with the live posts as soon as they arrive.
+    # Touching the placeholder each time round lets a click interrupt the wait.
+    loading = st.empty()
+    while not get_startup().wait(0.5):
+        loading.empty()
+    st.rerun()
\ No newline at end of file
@@ -0,0 +1,463 @@
+import argparse
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from analytics import cadence_gaps, pillar_distribution, posts_frame, posts_per_week_by_platform, status_funnel
+from importer import import_stream
+from instrumentation import percentile
+from post_store import PostStore
+from schema import CONTENT_TYPES, PLATFORMS, STATUSES
+from search import SearchIndex
+from storage import MemoryBackend, SheetsBackend, SQLiteBackend
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+BACKENDS = ['memory', 'sqlite', 'sheets']
+PILLARS = ['Education', 'Behind the Scenes', 'Product', 'Community', 'Announcements', 'Tips', 'Case Studies', 'Culture']
+_WORDS = (
+    'launch campaign brand story reel teaser update team client growth summer winter sale guide tips '
+    'behind scenes product feature event webinar recap quote review spotlight partner community design'
+).split()
+# Posts per write when importing, as in the app
+IMPORT_CHUNK_SIZE = 500
+# Posts per batch when saving, as in one write queue flush
+SAVE_BATCH_SIZE = 50
+# Regressions smaller than this are noise
+NOISE_FLOOR_MS = 1.0
+
+
+def generate_posts(count, start_date='2024-01-01', spread_days=365, notes_size=200, comments_size=50, seed=0):
+    """count valid posts with ids 1..count and dates spread at random over spread_days from start_date
+
+    notes_size and comments_size are the approximate length in characters of those fields.
+    The same arguments always give the same posts.
+    """
+    rng = random.Random(seed)
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    stamp = datetime(2024, 1, 1).isoformat(timespec='seconds')
+    posts = []
+    for post_id in range(1, count + 1):
+        posts.append({
+            'id': post_id,
+            'date': (start + timedelta(days=rng.randrange(max(spread_days, 1)))).strftime('%Y-%m-%d'),
+            'title': ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(2, 6))).capitalize(),
+            'platforms': rng.sample(PLATFORMS, rng.randint(1, 3)),
+            'status': rng.choice(STATUSES),
+            'content_type': rng.choice(CONTENT_TYPES + ['']),
+            'content_pillar': rng.choice(PILLARS + ['']),
+            'link': f'https://example.com/posts/{post_id}',
+            'notes': _text(rng, notes_size),
+            'comments': _text(rng, comments_size),
+            'version': 1,
+            'updated_at': stamp,
+        })
+    return posts
+
+
+def _text(rng, size):
+    """Random words adding up to about size characters"""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+class SimulatedWorksheet:
+    """In-memory stand-in for the parts of a gspread Worksheet the storage code uses
+
+    Every call counts as one API request and sleeps latency seconds plus cell_latency
+    per cell sent or received, roughly how the Sheets API behaves. Values are stored
+    as text, as Sheets returns them.
+    """
+
+    def __init__(self, title='Sheet1', spreadsheet=None, latency=0.0, cell_latency=0.0):
+        self.title = title
+        self.spreadsheet = spreadsheet or SimulatedSpreadsheet(latency, cell_latency)
+        self.latency = latency
+        self.cell_latency = cell_latency
+        self.requests = 0
+        self.rows = []
+        if spreadsheet is None:
+            self.spreadsheet.sheets.append(self)
+
+    def get(self, range_name):
+        values = self._read(range_name)
+        self._request(_cells(values))
+        return values
+
+    def batch_get(self, ranges, **kwargs):
+        value_ranges = [self._read(range_name) for range_name in ranges]
+        self._request(sum(_cells(values) for values in value_ranges))
+        return value_ranges
+
+    def get_all_values(self):
+        values = [list(row) for row in self.rows]
+        self._request(_cells(values))
+        return values
+
+    def row_values(self, row):
+        values = list(self.rows[row - 1]) if row <= len(self.rows) else []
+        self._request(len(values))
+        return _trim(values)
+
+    def col_values(self, col):
+        values = _trim_rows([[row[col - 1] if len(row) >= col else ''] for row in self.rows])
+        self._request(len(values))
+        return [row[0] if row else '' for row in values]
+
+    def acell(self, label):
+        row, col = _parse_cell(label)
+        line = self.rows[row - 1] if row <= len(self.rows) else []
+        self._request(1)
+        return _Cell(line[col - 1] if col <= len(line) and line[col - 1] != '' else None)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self._write(range_name, values)
+        self._request(_cells(values))
+
+    def batch_update(self, data, **kwargs):
+        for item in data:
+            self._write(item['range'], item['values'])
+        self._request(sum(_cells(item['values']) for item in data))
+
+    def batch_clear(self, ranges):
+        for range_name in ranges:
+            (first_row, first_col), (last_row, last_col) = _parse_range(range_name)
+            for line in self.rows[first_row - 1:last_row]:
+                for col in range(first_col, min(last_col or len(line), len(line)) + 1):
+                    line[col - 1] = ''
+        self._request(0)
+
+    def append_rows(self, values, value_input_option=None, table_range=None, **kwargs):
+        first = len(_trim_rows(self.rows)) + 1
+        del self.rows[first - 1:]
+        self.rows.extend([_text_value(value) for value in row] for row in values)
+        self._request(_cells(values))
+        last_col = _column_name(max(len(row) for row in values))
+        return {'updates': {'updatedRange': f"{self.title}!A{first}:{last_col}{first + len(values) - 1}"}}
+
+    def clear(self):
+        self.rows = []
+        self._request(0)
+
+    def _request(self, cells):
+        self.requests += 1
+        delay = self.latency + cells * self.cell_latency
+        if delay > 0:
+            time.sleep(delay)
+
+    def _read(self, range_name):
+        (first_row, first_col), (last_row, last_col) = _parse_range(range_name)
+        values = [
+            _trim(row[first_col - 1:last_col])
+            for row in self.rows[first_row - 1:last_row]
+        ]
+        return _trim_rows(values)
+
+    def _write(self, range_name, values):
+        (first_row, first_col), _ = _parse_range(range_name)
+        for offset, row in enumerate(values):
+            while len(self.rows) < first_row + offset:
+                self.rows.append([])
+            line = self.rows[first_row + offset - 1]
+            if len(line) < first_col - 1 + len(row):
+                line.extend([''] * (first_col - 1 + len(row) - len(line)))
+            line[first_col - 1:first_col - 1 + len(row)] = [_text_value(value) for value in row]
+
+
+class SimulatedSpreadsheet:
+    """Holds SimulatedWorksheets, for the id lease and journal sheets"""
+
+    def __init__(self, latency=0.0, cell_latency=0.0):
+        self.latency = latency
+        self.cell_latency = cell_latency
+        self.sheets = []
+
+    def worksheets(self):
+        return list(self.sheets)
+
+    def add_worksheet(self, title, rows=100, cols=26):
+        if any(sheet.title == title for sheet in self.sheets):
+            raise ValueError(f'A sheet with the name "{title}" already exists')
+        sheet = SimulatedWorksheet(title, self, self.latency, self.cell_latency)
+        self.sheets.append(sheet)
+        return sheet
+
+    def del_worksheet(self, worksheet):
+        self.sheets.remove(worksheet)
+
+
+class _Cell:
+    def __init__(self, value):
+        self.value = value
+
+
+_CELL = re.compile(r'([A-Z]*)(\d*)')
+
+
+def _parse_cell(label):
+    """(row, col) of an A1 reference; either is None when left out (as in 'A' or '2')"""
+    letters, digits = _CELL.fullmatch(label.split('!')[-1]).groups()
+    col = 0
+    for letter in letters:
+        col = col * 26 + ord(letter) - 64
+    return (int(digits) if digits else None), (col or None)
+
+
+def _parse_range(range_name):
+    """((first_row, first_col), (last_row, last_col)) of an A1 range; open ends are None"""
+    first, _, last = range_name.split('!')[-1].partition(':')
+    first_row, first_col = _parse_cell(first)
+    last_row, last_col = _parse_cell(last) if last else (first_row, first_col)
+    return (first_row or 1, first_col or 1), (last_row, last_col)
+
+
+def _column_name(col):
+    name = ''
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _text_value(value):
+    return '' if value is None else str(value)
+
+
+def _trim(row):
+    """A row without trailing empty cells, as Sheets returns it"""
+    end = len(row)
+    while end and row[end - 1] == '':
+        end -= 1
+    return list(row[:end])
+
+
+def _trim_rows(rows):
+    """Rows without trailing empty rows, as Sheets returns them"""
+    end = len(rows)
+    while end and not any(cell != '' for cell in rows[end - 1]):
+        end -= 1
+    return rows[:end]
+
+
+def _requests(storage):
+    """Requests a storage backend has made to its simulated worksheet, or None if it has none"""
+    sheet = getattr(storage, 'sheet', None)
+    return sheet.requests if isinstance(sheet, SimulatedWorksheet) else None
+
+
+def _cells(values):
+    return sum(len(row) for row in values) if values else 0
+
+
+class Benchmark:
+    """Runs the cases for each dataset size and collects one result row per case"""
+
+    def __init__(self, backends=BACKENDS, repeat=5, latency=0.0, cell_latency=0.0, seed=0, **dataset):
+        self.backends = backends
+        self.repeat = repeat
+        self.latency = latency
+        self.cell_latency = cell_latency
+        self.seed = seed
+        self.dataset = dataset
+        self.results = []
+
+    def run(self, sizes, report=None):
+        """Benchmark every size in turn; report, if given, gets each result row as it is measured"""
+        self._report = report
+        for size in sizes:
+            posts = generate_posts(size, seed=self.seed, **self.dataset)
+            with tempfile.TemporaryDirectory() as directory:
+                for backend in self.backends:
+                    self._storage_cases(backend, posts, directory)
+            self._app_cases(posts)
+        return self.results
+
+    def _storage_cases(self, backend, posts, directory):
+        size = len(posts)
+        text = ''.join(json.dumps({key: value for key, value in post.items() if key != 'id'}) + '\n' for post in posts)
+        created = []
+
+        def import_posts():
+            storage = self._new_storage(backend, directory, len(created))
+            created.append(storage)
+            next_id = iter(range(1, size + 1))
+
+            def write_chunk(chunk):
+                for post in chunk:
+                    post['id'] = next(next_id)
+                    post['version'] = 1
+                storage.bulk_import(chunk)
+
+            import_stream(io.StringIO(text), write_chunk, chunk_size=IMPORT_CHUNK_SIZE)
+
+        # Imports rebuild storage from nothing, so big ones only run once
+        self._measure(
+            'import_posts', backend, size, import_posts, 1 if size >= 10000 else min(self.repeat, 3), size,
+            lambda: sum(_requests(storage) or 0 for storage in created) if backend == 'sheets' else None
+        )
+        storage = created[-1]
+        requests = lambda: _requests(storage)
+        self._measure('load_posts', backend, size, storage.load_summaries, self.repeat, size, requests)
+        self._measure('load_full', backend, size, storage.load, self.repeat, size, requests)
+
+        rng = random.Random(self.seed)
+        self._measure('get_post', backend, size, lambda: storage.get(rng.randint(1, size)), self.repeat * 10, 1, requests)
+
+        versions = {post['id']: 1 for post in posts}
+
+        def save_posts():
+            batch = []
+            for post_id in rng.sample(range(1, size + 1), min(SAVE_BATCH_SIZE, size)):
+                post = dict(posts[post_id - 1], title=f'Edited {post_id}', version=versions[post_id] + 1)
+                batch.append((post, versions[post_id]))
+                versions[post_id] += 1
+            storage.apply_batch([], batch, [])
+
+        self._measure('save_posts', backend, size, save_posts, self.repeat * 2, min(SAVE_BATCH_SIZE, size), requests)
+
+    def _app_cases(self, posts):
+        size = len(posts)
+        rng = random.Random(self.seed)
+        dates = sorted({post['date'] for post in posts})
+        store = PostStore(posts)
+        self._measure('store_build', 'app', size, lambda: PostStore(posts), self.repeat, size)
+        self._measure('get_posts_for_date', 'app', size, lambda: store.posts_for_date(rng.choice(dates)), 1000, 1)
+
+        def month_range():
+            first = datetime.strptime(rng.choice(dates), '%Y-%m-%d').replace(day=1)
+            last = (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+            return store.posts_in_range(first.strftime('%Y-%m-%d'), last.strftime('%Y-%m-%d'))
+
+        self._measure('posts_in_month', 'app', size, month_range, 200, 1)
+        self._measure('sidebar_stats', 'app', size, lambda: (store.status_counts(), store.platform_counts()), 200, 1)
+
+        def analytics():
+            df = posts_frame(posts)
+            posts_per_week_by_platform(df)
+            status_funnel(df)
+            pillar_distribution(df)
+            cadence_gaps(df)
+
+        self._measure('analytics', 'app', size, analytics, self.repeat, size)
+        index = SearchIndex(posts)
+        self._measure('search_build', 'app', size, lambda: SearchIndex(posts), self.repeat, size)
+        self._measure('search_query', 'app', size, lambda: index.search(rng.choice(_WORDS)[:4]), 200, 1)
+
+    def _new_storage(self, backend, directory, number):
+        if backend == 'memory':
+            return MemoryBackend()
+        if backend == 'sqlite':
+            return SQLiteBackend(os.path.join(directory, f'bench-{number}.db'))
+        return SheetsBackend(SimulatedWorksheet(latency=self.latency, cell_latency=self.cell_latency))
+
+    def _measure(self, case, backend, size, func, runs, items, requests=None):
+        """Time runs calls of func and add a result row
+
+        items is the work one call does, for throughput; requests, if given, counts simulated Sheets requests so far.
+        """
+        requests_before = requests() if requests else None
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        median = percentile(samples, 50)
+        result = {
+            'case': case,
+            'backend': backend,
+            'size': size,
+            'runs': runs,
+            'p50_ms': round(median * 1000, 3),
+            'p95_ms': round(percentile(samples, 95) * 1000, 3),
+            'p99_ms': round(percentile(samples, 99) * 1000, 3),
+            'max_ms': round(samples[-1] * 1000, 3),
+            'items_per_s': round(items / median, 1) if median else None,
+            'requests_per_run': None if requests_before is None else round((requests() - requests_before) / runs, 1),
+        }
+        self.results.append(result)
+        if self._report:
+            self._report(result)
+
+
+def compare(results, baseline, tolerance):
+    """Result rows whose median got more than tolerance (0.25 = 25%) slower than in baseline"""
+    previous = {(row['case'], row['backend'], row['size']): row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row['case'], row['backend'], row['size']))
+        if before is None:
+            continue
+        if row['p50_ms'] > before['p50_ms'] * (1 + tolerance) and row['p50_ms'] - before['p50_ms'] > NOISE_FLOOR_MS:
+            regressions.append({**row, 'baseline_p50_ms': before['p50_ms']})
+    return regressions
+
+
+def format_row(row):
+    """One aligned line of the results table"""
+    requests = '' if row['requests_per_run'] is None else row['requests_per_run']
+    return (
+        f"{row['case']:<20} {row['backend']:<7} {row['size']:>7} {row['runs']:>5} "
+        f"{row['p50_ms']:>10.3f} {row['p95_ms']:>10.3f} {row['p99_ms']:>10.3f} {row['max_ms']:>10.3f} "
+        f"{row['items_per_s'] or 0:>12.1f} {requests:>8}"
+    )
+
+
+HEADER = (
+    f"{'case':<20} {'backend':<7} {'size':>7} {'runs':>5} "
+    f"{'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10} {'items/s':>12} {'requests':>8}"
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark storage, import, the post store, search and analytics on synthetic calendars."
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="posts per dataset")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--repeat', type=int, default=5, help="runs of each heavy case")
+    parser.add_argument('--latency', type=float, default=0.05, help="simulated seconds per Sheets request")
+    parser.add_argument('--cell-latency', type=float, default=0.000002, help="simulated seconds per Sheets cell moved")
+    parser.add_argument('--spread-days', type=int, default=365, help="days the posts' dates are spread over")
+    parser.add_argument('--notes-size', type=int, default=200, help="characters of notes per post")
+    parser.add_argument('--comments-size', type=int, default=50, help="characters of comments per post")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', metavar='PATH', help="also write the results here")
+    parser.add_argument('--compare', metavar='PATH', help="results JSON of an earlier run to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="slowdown of the median allowed by --compare")
+    args = parser.parse_args(argv)
+
+    benchmark = Benchmark(
+        backends=args.backends, repeat=args.repeat, latency=args.latency, cell_latency=args.cell_latency,
+        seed=args.seed, spread_days=args.spread_days, notes_size=args.notes_size, comments_size=args.comments_size,
+    )
+    print(HEADER, flush=True)
+    results = benchmark.run(args.sizes, report=lambda row: print(format_row(row), flush=True))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for row in regressions:
+                print(f"  {row['case']} {row['backend']} {row['size']}: {row['baseline_p50_ms']} -> {row['p50_ms']} ms")
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import calendar
+from datetime import datetime, timedelta
+
+
+def set_status(posts, status):
+    """Copies of the posts not already in status, moved to it"""
+    return [{**post, 'status': status} for post in posts if post.get('status', 'Draft') != status]
+
+
+def add_platforms(posts, platforms):
+    """Copies of the posts missing any of platforms, with them added"""
+    changed = []
+    for post in posts:
+        current = post.get('platforms', [])
+        missing = [platform for platform in platforms if platform not in current]
+        if missing:
+            changed.append({**post, 'platforms': current + missing})
+    return changed
+
+
+def remove_platforms(posts, platforms):
+    """Copies of the posts on any of platforms, with them removed"""
+    changed = []
+    for post in posts:
+        current = post.get('platforms', [])
+        kept = [platform for platform in current if platform not in platforms]
+        if len(kept) != len(current):
+            changed.append({**post, 'platforms': kept})
+    return changed
+
+
+def shift_dates(posts, days):
+    """Copies of the posts moved days later (earlier when negative)"""
+    if not days:
+        return []
+    return [
+        {**post, 'date': (datetime.strptime(post['date'], '%Y-%m-%d') + timedelta(days=days)).strftime('%Y-%m-%d')}
+        for post in posts
+    ]
+
+
+def duplicate_to_month(posts, year, month):
+    """New Draft posts (without ids) copying posts onto the same day of another month
+
+    Days past the end of a shorter month land on its last day.
+    """
+    last_day = calendar.monthrange(year, month)[1]
+    duplicates = []
+    for post in posts:
+        day = min(int(post['date'][8:10]), last_day)
+        duplicate = {key: value for key, value in post.items() if key not in ('id', 'version', 'updated_at')}
+        duplicate['date'] = f"{year:04d}-{month:02d}-{day:02d}"
+        duplicate['status'] = 'Draft'
+        duplicates.append(duplicate)
+    return duplicates
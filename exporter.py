@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from recurrence import ics_rrule
+
+CSV_FIELDS = ['id', 'date', 'title', 'status', 'content_type', 'content_pillar', 'platforms', 'link', 'notes', 'comments']
+
+
+def filter_posts(posts, start_date=None, end_date=None, status=None, platform=None):
+    """Yield posts matching the optional date range ('YYYY-MM-DD', inclusive), status and platform"""
+    for post in posts:
+        date = post.get('date', '')
+        if start_date and date < start_date:
+            continue
+        if end_date and date > end_date:
+            continue
+        if status and post.get('status', 'Draft') != status:
+            continue
+        if platform and platform not in post.get('platforms', []):
+            continue
+        yield post
+
+
+def iter_json(posts):
+    """Yield a JSON array one post at a time, readable by the importer"""
+    yield '[\n'
+    separator = ''
+    for post in posts:
+        yield separator + json.dumps(post)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def iter_jsonl(posts):
+    """Yield one JSON object per line"""
+    for post in posts:
+        yield json.dumps(post) + '\n'
+
+
+def iter_csv(posts):
+    """Yield CSV lines with platforms flattened to a ';'-separated list"""
+    line = io.StringIO()
+    writer = csv.DictWriter(line, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    yield _take(line)
+    for post in posts:
+        writer.writerow({**post, 'platforms': ';'.join(post.get('platforms', []))})
+        yield _take(line)
+
+
+def iter_ics(posts, calendar_name='Content Calendar'):
+    """Yield an iCalendar feed with one all-day event per post; recurring series become repeating events"""
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield _ics_lines([
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Purple Crayola//Content Calendar//EN',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_ics_escape(calendar_name)}',
+    ])
+    for post in posts:
+        try:
+            day = datetime.strptime(post.get('date', ''), '%Y-%m-%d')
+        except ValueError:
+            continue
+        description = [f"Status: {post.get('status', 'Draft')}"]
+        if post.get('platforms'):
+            description.append(f"Platforms: {', '.join(post['platforms'])}")
+        if post.get('content_type'):
+            description.append(f"Content type: {post['content_type']}")
+        if post.get('notes'):
+            description.append(post['notes'])
+
+        lines = [
+            'BEGIN:VEVENT',
+            f"UID:post-{post.get('id')}@content-calendar",
+            f'DTSTAMP:{stamp}',
+            f"DTSTART;VALUE=DATE:{day.strftime('%Y%m%d')}",
+            f"DTEND;VALUE=DATE:{(day + timedelta(days=1)).strftime('%Y%m%d')}",
+            f"SUMMARY:{_ics_escape(post.get('title', ''))}",
+            f"DESCRIPTION:{_ics_escape(chr(10).join(description))}",
+        ]
+        if post.get('content_pillar'):
+            lines.append(f"CATEGORIES:{_ics_escape(post['content_pillar'])}")
+        if post.get('link'):
+            lines.append(f"URL:{post['link']}")
+        if post.get('recurrence'):
+            # Per-date overrides have no place in a single event, so only skipped dates carry over
+            lines.append(f"RRULE:{ics_rrule(post['recurrence'], post['date'])}")
+            if post['recurrence'].get('exceptions'):
+                lines.append(f"EXDATE;VALUE=DATE:{','.join(date.replace('-', '') for date in post['recurrence']['exceptions'])}")
+        lines.append('END:VEVENT')
+        yield _ics_lines(lines)
+    yield _ics_lines(['END:VCALENDAR'])
+
+
+# Each format maps to (generator, file extension, mime type)
+FORMATS = {
+    'JSON': (iter_json, 'json', 'application/json'),
+    'JSON Lines': (iter_jsonl, 'jsonl', 'application/x-ndjson'),
+    'CSV': (iter_csv, 'csv', 'text/csv'),
+    'iCalendar': (iter_ics, 'ics', 'text/calendar'),
+}
+
+
+def export_file(storage, export_format, start_date=None, end_date=None, status=None, platform=None, chunk_size=500):
+    """Write the matching posts in date order to a BytesIO in the chosen format
+
+    Posts are picked and sorted from their summaries, then read in full a chunk at a
+    time, so only one chunk of notes and comments is held at once.
+    """
+    write_records = FORMATS[export_format][0]
+    post_ids = [
+        post['id'] for post in sorted(
+            filter_posts(storage.load_summaries(), start_date, end_date, status, platform),
+            key=lambda post: (post.get('date', ''), post.get('id', 0))
+        )
+    ]
+
+    def full_posts():
+        for start in range(0, len(post_ids), chunk_size):
+            chunk = post_ids[start:start + chunk_size]
+            posts = storage.get_many(chunk)
+            # Skip any deleted since the summaries were read
+            yield from (posts[post_id] for post_id in chunk if post_id in posts)
+
+    output = io.BytesIO()
+    for text in write_records(full_posts()):
+        output.write(text.encode('utf-8'))
+    output.seek(0)
+    return output
+
+
+def _take(buffer):
+    """Return and reset the contents of a StringIO"""
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+def _ics_escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _ics_lines(lines):
+    """Join content lines with CRLF, folding any longer than 75 octets as RFC 5545 requires"""
+    folded = []
+    for line in lines:
+        encoded = line.encode('utf-8')
+        while len(encoded) > 75:
+            cut = 75
+            # Don't split a multi-byte character
+            while cut and (encoded[cut] & 0xC0) == 0x80:
+                cut -= 1
+            folded.append(encoded[:cut].decode('utf-8'))
+            encoded = b' ' + encoded[cut:]
+        folded.append(encoded.decode('utf-8'))
+    return ''.join(line + '\r\n' for line in folded)
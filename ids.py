@@ -0,0 +1,24 @@
+import threading
+
+
+class IdAllocator:
+    """Hands out post ids from blocks leased from storage
+
+    Each block is reserved atomically by the backend, so ids never collide across
+    sessions or processes and no post scan is needed to find the next free id.
+    Ids left in a block when the process exits are simply skipped.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._ids = iter(())
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        """Reserve one new post id"""
+        with self._lock:
+            post_id = next(self._ids, None)
+            if post_id is None:
+                self._ids = iter(self.storage.lease_ids())
+                post_id = next(self._ids)
+            return post_id
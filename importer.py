@@ -0,0 +1,194 @@
+import json
+
+from schema import validate_post
+
+# Longest single record an array import will buffer before giving up on the file
+MAX_RECORD_SIZE = 10 * 1024 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_records(stream, read_size=65536):
+    """Yield (row_number, record, error) from a JSON array or JSON Lines text stream
+
+    Only one read_size block plus the record being decoded is held in memory.
+    A record that cannot be decoded yields an error instead of a record and
+    reading carries on with the next one. Inside a JSON array a record that never
+    ends (e.g. an unclosed quote) or outgrows MAX_RECORD_SIZE stops iteration,
+    as there is no telling where the next one starts.
+    """
+    buffer = stream.read(read_size).lstrip('\ufeff \t\r\n')
+    if buffer.startswith('['):
+        yield from _iter_array(stream, buffer[1:], read_size)
+    else:
+        yield from _iter_lines(stream, buffer, read_size)
+
+
+def _iter_array(stream, buffer, read_size):
+    row_number = 0
+    eof = False
+    pos = 0
+    expect_value = True
+    while True:
+        # Skip separators between records
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = stream.read(read_size), 0
+            eof = not buffer
+        if pos >= len(buffer):
+            yield row_number + 1, None, "file ended before the closing ']'"
+            return
+        if buffer[pos] == ']':
+            return
+        if buffer[pos] == ',' and not expect_value:
+            pos += 1
+            expect_value = True
+            continue
+
+        row_number += 1
+        expect_value = False
+        try:
+            record, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Malformed or cut off at the end of the buffer: read on to where the value ends to tell which
+            buffer, end, eof = _read_value(stream, buffer[pos:], read_size, eof)
+            pos = 0
+            if end is None:
+                if eof:
+                    yield row_number, None, f"invalid JSON: {_decode_error(buffer)}"
+                else:
+                    yield row_number, None, f"record is longer than {MAX_RECORD_SIZE} characters"
+                return
+            try:
+                record, _ = _decoder.raw_decode(buffer[:end])
+            except json.JSONDecodeError as e:
+                # The value's end is known, so carry on from there
+                yield row_number, None, f"invalid JSON: {e.msg}"
+                buffer = buffer[end:]
+                continue
+        yield row_number, record, None
+        buffer, pos = buffer[end:], 0
+
+
+def _read_value(stream, text, read_size, eof):
+    """(text, end, eof): text extended with reads until it holds the whole JSON value it starts with
+
+    end is where that value stops, or None if the stream ended or MAX_RECORD_SIZE
+    was reached first. Reads are joined once, so a long record costs no repeated copying.
+    """
+    parts = [text]
+    size = len(text)
+    state = [0, False, False]
+    end = _value_end(text, 0, state)
+    while end is None and not eof and size < MAX_RECORD_SIZE:
+        chunk = stream.read(read_size)
+        eof = not chunk
+        end = _value_end(chunk, 0, state)
+        if end is not None:
+            end += size
+        parts.append(chunk)
+        size += len(chunk)
+    return ''.join(parts), end, eof
+
+
+def _value_end(text, start, state):
+    """Index just past the top-level JSON value text is part of, or None if it goes on past text
+
+    Only brackets, strings and separators are looked at, enough to find the value's
+    end without parsing it. state is [depth, in_string, escaped], carried between calls.
+    """
+    depth, in_string, escaped = state
+    for position in range(start, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if depth == 0:
+                    return position + 1
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            if depth == 0:
+                # Closes the array the value is in
+                return position
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        elif char == ',' and depth == 0:
+            return position
+    state[:] = depth, in_string, escaped
+    return None
+
+
+def _decode_error(text):
+    """Why text doesn't decode as JSON"""
+    try:
+        _decoder.raw_decode(text)
+    except json.JSONDecodeError as e:
+        return e.msg
+    return "unexpected end of file"
+
+
+def _iter_lines(stream, buffer, read_size):
+    row_number = 0
+    while True:
+        newline = buffer.find('\n')
+        if newline == -1:
+            chunk = stream.read(read_size)
+            if chunk:
+                buffer += chunk
+                continue
+            line, buffer = buffer, ''
+        else:
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+        if line.strip():
+            row_number += 1
+            try:
+                yield row_number, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield row_number, None, f"invalid JSON: {e.msg}"
+        if newline == -1:
+            return
+
+
+def import_stream(stream, write_chunk, chunk_size=500, progress=None):
+    """Validate posts from a stream and hand them to write_chunk in fixed-size lists
+
+    progress, if given, is called with the number of rows read after each chunk.
+    Returns (imported_count, errors) where errors lists {'row', 'error'} dicts
+    for every record that was skipped.
+    """
+    imported = 0
+    errors = []
+    chunk = []
+    rows_read = 0
+    for row_number, record, error in iter_json_records(stream):
+        rows_read = row_number
+        if error is None:
+            try:
+                chunk.append(validate_post(record))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            errors.append({'row': row_number, 'error': error})
+        if len(chunk) >= chunk_size:
+            write_chunk(chunk)
+            imported += len(chunk)
+            chunk = []
+            if progress:
+                progress(rows_read)
+    if chunk:
+        write_chunk(chunk)
+        imported += len(chunk)
+    if progress:
+        progress(rows_read)
+    return imported, errors
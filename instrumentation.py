@@ -0,0 +1,248 @@
+import functools
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Durations kept per operation for percentiles
+RECENT_SAMPLES = 500
+# Operations listed per trace; the rest are only counted (an import makes hundreds of calls)
+MAX_TRACE_OPERATIONS = 200
+
+logger = logging.getLogger('calendar.perf')
+
+
+class Metrics:
+    """Thread-safe timings, call counts and payload sizes per named operation
+
+    Names are dotted by layer, e.g. 'sheets.batch_get', 'storage.load' or 'render.grid'.
+    Sizes are whatever the layer counts: cells for Sheets calls, posts for storage calls.
+    Each finished operation is logged to the 'calendar.perf' logger as a JSON object at
+    DEBUG, and each rerun's trace at INFO.
+    """
+
+    def __init__(self):
+        # name -> {'calls', 'errors', 'total', 'max', 'size', 'recent'}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, name, seconds, size=None, error=None):
+        """Add one finished operation"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {
+                    'calls': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'size': 0,
+                    'recent': deque(maxlen=RECENT_SAMPLES),
+                }
+            stats['calls'] += 1
+            stats['errors'] += error is not None
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['size'] += size or 0
+            stats['recent'].append(seconds)
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace.add(name, seconds, size)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({
+                'event': 'op', 'name': name, 'ms': round(seconds * 1000, 3), 'size': size,
+                'error': error, 'thread': threading.current_thread().name,
+            }))
+
+    @contextmanager
+    def timed(self, name):
+        """Time the with block as one operation; set info['size'] inside it to record a payload size"""
+        info = {'size': None}
+        error = None
+        start = time.perf_counter()
+        try:
+            yield info
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, info['size'], error)
+
+    def begin_trace(self, label=''):
+        """Start collecting this thread's operations into a new Trace (one per Streamlit rerun)"""
+        self._local.trace = Trace(label)
+        return self._local.trace
+
+    def end_trace(self):
+        """Stop collecting for this thread, log the trace and return it (None if none was started)"""
+        trace = getattr(self._local, 'trace', None)
+        self._local.trace = None
+        if trace is not None:
+            trace.finish()
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(json.dumps({'event': 'rerun', **trace.to_dict()}))
+        return trace
+
+    def snapshot(self):
+        """Per-operation rows (name, calls, errors, total/mean/p50/p95/max ms, size), slowest total first"""
+        with self._lock:
+            items = [(name, dict(stats), sorted(stats['recent'])) for name, stats in self._stats.items()]
+        rows = []
+        for name, stats, recent in items:
+            rows.append({
+                'name': name,
+                'calls': stats['calls'],
+                'errors': stats['errors'],
+                'total_ms': round(stats['total'] * 1000, 1),
+                'mean_ms': round(stats['total'] * 1000 / stats['calls'], 2),
+                'p50_ms': round(percentile(recent, 50) * 1000, 2),
+                'p95_ms': round(percentile(recent, 95) * 1000, 2),
+                'max_ms': round(stats['max'] * 1000, 2),
+                'size': stats['size'],
+            })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def to_json(self):
+        """Every operation's numbers as a JSON document, for scraping"""
+        return json.dumps({'generated_at': time.time(), 'operations': self.snapshot()}, indent=2)
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._stats.clear()
+
+
+class Trace:
+    """Operations recorded on one thread between begin_trace and end_trace, plus named laps
+
+    lap(name) records the time since the previous lap (or the start) as phase name,
+    so a top-to-bottom script can be split into phases without re-indenting it.
+    """
+
+    def __init__(self, label=''):
+        self.label = label
+        self.started = time.time()
+        self.phases = []
+        self.operations = []
+        self.dropped = 0
+        self.total = None
+        self._start = self._last = time.perf_counter()
+
+    def add(self, name, seconds, size=None):
+        """Note one operation that ran during the trace"""
+        if len(self.operations) < MAX_TRACE_OPERATIONS:
+            self.operations.append((name, seconds, size))
+        else:
+            self.dropped += 1
+
+    def lap(self, name):
+        """Close the current phase under name"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def finish(self):
+        """Fix the trace's total duration"""
+        self.total = time.perf_counter() - self._start
+
+    def to_dict(self):
+        """The trace as plain data, times in milliseconds"""
+        return {
+            'label': self.label,
+            'started_at': self.started,
+            'total_ms': None if self.total is None else round(self.total * 1000, 1),
+            'phases': [{'name': name, 'ms': round(seconds * 1000, 2)} for name, seconds in self.phases],
+            'operations': [
+                {'name': name, 'ms': round(seconds * 1000, 2), 'size': size}
+                for name, seconds, size in self.operations
+            ],
+            'operations_dropped': self.dropped,
+        }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list, 0 when empty"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def instrument(obj, metrics, prefix, methods, size=None):
+    """Time the named methods of obj in place (obj keeps its type); returns obj
+
+    size(method, args, kwargs, result) gives the payload size recorded with each call.
+    """
+    for method in methods:
+        original = getattr(obj, method, None)
+        if original is None or getattr(original, '_instrumented', False):
+            continue
+        setattr(obj, method, _timed_method(original, metrics, f'{prefix}.{method}', method, size))
+    return obj
+
+
+def _timed_method(original, metrics, name, method, size):
+    """original wrapped to record each call under name"""
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        with metrics.timed(name) as info:
+            result = original(*args, **kwargs)
+            if size is not None:
+                try:
+                    info['size'] = size(method, args, kwargs, result)
+                except Exception:
+                    # Sizes are best effort; never fail the call over one
+                    pass
+            return result
+    wrapper._instrumented = True
+    return wrapper
+
+
+def cell_count(values):
+    """Cells in a list of rows (or a flat list of values)"""
+    if not values:
+        return 0
+    return sum(len(row) if isinstance(row, list) else 1 for row in values)
+
+
+def sheet_call_size(method, args, kwargs, result):
+    """Cells sent or received by a gspread worksheet call"""
+    if method == 'batch_get':
+        return sum(cell_count(values) for values in result)
+    if method == 'batch_update':
+        data = args[0] if args else kwargs.get('data', [])
+        return sum(cell_count(item['values']) for item in data)
+    if method == 'append_rows':
+        return cell_count(args[0] if args else kwargs.get('values'))
+    if method == 'update':
+        # gspread 6 takes values first
+        return cell_count(kwargs.get('values', args[0] if args else None))
+    if method == 'batch_clear':
+        return None
+    if method == 'acell':
+        return 1
+    return cell_count(result)
+
+
+def post_count(method, args, kwargs, result):
+    """Posts (or journal entries) moved by a storage or journal call"""
+    if method == 'apply_batch':
+        return sum(len(group) for group in args[:3])
+    if method == 'get':
+        return int(result is not None)
+    if method == 'save_snapshot':
+        return len(args[1])
+    if isinstance(result, (list, dict)):
+        return len(result)
+    if args and isinstance(args[0], list):
+        return len(args[0])
+    return None
+
+
+def log_to_file(path):
+    """Append the 'calendar.perf' JSON lines (every operation and rerun) to a file"""
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
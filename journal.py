@@ -0,0 +1,369 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+# Recent snapshots kept; older ones are dropped except the very first, which
+# holds everything written before the journal began
+KEEP_SNAPSHOTS = 3
+
+
+def now_iso():
+    """Current UTC time as used in journal entries, e.g. '2024-05-01T09:30:00+00:00'"""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def diff(before, after):
+    """{field: [old, new]} for every field that differs between two copies of a post"""
+    return {
+        field: [before.get(field), after.get(field)]
+        for field in set(before) | set(after)
+        if before.get(field) != after.get(field)
+    }
+
+
+def create_entry(post, user):
+    """Journal entry for a new post; changes holds the whole post"""
+    return {'ts': now_iso(), 'user': user, 'op': 'create', 'post_id': post['id'], 'changes': dict(post)}
+
+
+def update_entry(before, after, user):
+    """Journal entry for an edit; changes holds {field: [old, new]}"""
+    return {'ts': now_iso(), 'user': user, 'op': 'update', 'post_id': after['id'], 'changes': diff(before or {}, after)}
+
+
+def delete_entry(post_id, before, user):
+    """Journal entry for a removal; changes holds the removed post so it can be restored"""
+    return {'ts': now_iso(), 'user': user, 'op': 'delete', 'post_id': post_id, 'changes': dict(before or {})}
+
+
+def clear_entry(count, user):
+    """Journal entry for wiping every post at once (a snapshot is taken right before)"""
+    return {'ts': now_iso(), 'user': user, 'op': 'clear', 'post_id': None, 'changes': {'count': count}}
+
+
+def apply_entry(post, entry):
+    """The post as it is after entry (None once deleted); post is the copy before it, or None"""
+    if entry['op'] == 'create':
+        return dict(entry['changes'])
+    if entry['op'] in ('delete', 'clear'):
+        return None
+    if post is None:
+        # Edited before this copy of the data began
+        return None
+    post = dict(post)
+    for field, (_, new) in entry['changes'].items():
+        if new is None:
+            post.pop(field, None)
+        else:
+            post[field] = new
+    return post
+
+
+def replay(posts, entries):
+    """Apply entries in order to {post_id: post}, in place; returns posts
+
+    Entries carry absolute new values, so replaying one that is already reflected is harmless.
+    """
+    for entry in entries:
+        if entry['op'] == 'clear':
+            posts.clear()
+            continue
+        post = apply_entry(posts.get(entry['post_id']), entry)
+        if post is None:
+            posts.pop(entry['post_id'], None)
+        else:
+            posts[entry['post_id']] = post
+    return posts
+
+
+def state_at(journal, ts):
+    """{post_id: post} as it was at ISO time ts, from the nearest earlier snapshot plus the log after it
+
+    Raises ValueError if ts is before the first snapshot, where nothing is known.
+    """
+    return restore_target(journal, ts)[0]
+
+
+def restore_target(journal, ts):
+    """(state_at(journal, ts), ids of posts the log shows changing after ts), from one read of the log
+
+    A restore should only undo those changes: a post the log says nothing about was
+    changed somewhere the journal never saw, and is better left alone.
+    """
+    seq, taken, posts = journal.snapshot_before(ts)
+    if taken is None:
+        raise ValueError(f"no history recorded before {ts}")
+    entries = journal.entries(after=seq)
+    state = replay({post['id']: post for post in posts}, [entry for entry in entries if entry['ts'] <= ts])
+    return state, {entry['post_id'] for entry in entries if entry['ts'] > ts and entry['post_id'] is not None}
+
+
+class SnapshotSchedule:
+    """Takes a journal's periodic snapshots on behalf of a whole process
+
+    The newest snapshot's seq is kept in memory, so checking whether one is due costs no
+    reads, and only one caller takes a snapshot while the others carry on without waiting.
+    """
+
+    def __init__(self, journal, every, load_posts):
+        self.journal = journal
+        self.every = every
+        # Reads every post, when a snapshot is due
+        self._load_posts = load_posts
+        self._snapshot_seq = None
+        self._lock = threading.Lock()
+
+    def note(self, seq):
+        """Snapshot if `every` entries have been logged since the last snapshot; seq is the newest the caller has seen
+
+        Returns True if a snapshot was taken.
+        """
+        if seq is None or (self._snapshot_seq is not None and seq - self._snapshot_seq < self.every):
+            return False
+        if not self._lock.acquire(blocking=False):
+            # Someone else is taking it
+            return False
+        try:
+            if self._snapshot_seq is None:
+                self._snapshot_seq = self.journal.latest_snapshot_seq() or 0
+                if seq - self._snapshot_seq < self.every:
+                    return False
+            # Entries logged while the posts load are replayed over the snapshot, which is harmless
+            seq = self.journal.head()
+            self.journal.save_snapshot(seq, self._load_posts())
+            self._snapshot_seq = seq
+            return True
+        finally:
+            self._lock.release()
+
+    def saved(self, seq):
+        """Record a snapshot taken outside the schedule, e.g. when compacting"""
+        self._snapshot_seq = max(seq, self._snapshot_seq or 0)
+
+
+class Journal:
+    """Append-only log of post changes plus periodic full snapshots
+
+    Entries are dicts with seq (assigned on append, increasing), ts, user, op
+    ('create', 'update', 'delete' or 'clear'), post_id and changes.
+    """
+
+    def append(self, entries):
+        """Add entries to the end of the log; returns the seq of the last one, or None where that isn't known"""
+        raise NotImplementedError
+
+    def head(self):
+        """seq of the newest entry, 0 while the log is empty"""
+        raise NotImplementedError
+
+    def entries(self, after=0):
+        """Entries with seq greater than after, oldest first"""
+        raise NotImplementedError
+
+    def history(self, post_id):
+        """Every entry touching one post, oldest first"""
+        return [entry for entry in self.entries() if entry['post_id'] == post_id]
+
+    def save_snapshot(self, seq, posts):
+        """Store every post as of seq"""
+        raise NotImplementedError
+
+    def snapshot_before(self, ts=None):
+        """(seq, ts, posts) of the newest snapshot taken at or before ts (default: the newest), or (0, None, [])"""
+        raise NotImplementedError
+
+    def latest_snapshot_seq(self):
+        """seq of the newest snapshot, or None if there is none"""
+        raise NotImplementedError
+
+
+class MemoryJournal(Journal):
+    """Journal kept in process memory, for the memory backend and tests"""
+
+    def __init__(self):
+        self._entries = []
+        self._snapshots = []
+        self._lock = threading.Lock()
+
+    def append(self, entries):
+        with self._lock:
+            for entry in entries:
+                self._entries.append({**entry, 'seq': len(self._entries) + 1})
+            return len(self._entries)
+
+    def head(self):
+        return len(self._entries)
+
+    def entries(self, after=0):
+        with self._lock:
+            return [dict(entry) for entry in self._entries[after:]]
+
+    def save_snapshot(self, seq, posts):
+        with self._lock:
+            self._snapshots.append((seq, now_iso(), [dict(post) for post in posts]))
+            del self._snapshots[1:-KEEP_SNAPSHOTS]
+
+    def snapshot_before(self, ts=None):
+        with self._lock:
+            matching = [snapshot for snapshot in self._snapshots if ts is None or snapshot[1] <= ts]
+        return matching[-1] if matching else (0, None, [])
+
+    def latest_snapshot_seq(self):
+        return self._snapshots[-1][0] if self._snapshots else None
+
+
+class SQLiteJournal(Journal):
+    """Journal in journal and snapshots tables of a SQLite file"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS journal (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            user TEXT,
+            op TEXT NOT NULL,
+            post_id INTEGER,
+            changes TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_journal_post ON journal(post_id, seq);
+        CREATE TABLE IF NOT EXISTS snapshots (
+            seq INTEGER NOT NULL,
+            ts TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path='calendar.db'):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def append(self, entries):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO journal (ts, user, op, post_id, changes) VALUES (?, ?, ?, ?, ?)',
+                [(entry['ts'], entry['user'], entry['op'], entry['post_id'], json.dumps(entry['changes'])) for entry in entries]
+            )
+            return self._conn.execute('SELECT IFNULL(MAX(seq), 0) FROM journal').fetchone()[0]
+
+    def head(self):
+        with self._lock:
+            return self._conn.execute('SELECT IFNULL(MAX(seq), 0) FROM journal').fetchone()[0]
+
+    def entries(self, after=0):
+        return self._select('WHERE seq > ?', (after,))
+
+    def history(self, post_id):
+        return self._select('WHERE post_id = ?', (post_id,))
+
+    def save_snapshot(self, seq, posts):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO snapshots (seq, ts, data) VALUES (?, ?, ?)', (seq, now_iso(), json.dumps(posts)))
+            self._conn.execute(
+                'DELETE FROM snapshots WHERE ts NOT IN (SELECT ts FROM snapshots ORDER BY ts DESC LIMIT ?) '
+                'AND ts != (SELECT MIN(ts) FROM snapshots)',
+                (KEEP_SNAPSHOTS,)
+            )
+
+    def snapshot_before(self, ts=None):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT seq, ts, data FROM snapshots WHERE ? IS NULL OR ts <= ? ORDER BY ts DESC LIMIT 1', (ts, ts)
+            ).fetchone()
+        return (row[0], row[1], json.loads(row[2])) if row else (0, None, [])
+
+    def latest_snapshot_seq(self):
+        with self._lock:
+            row = self._conn.execute('SELECT seq FROM snapshots ORDER BY ts DESC LIMIT 1').fetchone()
+        return row[0] if row else None
+
+    def _select(self, where, params):
+        with self._lock:
+            rows = self._conn.execute(f'SELECT seq, ts, user, op, post_id, changes FROM journal {where} ORDER BY seq', params).fetchall()
+        return [
+            {'seq': seq, 'ts': ts, 'user': user, 'op': op, 'post_id': post_id, 'changes': json.loads(changes)}
+            for seq, ts, user, op, post_id, changes in rows
+        ]
+
+
+class SheetsJournal(Journal):
+    """Journal in a 'journal' worksheet (one row per entry, seq = row - 1) with one worksheet per snapshot
+
+    Appends are a single small request, and reading new entries only fetches the rows after a seq.
+    """
+
+    JOURNAL_SHEET = 'journal'
+    HEADER = ['ts', 'user', 'op', 'post_id', 'changes']
+    SNAPSHOT_PREFIX = 'snapshot-'
+    TITLE_TIME = '%Y%m%dT%H%M%S'
+    # Stay under the 50,000 character limit of a cell
+    SNAPSHOT_CHUNK = 45000
+
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+        worksheets = spreadsheet.worksheets()
+        self.sheet = next((ws for ws in worksheets if ws.title == self.JOURNAL_SHEET), None)
+        if self.sheet is None:
+            self.sheet = spreadsheet.add_worksheet(title=self.JOURNAL_SHEET, rows=1000, cols=len(self.HEADER))
+            self.sheet.update(range_name='A1:E1', values=[self.HEADER])
+
+    def append(self, entries):
+        rows = [
+            [entry['ts'], entry['user'], entry['op'], '' if entry['post_id'] is None else entry['post_id'], json.dumps(entry['changes'])]
+            for entry in entries
+        ]
+        if not rows:
+            return None
+        response = self.sheet.append_rows(rows, value_input_option='RAW', table_range='A1')
+        # 'journal!A12:E14' ends on the last row written; row 1 is the header
+        last_cell = response['updates']['updatedRange'].split('!')[-1].split(':')[-1]
+        return int(''.join(ch for ch in last_cell if ch.isdigit())) - 1
+
+    def head(self):
+        return max(len(self.sheet.col_values(1)) - 1, 0)
+
+    def entries(self, after=0):
+        rows = self.sheet.get(f'A{after + 2}:E')
+        return [
+            {
+                'seq': seq, 'ts': row[0], 'user': row[1], 'op': row[2],
+                'post_id': int(row[3]) if row[3] else None, 'changes': json.loads(row[4]),
+            }
+            for seq, row in enumerate(rows, start=after + 1)
+            if len(row) == len(self.HEADER)
+        ]
+
+    def save_snapshot(self, seq, posts):
+        text = json.dumps(posts)
+        chunks = [[text[start:start + self.SNAPSHOT_CHUNK]] for start in range(0, len(text), self.SNAPSHOT_CHUNK)] or [['[]']]
+        # Sheet titles can't contain ':', so the time goes in compact form
+        stamp = datetime.now(timezone.utc).strftime(self.TITLE_TIME)
+        title = f'{self.SNAPSHOT_PREFIX}{seq}-{stamp}'
+        if any(sheet.title == title for sheet, _, _ in self._snapshot_info()):
+            # Titles must be unique, and one snapshot per seq and second is plenty
+            return
+        snapshot = self.spreadsheet.add_worksheet(title=title, rows=len(chunks), cols=1)
+        snapshot.update(range_name=f'A1:A{len(chunks)}', values=chunks)
+        for old, _, _ in self._snapshot_info()[1:-KEEP_SNAPSHOTS]:
+            self.spreadsheet.del_worksheet(old)
+
+    def snapshot_before(self, ts=None):
+        matching = [(sheet, seq, taken) for sheet, seq, taken in self._snapshot_info() if ts is None or taken <= ts]
+        if not matching:
+            return 0, None, []
+        sheet, seq, taken = matching[-1]
+        return seq, taken, json.loads(''.join(sheet.col_values(1)))
+
+    def latest_snapshot_seq(self):
+        info = self._snapshot_info()
+        return info[-1][1] if info else None
+
+    def _snapshot_info(self):
+        """[(worksheet, seq, ts)] of every snapshot, oldest first"""
+        info = []
+        for sheet in self.spreadsheet.worksheets():
+            if sheet.title.startswith(self.SNAPSHOT_PREFIX):
+                seq, _, stamp = sheet.title[len(self.SNAPSHOT_PREFIX):].partition('-')
+                taken = datetime.strptime(stamp, self.TITLE_TIME).replace(tzinfo=timezone.utc).isoformat(timespec='seconds')
+                info.append((sheet, int(seq), taken))
+        return sorted(info, key=lambda item: item[2])
@@ -0,0 +1,175 @@
+import itertools
+from bisect import bisect_left, bisect_right, insort
+
+from schema import SUMMARY_FIELDS
+
+# Shared by every store so a revision number is never reused, even across reloads
+_revisions = itertools.count(1)
+
+
+class PostSummary:
+    """The short fields of one post, without link, notes and comments
+
+    Reads like a read-only post dict (summary['title'], summary.get('status', 'Draft'))
+    so the grid, stats and analytics work on it unchanged.
+    """
+
+    __slots__ = tuple(SUMMARY_FIELDS)
+
+    def __init__(self, post):
+        for field in SUMMARY_FIELDS:
+            value = post.get(field)
+            # Tuples are smaller than lists and can't be changed behind the indexes' back
+            setattr(self, field, tuple(value) if field == 'platforms' and value is not None else value)
+
+    def __getitem__(self, field):
+        value = self.get(field)
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def keys(self):
+        """Fields this summary has, so dict(summary) works"""
+        return [field for field in SUMMARY_FIELDS if getattr(self, field) is not None]
+
+    def get(self, field, default=None):
+        """Field value, or default when the post doesn't have it"""
+        value = getattr(self, field, None) if field in self.__slots__ else None
+        return default if value is None else value
+
+    def to_dict(self):
+        """Plain post dict with the fields this summary has"""
+        post = dict(self)
+        if 'platforms' in post:
+            post['platforms'] = list(post['platforms'])
+        return post
+
+
+class PostStore:
+    """Post summaries held in memory with lookup indexes by id, date, status and platform
+
+    Only the short fields are kept; full posts are fetched from storage when needed.
+    Recurring series are kept out of the date index since they fall on many dates.
+    """
+
+    def __init__(self, posts=()):
+        self._by_id = {}
+        # Each secondary index maps a key to {post_id: post}, so removals are O(1)
+        self._by_date = {}
+        # Sorted distinct dates, for range queries
+        self._dates = []
+        self._by_status = {}
+        self._by_platform = {}
+        # id -> summary of posts with a recurrence rule
+        self._series = {}
+        self.revision = next(_revisions)
+        self.extend(posts)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, post_id):
+        return post_id in self._by_id
+
+    def get(self, post_id):
+        """Get a post's summary by id, or None"""
+        return self._by_id.get(post_id)
+
+    def add(self, post):
+        """Add a post's summary to every index"""
+        if not isinstance(post, PostSummary):
+            post = PostSummary(post)
+        if post['id'] in self._by_id:
+            self.remove(post['id'])
+        self.revision = next(_revisions)
+        self._by_id[post['id']] = post
+        if post.get('recurrence'):
+            self._series[post['id']] = post
+        else:
+            self._add_to_date_index(post)
+        self._by_status.setdefault(post.get('status', 'Draft'), {})[post['id']] = post
+        for platform in post.get('platforms', []):
+            self._by_platform.setdefault(platform, {})[post['id']] = post
+
+    def extend(self, posts):
+        """Add many posts"""
+        for post in posts:
+            self.add(post)
+
+    def update(self, post):
+        """Replace the stored post with the same id"""
+        self.add(post)
+
+    def remove(self, post_id):
+        """Drop a post from every index; returns the removed post or None"""
+        post = self._by_id.pop(post_id, None)
+        if post is None:
+            return None
+        self.revision = next(_revisions)
+        if self._series.pop(post_id, None) is None:
+            _discard(self._by_date, post.get('date'), post_id)
+            if post.get('date') not in self._by_date and isinstance(post.get('date'), str):
+                self._dates.pop(bisect_left(self._dates, post['date']))
+        _discard(self._by_status, post.get('status', 'Draft'), post_id)
+        for platform in post.get('platforms', []):
+            _discard(self._by_platform, platform, post_id)
+        return post
+
+    def clear(self):
+        """Remove every post"""
+        self._by_id.clear()
+        self._by_date.clear()
+        self._dates.clear()
+        self._by_status.clear()
+        self._by_platform.clear()
+        self._series.clear()
+        self.revision = next(_revisions)
+
+    def posts_for_date(self, date_str):
+        """Posts scheduled on a 'YYYY-MM-DD' date"""
+        return list(self._by_date.get(date_str, {}).values())
+
+    def posts_in_range(self, start_date, end_date):
+        """Posts dated from start_date to end_date inclusive ('YYYY-MM-DD'), in date order"""
+        first = bisect_left(self._dates, start_date)
+        last = bisect_right(self._dates, end_date)
+        return [post for date in self._dates[first:last] for post in self._by_date[date].values()]
+
+    def series(self):
+        """Posts with a recurrence rule"""
+        return list(self._series.values())
+
+    def posts_with_status(self, status):
+        """Posts currently in the given status"""
+        return list(self._by_status.get(status, {}).values())
+
+    def posts_on_platform(self, platform):
+        """Posts going out on the given platform"""
+        return list(self._by_platform.get(platform, {}).values())
+
+    def status_counts(self):
+        """Number of posts per status"""
+        return {status: len(posts) for status, posts in self._by_status.items()}
+
+    def platform_counts(self):
+        """Number of posts per platform"""
+        return {platform: len(posts) for platform, posts in self._by_platform.items()}
+
+    def _add_to_date_index(self, post):
+        date = post.get('date')
+        if date not in self._by_date and isinstance(date, str):
+            insort(self._dates, date)
+        self._by_date.setdefault(date, {})[post['id']] = post
+
+
+def _discard(index, key, post_id):
+    """Remove post_id from index[key], dropping the key once it is empty"""
+    bucket = index.get(key)
+    if bucket is None:
+        return
+    bucket.pop(post_id, None)
+    if not bucket:
+        del index[key]
@@ -0,0 +1,193 @@
+import calendar
+from datetime import datetime, timedelta
+
+# Rule frequency -> label shown in the post form
+FREQUENCIES = {
+    'daily': 'Daily',
+    'weekly': 'Weekly',
+    'monthly': 'Monthly on the same day',
+    'monthly_nth': 'Monthly on the same weekday',
+}
+
+# Most occurrences one materialize call turns into posts
+MAX_MATERIALIZE = 500
+
+ORDINALS = ['1st', '2nd', '3rd', '4th', 'last']
+_ICS_DAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+def validate_rule(rule):
+    """Check a post's recurrence rule and return a clean copy; raises ValueError"""
+    if not isinstance(rule, dict):
+        raise ValueError("'recurrence' must be an object")
+    freq = rule.get('freq')
+    if freq not in FREQUENCIES:
+        raise ValueError(f"unknown recurrence frequency {freq!r}")
+    interval = rule.get('interval') or 1
+    if not isinstance(interval, int) or interval < 1:
+        raise ValueError("recurrence 'interval' must be a positive whole number")
+    until = rule.get('until') or ''
+    exceptions = rule.get('exceptions') or []
+    overrides = rule.get('overrides') or {}
+    if not isinstance(exceptions, list) or not isinstance(overrides, dict):
+        raise ValueError("recurrence 'exceptions' must be a list and 'overrides' an object")
+    for date_str in [until] * bool(until) + exceptions + list(overrides):
+        try:
+            datetime.strptime(date_str, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            raise ValueError(f"recurrence dates must be YYYY-MM-DD, got {date_str!r}")
+    return {'freq': freq, 'interval': interval, 'until': until, 'exceptions': sorted(exceptions), 'overrides': overrides}
+
+
+def occurrence_dates(start_date, rule, range_start, range_end):
+    """'YYYY-MM-DD' dates a series starting on start_date falls on within a range, minus exceptions
+
+    Only the occurrences inside the range are computed, however far back the series starts.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    first = max(start, datetime.strptime(range_start, '%Y-%m-%d'))
+    last = datetime.strptime(range_end, '%Y-%m-%d')
+    if rule.get('until'):
+        last = min(last, datetime.strptime(rule['until'], '%Y-%m-%d'))
+    interval = rule.get('interval') or 1
+    exceptions = set(rule.get('exceptions') or ())
+
+    days = []
+    if rule['freq'] in ('daily', 'weekly'):
+        step = interval * (7 if rule['freq'] == 'weekly' else 1)
+        # Jump straight to the first occurrence on or after first
+        day = start + timedelta(days=-(-(first - start).days // step) * step)
+        while day <= last:
+            days.append(day)
+            day += timedelta(days=step)
+    else:
+        months_in = (first.year - start.year) * 12 + first.month - start.month
+        index = months_in - months_in % interval
+        while True:
+            month = start.year * 12 + start.month - 1 + index
+            year, month = month // 12, month % 12 + 1
+            if datetime(year, month, 1) > last:
+                break
+            day = _monthly_day(start, year, month, rule['freq'])
+            if day is not None and first <= day <= last:
+                days.append(day)
+            index += interval
+    return [date_str for date_str in (day.strftime('%Y-%m-%d') for day in days) if date_str not in exceptions]
+
+
+def occurrence_id(series_id, date_str):
+    """Id the grid uses for one occurrence of a series"""
+    return f"{series_id}@{date_str}"
+
+
+def parse_occurrence_id(key):
+    """(series_id, 'YYYY-MM-DD') from an occurrence id, or None for a plain post id"""
+    series_id, _, date_str = str(key).partition('@')
+    if not date_str:
+        return None
+    return int(series_id), date_str
+
+
+def occurrence(series, date_str):
+    """One occurrence of a series as a post dict, with that date's overrides applied"""
+    post = dict(series)
+    rule = post.pop('recurrence')
+    post.update(rule.get('overrides', {}).get(date_str, {}))
+    post['date'] = date_str
+    post['id'] = occurrence_id(series['id'], date_str)
+    post['series_id'] = series['id']
+    return post
+
+
+def expand(series, range_start, range_end):
+    """Occurrences of a series that fall between range_start and range_end inclusive"""
+    dates = occurrence_dates(series['date'], series['recurrence'], range_start, range_end)
+    return [occurrence(series, date_str) for date_str in dates]
+
+
+def with_exception(series, date_str):
+    """Copy of a series that skips date_str"""
+    rule = dict(series['recurrence'])
+    rule['exceptions'] = sorted(set(rule.get('exceptions', [])) | {date_str})
+    rule['overrides'] = {date: fields for date, fields in rule.get('overrides', {}).items() if date != date_str}
+    return {**series, 'recurrence': rule}
+
+
+def with_override(series, date_str, post):
+    """Copy of a series whose date_str occurrence uses post's values where they differ from the series"""
+    rule = dict(series['recurrence'])
+    fields = {
+        field: value for field, value in post.items()
+        if field not in ('id', 'date', 'version', 'updated_at', 'recurrence', 'series_id') and value != series.get(field)
+    }
+    overrides = {date: changed for date, changed in rule.get('overrides', {}).items() if date != date_str}
+    if fields:
+        overrides[date_str] = fields
+    rule['overrides'] = overrides
+    return {**series, 'recurrence': rule}
+
+
+def materialize(series, range_start, range_end):
+    """(posts, updated series) turning a range of occurrences into standalone posts
+
+    The posts have no id yet. The updated series skips their dates so they aren't shown twice.
+    """
+    dates = occurrence_dates(series['date'], series['recurrence'], range_start, range_end)[:MAX_MATERIALIZE]
+    posts = []
+    for date_str in dates:
+        post = occurrence(series, date_str)
+        del post['id'], post['series_id']
+        posts.append(post)
+    updated = series
+    for date_str in dates:
+        updated = with_exception(updated, date_str)
+    return posts, updated
+
+
+def describe(rule, start_date):
+    """Human summary such as 'Every 2 weeks until Mar 01, 2025'"""
+    interval = rule.get('interval') or 1
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    unit = {'daily': 'day', 'weekly': 'week'}.get(rule['freq'], 'month')
+    text = f"Every {interval} {unit}s" if interval > 1 else f"Every {unit}"
+    if rule['freq'] == 'weekly':
+        text += f" on {start.strftime('%A')}"
+    elif rule['freq'] == 'monthly':
+        text += f" on day {start.day}"
+    elif rule['freq'] == 'monthly_nth':
+        text += f" on the {ORDINALS[_nth_weekday(start) - 1]} {start.strftime('%A')}"
+    if rule.get('until'):
+        text += f" until {datetime.strptime(rule['until'], '%Y-%m-%d').strftime('%b %d, %Y')}"
+    return text
+
+
+def ics_rrule(rule, start_date):
+    """RFC 5545 RRULE value for a rule"""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    parts = [f"FREQ={'MONTHLY' if rule['freq'].startswith('monthly') else rule['freq'].upper()}"]
+    if (rule.get('interval') or 1) > 1:
+        parts.append(f"INTERVAL={rule['interval']}")
+    if rule['freq'] == 'monthly_nth':
+        nth = _nth_weekday(start)
+        parts.append(f"BYDAY={-1 if nth == 5 else nth}{_ICS_DAYS[start.weekday()]}")
+    if rule.get('until'):
+        parts.append(f"UNTIL={rule['until'].replace('-', '')}")
+    return ';'.join(parts)
+
+
+def _nth_weekday(day):
+    """Which occurrence of its weekday day is in its month (1-4, or 5 meaning the last one)"""
+    return (day.day - 1) // 7 + 1
+
+
+def _monthly_day(start, year, month, freq):
+    """Day a monthly series starting on start falls on in year/month, or None if there isn't one"""
+    days_in_month = calendar.monthrange(year, month)[1]
+    if freq == 'monthly':
+        # Months without the start's day (e.g. the 31st) are skipped, as in RFC 5545
+        return datetime(year, month, start.day) if start.day <= days_in_month else None
+    nth = _nth_weekday(start)
+    first_weekday = (start.weekday() - calendar.weekday(year, month, 1)) % 7 + 1
+    if nth == 5:
+        return datetime(year, month, first_weekday + 7 * ((days_in_month - first_weekday) // 7))
+    return datetime(year, month, first_weekday + 7 * (nth - 1))
@@ -0,0 +1,117 @@
+import calendar
+from datetime import timedelta
+from html import escape
+
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+PLATFORM_EMOJIS = {'Instagram': '📷', 'Facebook': '📘', 'LinkedIn': '💼', 'Twitter': '🐦', 'TikTok': '🎵', 'YouTube': '📹'}
+
+# Script for the component that shows these grids: every link carries data-action and
+# data-value, and a click is sent back to Python as the 'click' trigger instead of
+# following the link, so the page never reloads
+GRID_CLICK_JS = """
+export default function(component) {
+    const { data, setTriggerValue, parentElement } = component;
+    let grid = parentElement.querySelector(':scope > .calendar-grid');
+    if (!grid) {
+        grid = document.createElement('div');
+        grid.className = 'calendar-grid';
+        parentElement.appendChild(grid);
+    }
+    if (grid.source !== data) {
+        grid.innerHTML = data;
+        grid.source = data;
+    }
+    grid.onclick = (event) => {
+        const link = event.target.closest('a[data-action]');
+        if (!link) {
+            return;
+        }
+        event.preventDefault();
+        setTriggerValue('click', { action: link.dataset.action, value: link.dataset.value });
+    };
+}
+"""
+
+
+def post_card_html(post):
+    """One post card whose click opens the post"""
+    title = post.get('title', '')
+    short_title = title[:35] + ('...' if len(title) > 35 else '')
+    html = f"<a class='post-card' href='#' data-action='view' data-value='{escape(str(post['id']))}'>"
+    html += f"<div class='post-title'>{escape(short_title)}</div>"
+    # Occurrences of a recurring series are marked with 🔁
+    badges = '🔁' if post.get('series_id') is not None else ''
+    badges += ''.join(PLATFORM_EMOJIS.get(platform, '📱') for platform in post.get('platforms', []))
+    if badges:
+        html += f"<div class='platform-badge'>{badges}</div>"
+    html += "</a>"
+    return html
+
+
+def day_cell_html(date_str, day, posts):
+    """A day cell whose number starts a post on that date and which lists its post cards"""
+    html = "<div class='calendar-day'>"
+    html += f"<a class='day-number' href='#' data-action='add' data-value='{date_str}' title='Add post'>{day}</a>"
+    html += ''.join(post_card_html(post) for post in posts)
+    html += "</div>"
+    return html
+
+
+def month_grid_html(year, month, posts_for_date):
+    """The whole month (Sunday first) as a single HTML block
+
+    posts_for_date is called with each 'YYYY-MM-DD' date in the month.
+    """
+    html = "<div class='month-grid'>"
+    html += ''.join(f"<div class='day-header'>{name}</div>" for name in DAY_NAMES)
+    for week in calendar.Calendar(calendar.SUNDAY).monthdayscalendar(year, month):
+        for day in week:
+            if day == 0:
+                html += "<div class='calendar-day-empty'></div>"
+            else:
+                date_str = f"{year}-{month:02d}-{day:02d}"
+                html += day_cell_html(date_str, day, posts_for_date(date_str))
+    html += "</div>"
+    return html
+
+
+def week_grid_html(start, posts_for_date):
+    """Seven day cells starting from start (a Sunday) as a single HTML block"""
+    html = "<div class='month-grid'>"
+    html += ''.join(f"<div class='day-header'>{name}</div>" for name in DAY_NAMES)
+    for offset in range(7):
+        day = start + timedelta(days=offset)
+        date_str = day.strftime('%Y-%m-%d')
+        html += day_cell_html(date_str, day.day, posts_for_date(date_str))
+    html += "</div>"
+    return html
+
+
+def mini_month_html(year, month, counts):
+    """Compact month showing how many posts fall on each day; days open their week"""
+    html = "<div class='mini-month'>"
+    html += f"<div class='day-header'>{calendar.month_name[month]} {year}</div>"
+    html += "<div class='mini-grid'>"
+    html += ''.join(f"<div class='mini-day-name'>{name[0]}</div>" for name in DAY_NAMES)
+    for week in calendar.Calendar(calendar.SUNDAY).monthdayscalendar(year, month):
+        for day in week:
+            if day == 0:
+                html += "<div></div>"
+                continue
+            date_str = f"{year}-{month:02d}-{day:02d}"
+            count = counts.get(date_str, 0)
+            css = 'mini-day has-posts' if count else 'mini-day'
+            tooltip = f"{count} post{'s' if count != 1 else ''}"
+            html += f"<a class='{css}' href='#' data-action='week' data-value='{date_str}' title='{tooltip}'>{day}</a>"
+    html += "</div></div>"
+    return html
+
+
+def quarter_html(start, counts):
+    """Three mini months side by side, starting with start's month"""
+    html = "<div class='quarter-grid'>"
+    for offset in range(3):
+        index = start.year * 12 + start.month - 1 + offset
+        html += mini_month_html(index // 12, index % 12 + 1, counts)
+    html += "</div>"
+    return html
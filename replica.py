@@ -0,0 +1,427 @@
+import json
+import threading
+import time
+
+from journal import Journal, SnapshotSchedule
+from storage import SQLiteBackend, version_of
+from write_queue import merge_posts
+
+# Above this share of the remote's posts changed, a pull reads the whole remote at once
+# instead of fetching each changed post by id (one range per post on Sheets)
+FULL_PULL_SHARE = 0.5
+
+
+class ReplicaBackend(SQLiteBackend):
+    """Local SQLite replica of a remote backend, synced both ways on a background thread
+
+    Reads and writes only touch the local file, so they never wait on the network and
+    keep working through remote outages and quota errors. Each local change is also
+    recorded in an outbox in the same transaction. The sync thread pushes the outbox to
+    the remote as compare-and-swap batches, then pulls remote changes by comparing post
+    versions, fetching only the posts that differ.
+
+    When a pushed edit meets a remote edit of the same post, non-overlapping field
+    changes are merged; where both changed the same field the remote copy is kept and
+    the clash is held, with the local edit, until take_conflicts hands it on to be
+    resolved.
+
+    With open_journal, the remote's shared journal is used through self.journal:
+    entries are kept in the same file and pushed after the changes they describe.
+    """
+
+    SCHEMA = SQLiteBackend.SCHEMA + """
+        CREATE TABLE IF NOT EXISTS outbox (
+            post_id INTEGER PRIMARY KEY,
+            op TEXT NOT NULL,
+            base TEXT
+        );
+        CREATE TABLE IF NOT EXISTS replica_conflicts (
+            post_id INTEGER PRIMARY KEY,
+            base TEXT,
+            mine TEXT,
+            theirs TEXT,
+            fields TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS journal_outbox (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            post_id INTEGER,
+            entry TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path, open_remote, open_journal=None, sync_interval=15.0, max_backoff=300.0, snapshot_every=500):
+        super().__init__(path)
+        # Called on the sync thread, so a slow or failing connection never blocks a read
+        self._open_remote = open_remote
+        self.remote = None
+        # Opens the remote's journal given the remote, e.g. lambda remote: SheetsJournal(remote.sheet.spreadsheet)
+        self._open_journal = open_journal
+        self.remote_journal = None
+        self.journal = ReplicaJournal(self) if open_journal else None
+        self.snapshot_every = snapshot_every
+        self._snapshots = None
+        self._connect_lock = threading.Lock()
+        self.sync_interval = sync_interval
+        self.max_backoff = max_backoff
+        self.last_synced = None
+        self.last_error = None
+        self._failures = 0
+        self._sync_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._first_sync = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='calendar-replica-sync', daemon=True)
+        self._thread.start()
+
+    def insert(self, post):
+        self.apply_batch([post], [], [])
+
+    def update(self, post):
+        self.apply_batch([], [(post, None)], [])
+
+    def delete(self, post_id):
+        self.apply_batch([], [], [(post_id, None)])
+
+    def bulk_import(self, posts):
+        self.apply_batch(posts, [], [])
+
+    def apply_batch(self, inserts, updates, deletes):
+        with self._lock, self._conn:
+            post_ids = [post['id'] for post in inserts] + [post['id'] for post, _ in updates]
+            deleted = [post_id for post_id, _ in deletes]
+            before = {post_id: self._get(post_id) for post_id in post_ids + deleted}
+            conflicts = self._apply_batch(inserts, updates, deletes)
+            for post_id, post in before.items():
+                if post_id not in conflicts:
+                    self._record(post_id, 'delete' if post_id in deleted else 'upsert', post)
+            self._bump_revision()
+        self._wake.set()
+        return conflicts
+
+    def compact(self, posts):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM posts')
+            for post in posts:
+                self._write(post)
+            if not posts:
+                self._conn.execute('DELETE FROM outbox')
+            # Clearing is pushed as is; otherwise the remote compacts what it has, so
+            # remote changes not pulled yet survive, and the outbox is pushed after
+            self._set_meta('replica_compact', 'clear' if not posts else 'compact')
+            self._bump_revision()
+        self._wake.set()
+
+    def lease_ids(self):
+        """Ids come from the remote so replicas never clash; a spare block covers outages"""
+        with self._lock, self._conn:
+            spare = self._get_meta('replica_spare_ids')
+            if spare:
+                self._conn.execute("DELETE FROM meta WHERE key = 'replica_spare_ids'")
+        if spare:
+            # Let the sync thread lease the next spare
+            self._wake.set()
+            start, stop = map(int, spare.split(':'))
+            return range(start, stop)
+        return self.connect().lease_ids()
+
+    def connect(self):
+        """The remote backend, opened on first use"""
+        with self._connect_lock:
+            if self.remote is None:
+                self.remote = self._open_remote()
+            return self.remote
+
+    def connect_journal(self):
+        """The remote's shared journal, opened on first use and started with a snapshot if it has none"""
+        remote = self.connect()
+        with self._connect_lock:
+            if self.remote_journal is None:
+                journal = self._open_journal(remote)
+                if journal.latest_snapshot_seq() is None:
+                    # Everything written before the journal began can only be restored from here
+                    journal.save_snapshot(journal.head(), remote.load())
+                self._snapshots = SnapshotSchedule(journal, self.snapshot_every, remote.load)
+                self.remote_journal = journal
+            return self.remote_journal
+
+    def log(self, entries):
+        """Keep journal entries to push once the changes they describe are pushed"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO journal_outbox (post_id, entry) VALUES (?, ?)',
+                [(entry['post_id'], json.dumps(entry)) for entry in entries]
+            )
+        self._wake.set()
+
+    def sync(self):
+        """Push local changes, then pull remote ones; raises if the remote fails"""
+        with self._sync_lock:
+            remote = self.connect()
+            # Entries are logged after their changes are written, so these all describe changes pushed below
+            with self._lock:
+                logged = self._conn.execute('SELECT IFNULL(MAX(seq), 0) FROM journal_outbox').fetchone()[0]
+            if self.journal:
+                # Opened before pushing, so a new journal's first snapshot holds none of the entries pushed after
+                self.connect_journal()
+            if self._push(remote):
+                # Merged edits go straight back out, checked against the remote's copy
+                self._push(remote)
+            if self.journal:
+                self._push_journal(logged)
+            self._pull(remote)
+            with self._lock, self._conn:
+                has_spare = self._get_meta('replica_spare_ids') is not None
+            if not has_spare:
+                ids = remote.lease_ids()
+                with self._lock, self._conn:
+                    self._set_meta('replica_spare_ids', f'{ids.start}:{ids.stop}')
+            self.last_synced = time.time()
+            self.last_error = None
+
+    def sync_soon(self):
+        """Wake the sync thread now instead of at the next interval"""
+        self._wake.set()
+
+    def wait_for_first_sync(self, timeout=None):
+        """Wait until the first sync attempt has finished if this replica has never pulled; True if it has data"""
+        with self._lock:
+            pulled = self._get_meta('replica_remote_revision') is not None
+        if not pulled:
+            self._first_sync.wait(timeout)
+            with self._lock:
+                pulled = self._get_meta('replica_remote_revision') is not None
+        return pulled
+
+    def take_conflicts(self):
+        """Clashes found while pushing, as post_id -> {'mine', 'theirs', 'base', 'fields'}; each is handed out once"""
+        with self._lock, self._conn:
+            rows = self._conn.execute('SELECT post_id, base, mine, theirs, fields FROM replica_conflicts').fetchall()
+            self._conn.execute('DELETE FROM replica_conflicts')
+        return {
+            post_id: {
+                'mine': json.loads(mine) if mine else None,
+                'theirs': json.loads(theirs) if theirs else None,
+                'base': json.loads(base) if base else None,
+                'fields': json.loads(fields),
+            }
+            for post_id, base, mine, theirs, fields in rows
+        }
+
+    def pending_count(self):
+        """Posts changed locally and not pushed yet"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+    def status(self):
+        """'synced', 'pending' (local changes waiting) or 'offline' (the last sync failed)"""
+        if self.last_error is not None:
+            return 'offline'
+        return 'pending' if self.pending_count() else 'synced'
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+                self._failures = 0
+            except Exception as e:
+                self.last_error = e
+                self._failures += 1
+            self._first_sync.set()
+            delay = self.sync_interval
+            if self._failures:
+                delay = min(self.sync_interval * 2 ** (self._failures - 1), self.max_backoff)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _record(self, post_id, op, before):
+        """Note a local change in the outbox, keeping the base from the first unpushed change; caller holds the transaction"""
+        row = self._conn.execute('SELECT op, base FROM outbox WHERE post_id = ?', (post_id,)).fetchone()
+        if row is None:
+            # No unpushed change, so the local copy is the remote's
+            base = json.dumps(before) if before is not None else None
+            if op == 'delete' and base is None:
+                return
+            self._conn.execute('INSERT INTO outbox (post_id, op, base) VALUES (?, ?, ?)', (post_id, op, base))
+        elif op == 'delete' and row[1] is None:
+            # Created and deleted locally; the remote never saw it
+            self._conn.execute('DELETE FROM outbox WHERE post_id = ?', (post_id,))
+        else:
+            self._conn.execute('UPDATE outbox SET op = ? WHERE post_id = ?', (op, post_id))
+
+    def _push(self, remote):
+        """Send the outbox as one batch; True if conflicts were merged into new local changes"""
+        with self._lock:
+            compact = self._get_meta('replica_compact')
+            rows = self._conn.execute('SELECT post_id, op, base FROM outbox').fetchall()
+            mine = self._get_many_locked([post_id for post_id, op, _ in rows if op == 'upsert'])
+        if compact:
+            remote.compact([] if compact == 'clear' else remote.load())
+            with self._lock, self._conn:
+                # Unless another compaction was asked for meanwhile
+                self._conn.execute("DELETE FROM meta WHERE key = 'replica_compact' AND value = ?", (compact,))
+        if not rows:
+            return False
+
+        bases = {post_id: json.loads(base) if base else None for post_id, _, base in rows}
+        inserts, updates, deletes = [], [], []
+        for post_id, op, _ in rows:
+            base = bases[post_id]
+            if op == 'delete':
+                deletes.append((post_id, version_of(base)))
+            elif base is None:
+                inserts.append(mine[post_id])
+            else:
+                updates.append((mine[post_id], version_of(base)))
+        conflicts = remote.apply_batch(inserts, updates, deletes)
+
+        merged = False
+        with self._lock, self._conn:
+            for post_id, op, base in rows:
+                current = self._conn.execute('SELECT op, base FROM outbox WHERE post_id = ?', (post_id,)).fetchone()
+                local = self._get(post_id)
+                if post_id in conflicts:
+                    merged |= self._resolve(post_id, bases[post_id], local, conflicts[post_id])
+                elif current is not None and (op == 'delete' or local == mine.get(post_id)):
+                    self._conn.execute('DELETE FROM outbox WHERE post_id = ?', (post_id,))
+                elif current is not None and op == 'upsert':
+                    # Edited again while pushing; the remote now holds what was pushed
+                    self._conn.execute('UPDATE outbox SET base = ? WHERE post_id = ?', (json.dumps(mine[post_id]), post_id))
+            self._bump_revision()
+        return merged
+
+    def _resolve(self, post_id, base, local, theirs):
+        """Settle a push the remote refused because it changed too; True if merged; caller holds the transaction"""
+        clashes = []
+        if theirs is not None and local is not None and base is not None:
+            merged, clashes = merge_posts(base, local, theirs)
+            if not clashes:
+                merged['version'] = version_of(theirs) + 1
+                self._write(merged)
+                self._conn.execute('UPDATE outbox SET op = ?, base = ? WHERE post_id = ?', ('upsert', json.dumps(theirs), post_id))
+                return True
+        # The remote copy stands until someone chooses; the local edit is kept with the clash
+        self._conn.execute(
+            'INSERT OR REPLACE INTO replica_conflicts (post_id, base, mine, theirs, fields) VALUES (?, ?, ?, ?, ?)',
+            (post_id, json.dumps(base) if base else None, json.dumps(local) if local else None,
+             json.dumps(theirs) if theirs else None, json.dumps(clashes))
+        )
+        if theirs is None:
+            self._conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
+        else:
+            self._write(theirs)
+        self._conn.execute('DELETE FROM outbox WHERE post_id = ?', (post_id,))
+        # The edit never reached the remote, so neither does its journal entry
+        self._conn.execute('DELETE FROM journal_outbox WHERE post_id = ?', (post_id,))
+        return False
+
+    def _push_journal(self, logged):
+        """Append journal entries up to seq logged to the shared journal, snapshotting it when due"""
+        with self._lock:
+            rows = self._conn.execute('SELECT seq, entry FROM journal_outbox WHERE seq <= ? ORDER BY seq', (logged,)).fetchall()
+        if not rows:
+            return
+        journal = self.connect_journal()
+        seq = journal.append([json.loads(entry) for _, entry in rows])
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM journal_outbox WHERE seq <= ?', (rows[-1][0],))
+        self._snapshots.note(seq)
+
+    def _pull(self, remote):
+        revision = remote.revision()
+        with self._lock:
+            known = self._get_meta('replica_remote_revision')
+        if revision is not None and revision == known:
+            return
+
+        if known is None:
+            # A first pull takes every post, so read them all in one go
+            posts = {post['id']: post for post in remote.load()}
+            remote_keys = {post_id: (version_of(post), post.get('updated_at')) for post_id, post in posts.items()}
+        else:
+            # Versions and edit times tell which posts changed; only those are read in full
+            posts = None
+            remote_keys = {post['id']: (version_of(post), post.get('updated_at')) for post in remote.load_summaries()}
+        with self._lock:
+            local_keys = {
+                post_id: (version, updated_at)
+                for post_id, version, updated_at in self._conn.execute(
+                    f"SELECT id, {self.VERSION_SQL}, json_extract(data, '$.updated_at') FROM posts"
+                )
+            }
+            pending = {row[0] for row in self._conn.execute('SELECT post_id FROM outbox')}
+        changed = [post_id for post_id, key in remote_keys.items() if post_id not in pending and local_keys.get(post_id) != key]
+        removed = [post_id for post_id in local_keys if post_id not in remote_keys and post_id not in pending]
+        if posts is None and len(changed) > FULL_PULL_SHARE * len(remote_keys):
+            posts = {post['id']: post for post in remote.load()}
+        if posts is not None:
+            fetched = {post_id: posts[post_id] for post_id in changed if post_id in posts}
+        else:
+            fetched = remote.get_many(changed) if changed else {}
+
+        with self._lock, self._conn:
+            # Anything edited locally since the outbox was read keeps the local copy
+            pending = {row[0] for row in self._conn.execute('SELECT post_id FROM outbox')}
+            for post_id, post in fetched.items():
+                if post_id not in pending:
+                    self._write(post)
+            for post_id in removed:
+                if post_id not in pending:
+                    self._conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
+            self._set_meta('replica_remote_revision', '' if revision is None else revision)
+            if fetched or removed:
+                self._bump_revision()
+
+    def _get_many_locked(self, post_ids):
+        """get_many for a caller already holding the lock"""
+        posts = {}
+        for start in range(0, len(post_ids), 500):
+            chunk = post_ids[start:start + 500]
+            rows = self._conn.execute(f"SELECT data FROM posts WHERE id IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+            posts.update((post['id'], post) for post in (json.loads(row[0]) for row in rows))
+        return posts
+
+    def _get_meta(self, key):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, str(value))
+        )
+
+
+class ReplicaJournal(Journal):
+    """The remote's shared journal as used through a ReplicaBackend
+
+    Appends are kept in the replica file until the sync thread has pushed the changes
+    they describe, so writing never waits on the network. Everything else reads the
+    shared journal, so history and restore see the changes made on every server.
+    """
+
+    def __init__(self, replica):
+        self.replica = replica
+
+    def append(self, entries):
+        # The seq is only known once the entries are pushed
+        self.replica.log(entries)
+        return None
+
+    def head(self):
+        return self.replica.connect_journal().head()
+
+    def entries(self, after=0):
+        return self.replica.connect_journal().entries(after)
+
+    def history(self, post_id):
+        return self.replica.connect_journal().history(post_id)
+
+    def save_snapshot(self, seq, posts):
+        journal = self.replica.connect_journal()
+        journal.save_snapshot(seq, posts)
+        self.replica._snapshots.saved(seq)
+
+    def snapshot_before(self, ts=None):
+        return self.replica.connect_journal().snapshot_before(ts)
+
+    def latest_snapshot_seq(self):
+        return self.replica.connect_journal().latest_snapshot_seq()
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from recurrence import validate_rule
+
+# Configuration
+CONTENT_TYPES = ['Carousel', 'Video', 'Image', 'Reel', 'Story', 'Article', 'Infographic']
+STATUSES = ['Draft', 'Copy Ready', 'Scheduled', 'Published']
+PLATFORMS = ['Instagram', 'Facebook', 'LinkedIn', 'Twitter', 'TikTok', 'YouTube']
+
+TEXT_FIELDS = ['title', 'link', 'content_pillar', 'notes', 'comments']
+
+# Short fields the grid, filters and stats work from; the long text fields are loaded on demand
+SUMMARY_FIELDS = ['id', 'date', 'title', 'platforms', 'status', 'content_type', 'content_pillar', 'version', 'updated_at', 'recurrence']
+
+# Long text fields left out of summaries
+DETAIL_FIELDS = ['link', 'notes', 'comments']
+
+# Compact codes used where platforms are packed into a single cell
+PLATFORM_CODES = {'Instagram': 'ig', 'Facebook': 'fb', 'LinkedIn': 'li', 'Twitter': 'tw', 'TikTok': 'tt', 'YouTube': 'yt'}
+
+
+def validate_post(post):
+    """Check an incoming post against the calendar schema and return a clean copy
+
+    Raises ValueError describing the first problem found. Any 'id' is dropped so
+    the caller can assign a fresh one.
+    """
+    if not isinstance(post, dict):
+        raise ValueError(f"expected an object, got {type(post).__name__}")
+
+    clean = {}
+    for field in TEXT_FIELDS:
+        value = post.get(field, '')
+        if value is None:
+            value = ''
+        if not isinstance(value, str):
+            raise ValueError(f"'{field}' must be text")
+        clean[field] = value
+    if not clean['title'].strip():
+        raise ValueError("'title' is required")
+
+    date = post.get('date')
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError(f"'date' must be YYYY-MM-DD, got {date!r}")
+    clean['date'] = date
+
+    status = post.get('status') or 'Draft'
+    if status not in STATUSES:
+        raise ValueError(f"unknown status {status!r}")
+    clean['status'] = status
+
+    content_type = post.get('content_type') or ''
+    if content_type and content_type not in CONTENT_TYPES:
+        raise ValueError(f"unknown content type {content_type!r}")
+    clean['content_type'] = content_type
+
+    platforms = post.get('platforms') or []
+    if not isinstance(platforms, list):
+        raise ValueError("'platforms' must be a list")
+    unknown = [p for p in platforms if p not in PLATFORMS]
+    if unknown:
+        raise ValueError(f"unknown platform(s) {', '.join(map(str, unknown))}")
+    clean['platforms'] = platforms
+
+    if post.get('recurrence'):
+        clean['recurrence'] = validate_rule(post['recurrence'])
+
+    return clean
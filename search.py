@@ -0,0 +1,145 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+
+# Text fields whose words are searchable
+SEARCH_FIELDS = ['title', 'notes', 'comments', 'content_pillar']
+# Fields that can narrow a search to one exact value
+FILTER_FIELDS = ['status', 'platforms', 'content_type', 'content_pillar']
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Lowercased words in text"""
+    return _WORD.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """Inverted word index plus exact-value filters over posts
+
+    Query words match as prefixes of indexed words ('laun' finds 'launch') and every
+    word must match. Safe to share between sessions.
+    """
+
+    def __init__(self, posts=()):
+        # word -> {post_id}
+        self._postings = {}
+        # Sorted distinct words, for prefix lookups
+        self._words = []
+        # (field, value) -> {post_id}
+        self._facets = {}
+        # post_id -> (words, facet keys, sort key, stamp) so a post can be unindexed or checked
+        self._entries = {}
+        self._lock = threading.Lock()
+        for post in posts:
+            self._add(post, keep_sorted=False)
+        self._words = sorted(self._postings)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, post):
+        """Index a post, replacing any earlier copy with the same id"""
+        with self._lock:
+            self._add(post)
+
+    def remove(self, post_id):
+        """Drop a post from the index"""
+        with self._lock:
+            self._remove(post_id)
+
+    def outdated(self, posts):
+        """Ids among posts (summaries will do) that are missing from the index or newer than the indexed copy"""
+        with self._lock:
+            return [post['id'] for post in posts if self._outdated(post)]
+
+    def missing(self, post_ids):
+        """Indexed ids that are not among post_ids"""
+        with self._lock:
+            return set(self._entries) - set(post_ids)
+
+    def values(self, field):
+        """Distinct indexed values of a filter field, sorted"""
+        with self._lock:
+            return sorted(value for key, value in self._facets if key == field)
+
+    def search(self, query='', filters=None, offset=0, limit=20):
+        """(total matches, post ids offset..offset+limit in date order)
+
+        filters maps FILTER_FIELDS names to the value a post must have; None values are ignored.
+        """
+        with self._lock:
+            matches = None
+            for word in set(tokenize(query)):
+                matches = self._intersect(matches, self._prefix_matches(word))
+            for field, value in (filters or {}).items():
+                if value is not None:
+                    matches = self._intersect(matches, self._facets.get((field, value), set()))
+            if matches is None:
+                # Nothing to search for
+                return 0, []
+            # Only the requested page needs ordering
+            first = heapq.nsmallest(offset + limit, (self._entries[post_id][2] for post_id in matches))
+        return len(matches), [post_id for _, post_id in first[offset:]]
+
+    def _prefix_matches(self, prefix):
+        """Ids of posts with a word starting with prefix"""
+        matches = set()
+        for position in range(bisect_left(self._words, prefix), len(self._words)):
+            word = self._words[position]
+            if not word.startswith(prefix):
+                break
+            matches |= self._postings[word]
+        return matches
+
+    def _outdated(self, post):
+        entry = self._entries.get(post['id'])
+        if entry is None:
+            return True
+        stamp = _stamp(post)
+        # A copy older than the indexed one (from a caller that hasn't caught up) never counts
+        return stamp != entry[3] and stamp[0] >= entry[3][0]
+
+    def _intersect(self, matches, ids):
+        """Narrow matches (None means everything so far) to ids"""
+        return set(ids) if matches is None else matches & ids
+
+    def _add(self, post, keep_sorted=True):
+        words = {word for field in SEARCH_FIELDS for word in tokenize(post.get(field))}
+        facets = {('status', post.get('status') or 'Draft')}
+        facets.update(('platforms', platform) for platform in post.get('platforms') or [])
+        facets.update((field, post[field]) for field in ('content_type', 'content_pillar') if post.get(field))
+        self._remove(post['id'])
+        self._entries[post['id']] = (words, facets, (post.get('date', ''), post['id']), _stamp(post))
+        for word in words:
+            if word not in self._postings:
+                if keep_sorted:
+                    insort(self._words, word)
+                self._postings[word] = set()
+            self._postings[word].add(post['id'])
+        for key in facets:
+            self._facets.setdefault(key, set()).add(post['id'])
+
+    def _remove(self, post_id):
+        entry = self._entries.pop(post_id, None)
+        if entry is None:
+            return
+        words, facets, _, _ = entry
+        for word in words:
+            posting = self._postings[word]
+            posting.discard(post_id)
+            if not posting:
+                del self._postings[word]
+                self._words.pop(bisect_left(self._words, word))
+        for key in facets:
+            bucket = self._facets[key]
+            bucket.discard(post_id)
+            if not bucket:
+                del self._facets[key]
+
+
+def _stamp(post):
+    """(version, edit time) telling two copies of a post apart"""
+    return post.get('version') or 0, post.get('updated_at') or ''
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class WarmCache:
+    """Post summaries saved to a local file so a cold start can draw the calendar before storage answers
+
+    The copy may be stale; it is only shown until the live posts have loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """(revision, saved_at, posts) from the file, or None if there is no usable copy"""
+        try:
+            with open(self.path) as f:
+                if hasattr(os, 'getuid') and os.fstat(f.fileno()).st_uid != os.getuid():
+                    # Not written by this app, e.g. planted by another user of a shared directory
+                    return None
+                data = json.load(f)
+            return data['revision'], data['saved_at'], data['posts']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, revision, posts):
+        """Replace the saved copy; readers never see a half-written file"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        # mkstemp creates the file readable by this user only, and os.replace keeps that
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.calendar-warm-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'revision': revision, 'saved_at': time.time(), 'posts': [dict(post) for post in posts]}, f)
+            os.replace(temp_path, self.path)
+        except OSError:
+            # Only the next cold start is slower without it
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def save_in_background(self, revision, posts):
+        """save without holding up the caller"""
+        threading.Thread(target=self.save, args=(revision, posts), name='calendar-warm-cache', daemon=True).start()
+
+
+class BackgroundLoad:
+    """Opens storage and reads every post summary on a background thread, once
+
+    open_storage must not use Streamlit: it runs outside any script run. The page can
+    render from a WarmCache meanwhile; storage() and wait() block until the thread
+    gets that far.
+    """
+
+    def __init__(self, open_storage, warm_cache=None):
+        self.warm_cache = warm_cache
+        self.error = None
+        self._open_storage = open_storage
+        self._storage = None
+        # (revision, summaries) until take() hands them out
+        self._loaded = None
+        self._lock = threading.Lock()
+        self._storage_ready = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='calendar-startup', daemon=True)
+        self._thread.start()
+
+    def storage(self):
+        """The opened storage backend; raises whatever opening it raised"""
+        self._storage_ready.wait()
+        if self._storage is None:
+            raise self.error
+        return self._storage
+
+    def wait(self, timeout=None):
+        """Wait for the load to finish (or fail); True once it has"""
+        return self._done.wait(timeout)
+
+    def take(self, revision):
+        """The summaries loaded at startup if storage is still at revision, else None; handed out once"""
+        with self._lock:
+            loaded, self._loaded = self._loaded, None
+        if loaded is None or loaded[0] != revision:
+            return None
+        return loaded[1]
+
+    def _run(self):
+        try:
+            self._storage = self._open_storage()
+            self._storage_ready.set()
+            revision = self._storage.revision()
+            summaries = self._storage.load_summaries()
+            with self._lock:
+                self._loaded = (revision, summaries)
+            if self.warm_cache:
+                self.warm_cache.save(revision, summaries)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._storage_ready.set()
+            self._done.set()
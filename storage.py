@@ -0,0 +1,647 @@
+import json
+import sqlite3
+import threading
+import time
+
+from schema import DETAIL_FIELDS, PLATFORM_CODES, SUMMARY_FIELDS
+
+# Post ids reserved per lease_ids call
+ID_BLOCK_SIZE = 100
+
+PLATFORMS_BY_CODE = {code: platform for platform, code in PLATFORM_CODES.items()}
+
+
+class StorageBackend:
+    """Interface shared by every place the calendar can keep its posts"""
+
+    def load(self):
+        """Return every stored post"""
+        raise NotImplementedError
+
+    def load_summaries(self):
+        """Return every stored post with only the short fields needed for the grid and stats"""
+        return [{field: post[field] for field in SUMMARY_FIELDS if field in post} for post in self.load()]
+
+    def get(self, post_id):
+        """Return the stored copy of one post, or None"""
+        return next((post for post in self.load() if post.get('id') == post_id), None)
+
+    def get_many(self, post_ids):
+        """Return {post_id: stored copy} for the given ids that exist, in one read"""
+        wanted = set(post_ids)
+        return {post['id']: post for post in self.load() if post.get('id') in wanted}
+
+    def insert(self, post):
+        """Store a new post"""
+        self.bulk_import([post])
+
+    def update(self, post):
+        """Replace the stored copy of a post"""
+        raise NotImplementedError
+
+    def delete(self, post_id):
+        """Remove a post"""
+        raise NotImplementedError
+
+    def bulk_import(self, posts):
+        """Store many new posts in one write"""
+        raise NotImplementedError
+
+    def query_range(self, start_date, end_date, status=None, platform=None):
+        """Return posts dated between start_date and end_date (inclusive, 'YYYY-MM-DD')"""
+        return [
+            post for post in self.load()
+            if start_date <= post.get('date', '') <= end_date
+            and (status is None or post.get('status') == status)
+            and (platform is None or platform in post.get('platforms', []))
+        ]
+
+    def apply_batch(self, inserts, updates, deletes):
+        """Apply queued writes in as few storage calls as the engine allows
+
+        updates is a list of (post, expected_version) and deletes a list of
+        (post_id, expected_version). A write whose expected_version is not None
+        only happens if the stored copy still has that version (compare-and-swap).
+        Returns {post_id: current copy or None} for the writes that were skipped.
+        """
+        conflicts = {}
+        if inserts:
+            self.bulk_import(inserts)
+        for post, expected_version in updates:
+            current = self.get(post['id']) if expected_version is not None else None
+            if expected_version is not None and version_of(current) != expected_version:
+                conflicts[post['id']] = current
+            else:
+                self.update(post)
+        for post_id, expected_version in deletes:
+            current = self.get(post_id)
+            if current is not None and expected_version is not None and version_of(current) != expected_version:
+                conflicts[post_id] = current
+            elif current is not None:
+                self.delete(post_id)
+        return conflicts
+
+    def compact(self, posts):
+        """Replace everything in storage with posts"""
+        raise NotImplementedError
+
+    def revision(self):
+        """Cheap token that changes whenever stored posts change, or None if unknown"""
+        return None
+
+    def lease_ids(self):
+        """Atomically reserve a block of unused post ids and return it as a range
+
+        The first lease starts above the highest existing id, so posts created
+        before leasing keep their ids.
+        """
+        raise NotImplementedError
+
+
+class MemoryBackend(StorageBackend):
+    """Keeps posts in a dict; used for tests, benchmarks and throwaway sessions"""
+
+    def __init__(self, posts=None):
+        self._posts = {post['id']: dict(post) for post in posts or []}
+        self._revision = 0
+        self._next_id = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            return [dict(post) for post in self._posts.values()]
+
+    def get(self, post_id):
+        with self._lock:
+            post = self._posts.get(post_id)
+            return dict(post) if post else None
+
+    def get_many(self, post_ids):
+        with self._lock:
+            return {post_id: dict(self._posts[post_id]) for post_id in post_ids if post_id in self._posts}
+
+    def update(self, post):
+        with self._lock:
+            self._posts[post['id']] = dict(post)
+            self._revision += 1
+
+    def delete(self, post_id):
+        with self._lock:
+            self._posts.pop(post_id, None)
+            self._revision += 1
+
+    def bulk_import(self, posts):
+        with self._lock:
+            for post in posts:
+                self._posts[post['id']] = dict(post)
+            self._revision += 1
+
+    def apply_batch(self, inserts, updates, deletes):
+        conflicts = {}
+        with self._lock:
+            for post in inserts:
+                self._posts[post['id']] = dict(post)
+            for post, expected_version in updates:
+                current = self._posts.get(post['id'])
+                if expected_version is not None and version_of(current) != expected_version:
+                    conflicts[post['id']] = dict(current) if current else None
+                else:
+                    self._posts[post['id']] = dict(post)
+            for post_id, expected_version in deletes:
+                current = self._posts.get(post_id)
+                if current is not None and expected_version is not None and version_of(current) != expected_version:
+                    conflicts[post_id] = dict(current)
+                else:
+                    self._posts.pop(post_id, None)
+            self._revision += 1
+        return conflicts
+
+    def compact(self, posts):
+        with self._lock:
+            self._posts = {post['id']: dict(post) for post in posts}
+            self._revision += 1
+
+    def revision(self):
+        return self._revision
+
+    def lease_ids(self):
+        with self._lock:
+            if self._next_id is None:
+                self._next_id = max(self._posts, default=0) + 1
+            start = self._next_id
+            self._next_id += ID_BLOCK_SIZE
+        return range(start, start + ID_BLOCK_SIZE)
+
+
+class SheetsBackend(StorageBackend):
+    """Stores one post per row in a gspread worksheet, one column per field
+
+    Summary columns (everything the grid and stats need) come first so they can
+    be read as one block without the long-text columns. Row 1 holds the column
+    names followed by the schema version and the revision token.
+    """
+
+    # New fields are only ever appended, so an older sheet just needs a new header
+    COLUMNS = [
+        'id', 'date', 'title', 'platforms', 'status', 'content_type', 'content_pillar', 'version', 'updated_at',
+        'link', 'notes', 'comments', 'recurrence',
+    ]
+    SUMMARY_COLUMNS = COLUMNS[:9] + ['recurrence']
+    LAST_COLUMN = 'M'
+    LAST_SUMMARY_COLUMN = 'I'
+    SCHEMA_VERSION = 3
+    # O1 holds SCHEMA_VERSION; Q1 is written with a fresh timestamp on every change
+    # so readers can detect edits with one cell read
+    SCHEMA_CELL = 'O1'
+    REVISION_CELL = 'Q1'
+    # Each row appended here reserves ID_BLOCK_SIZE ids; A1:B1 holds the first leased id
+    ID_LEASE_SHEET = 'id_leases'
+    # Most row ranges read in one batch_get, keeping its URL well under the API's length limit
+    MAX_READ_RANGES = 100
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        # id -> sheet row number, rebuilt on load and kept current by every write
+        self.row_index = {}
+        self._id_floor = None
+        self._lease_sheet = None
+        self._lock = threading.Lock()
+        self._ensure_schema()
+
+    def load(self):
+        return self._index_rows(self.sheet.get(f'A2:{self.LAST_COLUMN}'), self.COLUMNS)
+
+    def load_summaries(self):
+        # Both summary blocks in one request, skipping the long text in between
+        short_rows, rule_rows = self.sheet.batch_get([f'A2:{self.LAST_SUMMARY_COLUMN}', f'{self.LAST_COLUMN}2:{self.LAST_COLUMN}'])
+        rule_rows = list(rule_rows) + [[]] * (len(short_rows) - len(rule_rows))
+        rows = [row + [''] * (len(self.SUMMARY_COLUMNS) - 1 - len(row)) + rule[:1] for row, rule in zip(short_rows, rule_rows)]
+        return self._index_rows(rows, self.SUMMARY_COLUMNS)
+
+    def get(self, post_id):
+        return self._read_current([post_id]).get(post_id)
+
+    def get_many(self, post_ids):
+        current = self._read_current(list(post_ids))
+        return {post_id: post for post_id, post in current.items() if post is not None}
+
+    def update(self, post):
+        # apply_batch checks the row still holds this post before writing to it
+        self.apply_batch([], [(post, None)], [])
+
+    def delete(self, post_id):
+        self.apply_batch([], [], [(post_id, None)])
+
+    def bulk_import(self, posts):
+        if not posts:
+            return
+        rows_data = [_post_to_row(post, self.COLUMNS) for post in posts]
+        response = self.sheet.append_rows(rows_data, value_input_option='RAW', table_range='A1')
+        first_row = _row_from_range(response['updates']['updatedRange'])
+        with self._lock:
+            for offset, post in enumerate(posts):
+                self.row_index[post['id']] = first_row + offset
+        self.sheet.batch_update([self._revision_update()])
+
+    def apply_batch(self, inserts, updates, deletes):
+        with self._lock:
+            # A retried batch may hold inserts that already landed; rewrite those rows instead
+            updates = [(post, None) for post in inserts if post['id'] in self.row_index] + list(updates)
+            inserts = [post for post in inserts if post['id'] not in self.row_index]
+
+        # Sheets has no conditional write, so read just the rows being written right before writing.
+        # This checks versions, and makes sure each row still holds the post it is indexed under, as
+        # another process compacting the sheet moves rows; a stale index is rebuilt before any write.
+        current = self._read_current([post['id'] for post, _ in updates] + [post_id for post_id, _ in deletes])
+
+        conflicts = {}
+        data = []
+        with self._lock:
+            for post, expected_version in updates:
+                if expected_version is not None and version_of(current.get(post['id'])) != expected_version:
+                    conflicts[post['id']] = current.get(post['id'])
+                    continue
+                row_number = self.row_index.get(post['id'])
+                if row_number is None:
+                    inserts.append(post)
+                else:
+                    data.append(self._row_update(row_number, post))
+            for post_id, expected_version in deletes:
+                mismatch = version_of(current.get(post_id)) not in (None, expected_version)
+                if expected_version is not None and mismatch:
+                    conflicts[post_id] = current[post_id]
+                    continue
+                row_number = self.row_index.pop(post_id, None)
+                if row_number is not None:
+                    data.append(self._tombstone(row_number))
+        if inserts:
+            # Appends stamp the revision themselves
+            self.bulk_import(inserts)
+        if data:
+            data.append(self._revision_update())
+            self.sheet.batch_update(data)
+        return conflicts
+
+    def compact(self, posts):
+        # Overwrite in place, then clear what is left below, so a failed write never leaves
+        # the sheet empty and readers in between only see the leftover rows repeat posts
+        self._write_all(posts)
+        last_row = len(self.sheet.col_values(1))
+        if last_row > len(posts) + 1:
+            self.sheet.batch_clear([f'A{len(posts) + 2}:{self.LAST_COLUMN}{last_row}'])
+            # Readers that caught the leftovers reload
+            self.sheet.batch_update([self._revision_update()])
+
+    def revision(self):
+        return self.sheet.acell(self.REVISION_CELL).value
+
+    def lease_ids(self):
+        if self._lease_sheet is None:
+            self._open_lease_sheet()
+        # Sheets serializes appends, so the row number we land on is ours alone
+        response = self._lease_sheet.append_rows([[ID_BLOCK_SIZE, str(time.time_ns())]], value_input_option='RAW', table_range='A1')
+        row_number = _row_from_range(response['updates']['updatedRange'])
+        start = self._id_floor + (row_number - 2) * ID_BLOCK_SIZE
+        return range(start, start + ID_BLOCK_SIZE)
+
+    def _ensure_schema(self):
+        """Write the header on an empty sheet and bring older layouts up to SCHEMA_VERSION in place"""
+        header = self.sheet.row_values(1)
+        if not header:
+            self._write_all([])
+        elif header[:2] == ['id', 'data']:
+            self._migrate_json_rows()
+        elif 'schema_version' in header and int(header[header.index('schema_version') + 1]) < self.SCHEMA_VERSION:
+            self.sheet.batch_update([self._header_update(), self._revision_update()])
+
+    def _migrate_json_rows(self):
+        """Rewrite a schema 1 sheet (one JSON blob per row) as columns"""
+        all_values = self.sheet.get_all_values()
+        posts = []
+        for row in all_values[1:]:
+            if len(row) >= 2 and row[1]:  # Deleted rows were tombstoned with an empty data cell
+                try:
+                    posts.append(json.loads(row[1]))
+                except json.JSONDecodeError:
+                    continue
+        # Overwrite before clearing the leftovers so a failure never leaves the sheet empty
+        self._write_all(posts)
+        if len(all_values) > len(posts) + 1:
+            self.sheet.batch_clear([f'A{len(posts) + 2}:{self.LAST_COLUMN}{len(all_values)}'])
+
+    def _write_all(self, posts):
+        """Write the header row and posts from row 2 down in one request"""
+        data = [self._header_update(), self._revision_update()]
+        if posts:
+            rows_data = [_post_to_row(post, self.COLUMNS) for post in posts]
+            # Update all rows at once (more efficient)
+            data.append({'range': f'A2:{self.LAST_COLUMN}{len(posts) + 1}', 'values': rows_data})
+        self.sheet.batch_update(data)
+        with self._lock:
+            self.row_index = {post['id']: row_number for row_number, post in enumerate(posts, start=2)}
+
+    def _index_rows(self, rows, columns):
+        """Posts from sheet rows starting at row 2, rebuilding the row index on the way"""
+        posts = []
+        row_index = {}
+        for row_number, row in enumerate(rows, start=2):
+            if len(row) >= 2 and row[1]:  # Has a date (deleted rows keep only their id)
+                post = _row_to_post(row, columns)
+                posts.append(post)
+                row_index[post['id']] = row_number
+
+        with self._lock:
+            self.row_index = row_index
+        return posts
+
+    def _open_lease_sheet(self):
+        """Find or create the lease worksheet, recording the id floor on first use"""
+        spreadsheet = self.sheet.spreadsheet
+        leases = next((ws for ws in spreadsheet.worksheets() if ws.title == self.ID_LEASE_SHEET), None)
+        if leases is None:
+            try:
+                leases = spreadsheet.add_worksheet(title=self.ID_LEASE_SHEET, rows=100, cols=2)
+            except Exception:
+                # Another process created it first
+                leases = next(ws for ws in spreadsheet.worksheets() if ws.title == self.ID_LEASE_SHEET)
+        floor = leases.acell('B1').value
+        if not floor:
+            # Migration from max(id)+1 numbering: start leasing above every existing id
+            existing_ids = [int(value) for value in self.sheet.col_values(1)[1:] if value.isdigit()]
+            # Claimed by appending, which Sheets serializes: if several processes get here at
+            # once, the first claim lands in row 1 and they all read that one back. A later
+            # claim only takes up a lease row, so its block is never handed out.
+            leases.append_rows([['first_id', max(existing_ids, default=0) + 1]], value_input_option='RAW', table_range='A1')
+            floor = leases.acell('B1').value
+        self._id_floor = int(floor)
+        self._lease_sheet = leases
+
+    def _read_current(self, post_ids, refresh=True):
+        """{post_id: stored copy or None}, reading only the rows those posts live in"""
+        if not post_ids:
+            return {}
+        with self._lock:
+            rows = {post_id: self.row_index.get(post_id) for post_id in post_ids}
+        known = {post_id: row_number for post_id, row_number in rows.items() if row_number}
+        current = dict.fromkeys(post_ids)
+        stale = len(known) < len(rows)
+        if known:
+            ranges = [f'A{row_number}:{self.LAST_COLUMN}{row_number}' for row_number in known.values()]
+            # Ranges go in the request URL, so a long list is split across requests
+            value_ranges = []
+            for start in range(0, len(ranges), self.MAX_READ_RANGES):
+                value_ranges.extend(self.sheet.batch_get(ranges[start:start + self.MAX_READ_RANGES]))
+            for post_id, value_range in zip(known, value_ranges):
+                row = value_range[0] if value_range else []
+                if not row or str(row[0]) != str(post_id):
+                    # Rows moved under us (e.g. another process compacted the sheet)
+                    stale = True
+                elif len(row) >= 2 and row[1]:
+                    current[post_id] = _row_to_post(row, self.COLUMNS)
+        if stale and refresh:
+            self.load_summaries()
+            return self._read_current(post_ids, refresh=False)
+        return current
+
+    def _row_update(self, row_number, post):
+        """batch_update entry rewriting one post's row"""
+        return {'range': f'A{row_number}:{self.LAST_COLUMN}{row_number}', 'values': [_post_to_row(post, self.COLUMNS)]}
+
+    def _tombstone(self, row_number):
+        """batch_update entry blanking a deleted post's row
+
+        The id cell is kept so rows never shift and the table stays contiguous for appends.
+        """
+        return {'range': f'B{row_number}:{self.LAST_COLUMN}{row_number}', 'values': [[''] * (len(self.COLUMNS) - 1)]}
+
+    def _header_update(self):
+        """batch_update entry writing the column names, schema version and revision label"""
+        header = self.COLUMNS + ['schema_version', self.SCHEMA_VERSION, 'revision']
+        return {'range': f"A1:{chr(ord('A') + len(header) - 1)}1", 'values': [header]}
+
+    def _revision_update(self):
+        """batch_update entry stamping the revision cell with the current time"""
+        return {'range': self.REVISION_CELL, 'values': [[str(time.time_ns())]]}
+
+
+class SQLiteBackend(StorageBackend):
+    """Stores posts in a local SQLite file, indexed for date, status and platform lookups"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS posts (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            status TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS post_platforms (
+            post_id INTEGER NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+            platform TEXT NOT NULL,
+            PRIMARY KEY (post_id, platform)
+        );
+        CREATE INDEX IF NOT EXISTS idx_posts_date ON posts(date);
+        CREATE INDEX IF NOT EXISTS idx_posts_status ON posts(status, date);
+        CREATE INDEX IF NOT EXISTS idx_post_platforms_platform ON post_platforms(platform, post_id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    # Posts written before versioning count as version 0
+    VERSION_SQL = "IFNULL(json_extract(data, '$.version'), 0)"
+
+    def __init__(self, path='calendar.db'):
+        self.path = path
+        # Streamlit serves each session from its own thread, so share one connection behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT data FROM posts ORDER BY date, id').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def load_summaries(self):
+        # Strip the long text inside SQLite so it never gets parsed
+        paths = ', '.join(f"'$.{field}'" for field in DETAIL_FIELDS)
+        with self._lock:
+            rows = self._conn.execute(f'SELECT json_remove(data, {paths}) FROM posts ORDER BY date, id').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, post_id):
+        with self._lock:
+            return self._get(post_id)
+
+    def get_many(self, post_ids):
+        post_ids = list(post_ids)
+        posts = {}
+        with self._lock:
+            # Stay under SQLite's limit on query parameters
+            for start in range(0, len(post_ids), 500):
+                chunk = post_ids[start:start + 500]
+                rows = self._conn.execute(f"SELECT data FROM posts WHERE id IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+                posts.update((post['id'], post) for post in (json.loads(row[0]) for row in rows))
+        return posts
+
+    def update(self, post):
+        with self._lock, self._conn:
+            self._write(post)
+            self._bump_revision()
+
+    def delete(self, post_id):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
+            self._bump_revision()
+
+    def bulk_import(self, posts):
+        with self._lock, self._conn:
+            for post in posts:
+                self._write(post)
+            self._bump_revision()
+
+    def apply_batch(self, inserts, updates, deletes):
+        with self._lock, self._conn:
+            conflicts = self._apply_batch(inserts, updates, deletes)
+            self._bump_revision()
+        return conflicts
+
+    def query_range(self, start_date, end_date, status=None, platform=None):
+        sql = 'SELECT data FROM posts WHERE date BETWEEN ? AND ?'
+        params = [start_date, end_date]
+        if status is not None:
+            sql += ' AND status = ?'
+            params.append(status)
+        if platform is not None:
+            sql += ' AND id IN (SELECT post_id FROM post_platforms WHERE platform = ?)'
+            params.append(platform)
+        sql += ' ORDER BY date, id'
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def compact(self, posts):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM posts')
+            for post in posts:
+                self._write(post)
+            self._bump_revision()
+
+    def revision(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return row[0] if row else '0'
+
+    def lease_ids(self):
+        with self._lock, self._conn:
+            # The upsert takes the write lock before the read, so concurrent processes can't get the same block
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('next_id', (SELECT IFNULL(MAX(id), 0) + 1 FROM posts) + ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + ?",
+                (ID_BLOCK_SIZE, ID_BLOCK_SIZE)
+            )
+            end = int(self._conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()[0])
+        return range(end - ID_BLOCK_SIZE, end)
+
+    def _bump_revision(self):
+        """Advance the revision counter; caller holds the lock and transaction"""
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def _apply_batch(self, inserts, updates, deletes):
+        """apply_batch without the revision bump; caller holds the lock and transaction"""
+        conflicts = {}
+        for post in inserts:
+            self._write(post)
+        for post, expected_version in updates:
+            if expected_version is None:
+                self._write(post)
+                continue
+            cursor = self._conn.execute(
+                f'UPDATE posts SET date = ?, status = ?, data = ? WHERE id = ? AND {self.VERSION_SQL} = ?',
+                (post.get('date', ''), post.get('status'), json.dumps(post), post['id'], expected_version)
+            )
+            if cursor.rowcount:
+                self._write_platforms(post)
+            else:
+                conflicts[post['id']] = self._get(post['id'])
+        for post_id, expected_version in deletes:
+            if expected_version is None:
+                self._conn.execute('DELETE FROM posts WHERE id = ?', (post_id,))
+                continue
+            cursor = self._conn.execute(f'DELETE FROM posts WHERE id = ? AND {self.VERSION_SQL} = ?', (post_id, expected_version))
+            current = None if cursor.rowcount else self._get(post_id)
+            if current is not None:
+                conflicts[post_id] = current
+        return conflicts
+
+    def _get(self, post_id):
+        """Read one post; caller holds the lock"""
+        row = self._conn.execute('SELECT data FROM posts WHERE id = ?', (post_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, post):
+        """Upsert one post and its platform rows; caller holds the lock and transaction"""
+        self._conn.execute(
+            'INSERT INTO posts (id, date, status, data) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET date = excluded.date, status = excluded.status, data = excluded.data',
+            (post['id'], post.get('date', ''), post.get('status'), json.dumps(post))
+        )
+        self._write_platforms(post)
+
+    def _write_platforms(self, post):
+        """Replace a post's platform rows; caller holds the lock and transaction"""
+        self._conn.execute('DELETE FROM post_platforms WHERE post_id = ?', (post['id'],))
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO post_platforms (post_id, platform) VALUES (?, ?)',
+            [(post['id'], platform) for platform in post.get('platforms', [])]
+        )
+
+
+def version_of(post):
+    """Version number of a stored post (0 if it predates versioning), or None for no post"""
+    if post is None:
+        return None
+    return post.get('version', 0)
+
+
+def _post_to_row(post, columns):
+    """Sheet row for a post, with platforms packed into short codes like 'ig|tt'"""
+    row = []
+    for column in columns:
+        value = post.get(column)
+        if column == 'platforms':
+            value = '|'.join(PLATFORM_CODES.get(platform, platform) for platform in value or [])
+        elif column == 'version':
+            value = value or 0
+        elif column == 'recurrence':
+            value = json.dumps(value) if value else ''
+        row.append('' if value is None else value)
+    return row
+
+
+def _row_to_post(row, columns):
+    """Post dict from a sheet row read back as strings"""
+    post = dict(zip(columns, row))
+    for column in columns[len(row):]:
+        post[column] = ''
+    post['id'] = int(post['id'])
+    if 'version' in post:
+        post['version'] = int(post['version'] or 0)
+    if 'platforms' in post:
+        post['platforms'] = [PLATFORMS_BY_CODE.get(code, code) for code in post['platforms'].split('|') if code]
+    if post.get('recurrence'):
+        post['recurrence'] = json.loads(post['recurrence'])
+    else:
+        post.pop('recurrence', None)
+    return post
+
+
+def _row_from_range(updated_range):
+    """Get the first row number of an A1 range such as 'Sheet1!A12:B14'"""
+    first_cell = updated_range.split('!')[-1].split(':')[0]
+    return int(''.join(ch for ch in first_cell if ch.isdigit()))
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from analytics import cadence_gaps, pillar_distribution, platform_frame, posts_frame, posts_per_week_by_platform, status_funnel
+
+POSTS = [
+    {'id': 1, 'date': '2024-03-03', 'status': 'Draft', 'platforms': ['Instagram', 'TikTok'], 'content_pillar': 'Tips '},
+    {'id': 2, 'date': '2024-03-09', 'status': 'Published', 'platforms': ['Instagram'], 'content_pillar': 'Tips'},
+    {'id': 3, 'date': '2024-03-10', 'status': 'Scheduled', 'platforms': [], 'content_pillar': 'News'},
+    {'id': 4, 'date': '2024-04-20', 'platforms': ['TikTok']},
+    {'id': 5, 'date': 'someday', 'platforms': ['Instagram']},
+]
+
+
+@pytest.fixture
+def df():
+    return posts_frame(POSTS)
+
+
+def test_posts_frame_drops_undated_posts_and_defaults_status(df):
+    assert list(df['id']) == [1, 2, 3, 4]
+    assert df.loc[df['id'] == 4, 'status'].item() == 'Draft'
+    assert len(platform_frame(df)) == 4
+
+
+def test_posts_per_week_start_on_sunday(df):
+    per_week = posts_per_week_by_platform(df)
+    assert list(per_week.index) == [pd.Timestamp('2024-03-03'), pd.Timestamp('2024-04-14')]
+    assert per_week.loc['2024-03-03', 'Instagram'] == 2
+    assert per_week.loc['2024-04-14', 'TikTok'] == 1
+
+
+def test_status_funnel_keeps_workflow_order(df):
+    funnel = status_funnel(df)
+    assert list(funnel.columns) == list(df['status'].cat.categories)
+    assert funnel.loc['2024-03-01'].sum() == 3
+    assert funnel.loc['2024-04-01', 'Draft'] == 1
+
+
+def test_pillars_are_trimmed_and_counted(df):
+    assert pillar_distribution(df).to_dict() == {'Tips': 2, 'News': 1}
+
+
+def test_cadence_gaps_longest_first(df):
+    gaps = cadence_gaps(df, min_days=3)
+    assert list(gaps['empty_days']) == [40, 5]
+    assert gaps['after'].iloc[0] == pd.Timestamp('2024-03-10')
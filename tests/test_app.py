@@ -0,0 +1,135 @@
+import json
+import os
+
+import pytest
+import streamlit as st
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import AppTest
+
+from storage import SQLiteBackend
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'calendar.db')
+    storage = SQLiteBackend(db_path)
+    storage.bulk_import([
+        {'id': 1, 'date': '2024-03-05', 'title': 'Launch', 'status': 'Scheduled', 'platforms': ['Instagram'], 'notes': 'Teaser first', 'version': 1},
+        {'id': 2, 'date': '2024-03-01', 'title': 'Recap', 'status': 'Draft', 'platforms': ['LinkedIn'], 'version': 1},
+    ])
+    monkeypatch.setenv('CALENDAR_BACKEND', 'sqlite')
+    monkeypatch.setenv('CALENDAR_DB_PATH', db_path)
+    monkeypatch.setenv('CALENDAR_WARM_CACHE', '')
+    # Every test gets its own storage, queue and journal
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    yield AppTest.from_file(APP_PATH, default_timeout=30)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+
+def test_export_download_builds_full_posts(app, monkeypatch):
+    deferred = {}
+    add_deferred = MediaFileManager.add_deferred
+
+    def capture(self, data, *args, **kwargs):
+        file_id = add_deferred(self, data, *args, **kwargs)
+        deferred[file_id] = data
+        return file_id
+
+    monkeypatch.setattr(MediaFileManager, 'add_deferred', capture)
+    app.run()
+    assert not app.exception
+    button = next(button for button in app.get('download_button') if button.proto.label == '📤 Export')
+    # Built when clicked, after the script has finished
+    exported = json.load(deferred[button.proto.deferred_file_id]())
+    assert [post['id'] for post in exported] == [2, 1]
+    assert exported[1]['notes'] == 'Teaser first'
+
+
+def test_search_picks_up_posts_written_elsewhere(app, tmp_path):
+    app.run()
+    app.toggle(key='show_search').set_value(True).run()
+    app.text_input(key='search_query').input('webinar').run()
+    assert not app.exception
+    assert app.caption[0].value == '0 matching post(s)'
+
+    # Another server writes straight to storage
+    SQLiteBackend(str(tmp_path / 'calendar.db')).insert(
+        {'id': 9, 'date': '2024-03-09', 'title': 'Webinar invite', 'status': 'Draft', 'platforms': [], 'version': 1}
+    )
+    # Skip the wait for the shared revision check
+    st.cache_data.clear()
+    app.run()
+    assert not app.exception
+    assert app.caption[0].value == '1 matching post(s)'
+
+
+def test_adding_from_the_classic_grid_ends_the_open_edit(app):
+    app.run()
+    app.session_state['editing_base'] = {'id': 1, 'title': 'Launch', 'version': 1}
+    app.session_state['merge_fields'] = {'title': ('Mine', 'Theirs')}
+    add = next(button for button in app.button if (button.key or '').startswith('add_'))
+    add.click().run()
+    assert not app.exception
+    assert app.session_state['show_modal']
+    assert 'editing_base' not in app.session_state
+    assert 'merge_fields' not in app.session_state
+
+
+def test_analytics_are_aggregated_once_per_revision(app, monkeypatch):
+    import analytics
+
+    calls = []
+    original = analytics.posts_per_week_by_platform
+    monkeypatch.setattr(analytics, 'posts_per_week_by_platform', lambda df: calls.append(len(df)) or original(df))
+    app.run()
+    app.toggle(key='show_analytics').set_value(True).run()
+    app.slider[0].set_value(10).run()
+    app.run()
+    assert not app.exception
+    assert calls == [2]
+
+
+def test_replay_picks_up_entries_journaled_after_the_revision_it_saw(app, tmp_path):
+    from journal import SQLiteJournal, create_entry
+
+    db_path = str(tmp_path / 'calendar.db')
+    app.run()
+    other = SQLiteBackend(db_path)
+    journal = SQLiteJournal(db_path)
+    # The startup load doesn't know the journal's position, so the first change reloads in full
+    other.delete(2)
+    st.cache_data.clear()
+    app.run()
+    assert app.session_state['journal_seq'] is not None
+    first = {'id': 9, 'date': '2024-03-09', 'title': 'Webinar', 'status': 'Draft', 'platforms': [], 'version': 1}
+    second = {**first, 'id': 10, 'title': 'Follow-up'}
+    other.insert(first)
+    journal.append([create_entry(first, 'Ana')])
+    # Stored, but its writer hasn't journaled it yet
+    other.insert(second)
+    st.cache_data.clear()
+    app.run()
+    assert 9 in app.session_state['store'] and 10 not in app.session_state['store']
+
+    journal.append([create_entry(second, 'Bo')])
+    app.run()
+    assert not app.exception
+    assert 10 in app.session_state['store']
+
+
+def test_warm_start_swap_keeps_writes_still_queued(app, monkeypatch):
+    from write_queue import WriteQueue
+
+    app.run()
+    # As if this session had drawn the saved copy and added a post to it before storage answered
+    app.session_state['warm_start'] = 1700000000.0
+    queued = {'id': 99, 'date': '2024-03-09', 'title': 'Queued', 'status': 'Draft', 'platforms': []}
+    monkeypatch.setattr(WriteQueue, 'pending_changes', lambda self: {99: queued, 2: None})
+    app.run()
+    assert not app.exception
+    assert 'warm_start' not in app.session_state
+    assert 99 in app.session_state['store'] and 2 not in app.session_state['store']
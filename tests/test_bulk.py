@@ -0,0 +1,30 @@
+from bulk import add_platforms, duplicate_to_month, remove_platforms, set_status, shift_dates
+
+
+def post(post_id, date='2024-03-01', **fields):
+    return {'id': post_id, 'date': date, 'title': f'Post {post_id}', 'version': 1, **fields}
+
+
+def test_only_posts_that_change_are_returned():
+    posts = [post(1, status='Draft'), post(2), post(3, status='Ready')]
+    assert [p['id'] for p in set_status(posts, 'Draft')] == [3]
+    assert posts[2]['status'] == 'Ready'
+
+
+def test_platforms_are_added_and_removed_without_duplicates():
+    posts = [post(1, platforms=['Instagram']), post(2, platforms=['Instagram', 'TikTok']), post(3)]
+    added = add_platforms(posts, ['TikTok'])
+    assert [(p['id'], p['platforms']) for p in added] == [(1, ['Instagram', 'TikTok']), (3, ['TikTok'])]
+    removed = remove_platforms(posts, ['TikTok', 'YouTube'])
+    assert [(p['id'], p['platforms']) for p in removed] == [(2, ['Instagram'])]
+
+
+def test_shift_dates_crosses_month_and_year_ends():
+    shifted = shift_dates([post(1, '2024-12-30'), post(2, '2024-03-01')], 3)
+    assert [p['date'] for p in shifted] == ['2025-01-02', '2024-03-04']
+    assert shift_dates([post(1)], 0) == []
+
+
+def test_duplicates_are_new_drafts_clamped_to_the_month():
+    duplicates = duplicate_to_month([post(1, '2024-01-31', status='Published', updated_at='x')], 2024, 2)
+    assert duplicates == [{'date': '2024-02-29', 'title': 'Post 1', 'status': 'Draft'}]
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+
+from exporter import export_file, filter_posts
+from storage import MemoryBackend, SQLiteBackend
+
+
+def make_posts():
+    return [
+        {'id': 1, 'date': '2024-03-05', 'title': 'Launch', 'status': 'Scheduled', 'platforms': ['Instagram'], 'notes': 'Teaser first'},
+        {'id': 2, 'date': '2024-03-01', 'title': 'Recap', 'status': 'Draft', 'platforms': ['LinkedIn'], 'notes': ''},
+        {'id': 3, 'date': '2024-04-10', 'title': 'Q2 plan', 'status': 'Draft', 'platforms': ['Instagram', 'TikTok'], 'comments': 'Check budget'},
+        {'id': 4, 'date': '2024-03-01', 'title': 'Poll', 'status': 'Draft', 'platforms': ['Twitter']},
+    ]
+
+
+class CountingBackend(MemoryBackend):
+    """Records the size of every get_many call"""
+
+    def __init__(self, posts):
+        super().__init__(posts)
+        self.reads = []
+
+    def get_many(self, post_ids):
+        self.reads.append(len(post_ids))
+        return super().get_many(post_ids)
+
+
+def test_filter_posts():
+    posts = make_posts()
+    assert [post['id'] for post in filter_posts(posts, '2024-03-01', '2024-03-31')] == [1, 2, 4]
+    assert [post['id'] for post in filter_posts(posts, status='Draft', platform='Instagram')] == [3]
+
+
+def test_json_export_is_full_posts_in_date_order(tmp_path):
+    storage = SQLiteBackend(str(tmp_path / 'calendar.db'))
+    storage.bulk_import(make_posts())
+    exported = json.load(export_file(storage, 'JSON'))
+    assert [post['id'] for post in exported] == [2, 4, 1, 3]
+    # Summaries drop the long fields; the export has them back
+    assert exported[3]['comments'] == 'Check budget'
+
+
+def test_export_reads_posts_in_chunks():
+    storage = CountingBackend(make_posts())
+    output = export_file(storage, 'JSON Lines', start_date='2024-03-01', end_date='2024-03-31', chunk_size=2)
+    assert [json.loads(line)['id'] for line in output.read().decode('utf-8').splitlines()] == [2, 4, 1]
+    assert storage.reads == [2, 1]
+
+
+def test_csv_export_filters_by_platform():
+    output = export_file(MemoryBackend(make_posts()), 'CSV', platform='Instagram')
+    rows = list(csv.DictReader(io.TextIOWrapper(output, encoding='utf-8')))
+    assert [row['title'] for row in rows] == ['Launch', 'Q2 plan']
+    assert rows[1]['platforms'] == 'Instagram;TikTok'
+
+
+def test_export_skips_posts_deleted_while_reading():
+    class DeletingBackend(MemoryBackend):
+        def load_summaries(self):
+            summaries = super().load_summaries()
+            self.delete(1)
+            return summaries
+
+    exported = json.load(export_file(DeletingBackend(make_posts()), 'JSON'))
+    assert [post['id'] for post in exported] == [2, 4, 3]
+
+
+def test_ics_export_is_bytes():
+    output = export_file(MemoryBackend(make_posts()), 'iCalendar')
+    text = output.getvalue().decode('utf-8')
+    assert text.startswith('BEGIN:VCALENDAR\r\n')
+    assert text.count('BEGIN:VEVENT') == 4
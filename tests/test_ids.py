@@ -0,0 +1,38 @@
+import threading
+
+from ids import IdAllocator
+from storage import ID_BLOCK_SIZE, MemoryBackend
+
+
+class CountingBackend(MemoryBackend):
+    def __init__(self, posts=None):
+        super().__init__(posts)
+        self.leases = 0
+
+    def lease_ids(self):
+        self.leases += 1
+        return super().lease_ids()
+
+
+def test_ids_start_above_existing_posts_and_lease_a_block_at_a_time():
+    storage = CountingBackend([{'id': 9, 'date': '2024-03-01', 'title': 'Old'}])
+    allocator = IdAllocator(storage)
+    ids = [allocator.next_id() for _ in range(ID_BLOCK_SIZE + 1)]
+    assert ids == list(range(10, 11 + ID_BLOCK_SIZE))
+    assert storage.leases == 2
+
+
+def test_allocators_sharing_storage_never_hand_out_the_same_id():
+    storage = MemoryBackend()
+    allocators = [IdAllocator(storage) for _ in range(4)]
+    handed_out = []
+
+    def take(allocator):
+        handed_out.extend(allocator.next_id() for _ in range(250))
+
+    threads = [threading.Thread(target=take, args=(allocator,)) for allocator in allocators]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(handed_out)) == len(handed_out) == 1000
@@ -0,0 +1,79 @@
+import io
+import json
+
+from importer import import_stream, iter_json_records
+
+
+def record(n, **fields):
+    return {'title': f'Post {n}', 'date': '2024-03-01', **fields}
+
+
+def run(text, chunk_size=2, read_size=16):
+    chunks, progress = [], []
+    stream = io.StringIO(text)
+    # A tiny read_size makes records straddle reads
+    original_read = stream.read
+    stream.read = lambda size=-1: original_read(min(size, read_size))
+    imported, errors = import_stream(stream, chunks.append, chunk_size=chunk_size, progress=progress.append)
+    return imported, errors, chunks, progress
+
+
+def test_json_array_is_written_in_fixed_size_chunks():
+    imported, errors, chunks, progress = run(json.dumps([record(n) for n in range(5)]))
+    assert imported == 5 and errors == []
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [post['title'] for chunk in chunks for post in chunk] == [f'Post {n}' for n in range(5)]
+    assert progress == [2, 4, 5]
+
+
+def test_json_lines_skip_bad_records_and_keep_going():
+    lines = [json.dumps(record(1)), '{not json', json.dumps(record(2, date='March 1st')), '', json.dumps(record(3))]
+    imported, errors, chunks, _ = run('\n'.join(lines))
+    assert imported == 2
+    assert [post['title'] for chunk in chunks for post in chunk] == ['Post 1', 'Post 3']
+    assert [error['row'] for error in errors] == [2, 3]
+    assert errors[0]['error'].startswith('invalid JSON')
+    assert 'date' in errors[1]['error']
+
+
+def test_truncated_array_stops_with_an_error():
+    text = json.dumps([record(1), record(2)])[:-1]
+    rows = list(iter_json_records(io.StringIO(text), read_size=8))
+    assert [row for row, _, error in rows if error is None] == [1, 2]
+    assert rows[-1][2] == "file ended before the closing ']'"
+
+
+def test_byte_order_mark_and_whitespace_are_ignored():
+    rows = list(iter_json_records(io.StringIO('﻿  \n[ ' + json.dumps(record(1)) + ' ]')))
+    assert [(row, rec['title'], error) for row, rec, error in rows] == [(1, 'Post 1', None)]
+
+
+class CountingStream(io.StringIO):
+    """Counts the reads made from it"""
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+def test_malformed_array_record_is_skipped_without_reading_ahead():
+    good = [json.dumps(record(n, notes='x' * 50)) for n in range(200)]
+    text = '[' + ','.join(good[:1] + ['{"title": "Broken", "date": 2024-03-01}'] + good[1:]) + ']'
+    stream = CountingStream(text)
+    rows = iter_json_records(stream, read_size=64)
+    assert next(rows) == (1, record(0, notes='x' * 50), None)
+    row, rec, error = next(rows)
+    assert (row, rec) == (2, None) and error.startswith('invalid JSON')
+    # Only the bad record was read past, not the rest of the file
+    assert stream.reads * 64 < 400
+    assert [row for row, _, error in rows if error is None] == list(range(3, 202))
+
+
+def test_unterminated_string_stops_an_array_import():
+    text = '[' + json.dumps(record(1)) + ', {"title": "Broken, "date": "2024-03-01"}]'
+    rows = list(iter_json_records(io.StringIO(text), read_size=8))
+    assert [(row, error is None) for row, _, error in rows] == [(1, True), (2, False)]
@@ -0,0 +1,61 @@
+import pytest
+
+from benchmark import SimulatedWorksheet
+from instrumentation import MAX_TRACE_OPERATIONS, Metrics, instrument, percentile, post_count, sheet_call_size
+from storage import MemoryBackend
+
+
+def test_instrumented_calls_are_counted_with_their_size():
+    metrics = Metrics()
+    storage = instrument(MemoryBackend(), metrics, 'storage', ['bulk_import', 'load', 'get'], post_count)
+    # Instrumenting twice doesn't time each call twice
+    instrument(storage, metrics, 'storage', ['load'], post_count)
+    storage.bulk_import([{'id': 1, 'date': '2024-03-01'}, {'id': 2, 'date': '2024-03-02'}])
+    storage.load()
+    storage.get(3)
+    rows = {row['name']: row for row in metrics.snapshot()}
+    assert isinstance(storage, MemoryBackend)
+    assert (rows['storage.bulk_import']['calls'], rows['storage.bulk_import']['size']) == (1, 2)
+    assert (rows['storage.load']['calls'], rows['storage.load']['size']) == (1, 2)
+    assert rows['storage.get']['size'] == 0
+
+
+def test_failed_calls_are_timed_as_errors():
+    metrics = Metrics()
+    with pytest.raises(KeyError):
+        with metrics.timed('render.grid'):
+            raise KeyError('title')
+    row, = metrics.snapshot()
+    assert (row['calls'], row['errors']) == (1, 1)
+
+
+def test_sheet_calls_are_sized_in_cells():
+    metrics = Metrics()
+    sheet = instrument(SimulatedWorksheet(), metrics, 'sheets', ['batch_update', 'get'], sheet_call_size)
+    sheet.batch_update([{'range': 'A1:C2', 'values': [['a', 'b', 'c'], ['d', 'e', 'f']]}])
+    sheet.get('A1:B2')
+    rows = {row['name']: row['size'] for row in metrics.snapshot()}
+    assert rows == {'sheets.batch_update': 6, 'sheets.get': 4}
+
+
+def test_traces_collect_this_threads_operations_and_phases():
+    metrics = Metrics()
+    trace = metrics.begin_trace('rerun')
+    for _ in range(MAX_TRACE_OPERATIONS + 5):
+        metrics.record('storage.get', 0.001, 1)
+    trace.lap('load')
+    finished = metrics.end_trace().to_dict()
+    assert [phase['name'] for phase in finished['phases']] == ['load']
+    assert len(finished['operations']) == MAX_TRACE_OPERATIONS
+    assert finished['operations_dropped'] == 5
+    assert finished['total_ms'] is not None
+    # Nothing is collected once the trace has ended
+    metrics.record('storage.get', 0.001)
+    assert metrics.end_trace() is None
+
+
+def test_percentile_uses_the_nearest_rank():
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 95) == 10
+    assert percentile([], 95) == 0.0
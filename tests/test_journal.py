@@ -0,0 +1,87 @@
+import threading
+from itertools import count
+
+import pytest
+
+import journal as journal_module
+from journal import MemoryJournal, SnapshotSchedule, create_entry, delete_entry, restore_target, state_at, update_entry
+
+
+def log(journal, count):
+    journal.append([create_entry({'id': post_id, 'date': '2024-03-01', 'title': f'Post {post_id}'}, 'Ana') for post_id in range(count)])
+
+
+class CountingJournal(MemoryJournal):
+    """Counts the metadata reads a snapshot check makes"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def latest_snapshot_seq(self):
+        self.reads += 1
+        return super().latest_snapshot_seq()
+
+
+def test_snapshot_schedule_checks_in_memory():
+    journal = CountingJournal()
+    journal.save_snapshot(0, [])
+    schedule = SnapshotSchedule(journal, 10, lambda: [])
+    log(journal, 5)
+    assert not schedule.note(5)
+    assert not schedule.note(5)
+    assert journal.reads == 1
+    log(journal, 5)
+    assert schedule.note(10)
+    assert journal.snapshot_before()[0] == 10
+    assert not schedule.note(15)
+    assert journal.reads == 1
+
+
+def test_snapshot_schedule_takes_one_snapshot_at_a_time():
+    journal = MemoryJournal()
+    log(journal, 10)
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_load():
+        loading.set()
+        release.wait(5)
+        return []
+
+    schedule = SnapshotSchedule(journal, 10, slow_load)
+    first = threading.Thread(target=schedule.note, args=(10,))
+    first.start()
+    loading.wait(5)
+    # Another session arriving mid-snapshot moves on instead of taking its own
+    assert not schedule.note(10)
+    release.set()
+    first.join()
+    assert journal.latest_snapshot_seq() == 10
+    schedule.saved(25)
+    assert not schedule.note(30)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Journal times that tick one minute per entry or snapshot"""
+    minutes = count()
+    monkeypatch.setattr(journal_module, 'now_iso', lambda: f'2024-03-01T10:{next(minutes):02d}:00+00:00')
+
+
+def test_restore_target_includes_posts_created_after_the_snapshot(clock):
+    journal = MemoryJournal()
+    first = {'id': 1, 'date': '2024-03-01', 'title': 'First'}
+    journal.save_snapshot(0, [first])  # 10:00
+    second = {'id': 2, 'date': '2024-03-02', 'title': 'Second'}
+    journal.append([create_entry(second, 'Ana')])  # 10:01
+    journal.append([update_entry(second, {**second, 'title': 'Renamed'}, 'Ana')])  # 10:02
+    journal.append([delete_entry(1, first, 'Bo')])  # 10:03
+    journal.append([create_entry({'id': 3, 'date': '2024-03-03', 'title': 'Third'}, 'Bo')])  # 10:04
+
+    target, changed = restore_target(journal, '2024-03-01T10:02:00+00:00')
+    assert {post_id: post['title'] for post_id, post in target.items()} == {1: 'First', 2: 'Renamed'}
+    assert changed == {1, 3}
+    assert state_at(journal, '2024-03-01T10:01:00+00:00')[2]['title'] == 'Second'
+    with pytest.raises(ValueError):
+        state_at(journal, '2024-02-01T00:00:00+00:00')
@@ -0,0 +1,72 @@
+from post_store import PostStore
+
+
+def post(post_id, date='2024-03-01', **fields):
+    return {'id': post_id, 'date': date, 'title': f'Post {post_id}', 'status': 'Draft', 'platforms': [], **fields}
+
+
+def ids(posts):
+    return [post['id'] for post in posts]
+
+
+def test_posts_are_found_by_date_status_and_platform():
+    store = PostStore([
+        post(1, '2024-03-02', platforms=['Instagram']),
+        post(2, '2024-03-01', status='Scheduled', platforms=['Instagram', 'TikTok']),
+        post(3, '2024-03-02'),
+    ])
+    assert ids(store.posts_for_date('2024-03-02')) == [1, 3]
+    assert store.posts_for_date('2024-03-03') == []
+    assert ids(store.posts_with_status('Scheduled')) == [2]
+    assert ids(store.posts_on_platform('Instagram')) == [1, 2]
+    assert store.status_counts() == {'Draft': 2, 'Scheduled': 1}
+    assert store.platform_counts() == {'Instagram': 2, 'TikTok': 1}
+
+
+def test_range_queries_come_back_in_date_order():
+    store = PostStore([post(1, '2024-03-31'), post(2, '2024-02-29'), post(3, '2024-03-01'), post(4, '2024-04-01')])
+    assert ids(store.posts_in_range('2024-03-01', '2024-03-31')) == [3, 1]
+    assert ids(store.posts_in_range('2024-01-01', '2024-12-31')) == [2, 3, 1, 4]
+
+
+def test_updates_move_posts_between_indexes():
+    store = PostStore([post(1, '2024-03-01', platforms=['Instagram'])])
+    revision = store.revision
+    store.update(post(1, '2024-03-05', status='Published', platforms=['TikTok']))
+    assert store.revision != revision
+    assert store.posts_for_date('2024-03-01') == []
+    assert ids(store.posts_in_range('2024-03-01', '2024-03-31')) == [1]
+    assert store.status_counts() == {'Published': 1}
+    assert store.platform_counts() == {'TikTok': 1}
+    assert store.remove(1)['title'] == 'Post 1'
+    assert len(store) == 0 and store.posts_in_range('2024-01-01', '2024-12-31') == []
+    assert store.remove(1) is None
+
+
+def test_series_stay_out_of_the_date_index():
+    store = PostStore([post(1, recurrence={'freq': 'weekly'}), post(2)])
+    assert ids(store.series()) == [1]
+    assert ids(store.posts_for_date('2024-03-01')) == [2]
+    store.remove(1)
+    assert store.series() == []
+
+
+def test_revisions_are_never_reused_across_stores():
+    first = PostStore()
+    second = PostStore([post(1)])
+    revisions = [first.revision, second.revision]
+    second.clear()
+    revisions.append(second.revision)
+    # A reload builds a new store, which must not look like one cached earlier
+    revisions.append(PostStore([post(1)]).revision)
+    assert len(set(revisions)) == len(revisions)
+
+
+def test_summaries_leave_out_the_long_text():
+    store = PostStore([post(1, platforms=['Instagram'], notes='Long brief', comments='Thread', link='https://example.com')])
+    summary = store.get(1)
+    assert summary['title'] == 'Post 1'
+    assert summary.get('notes') is None and summary.get('link', '') == ''
+    assert summary.to_dict() == post(1, platforms=['Instagram'])
+    # Platforms can't be changed behind the indexes' back
+    assert summary['platforms'] == ('Instagram',)
@@ -0,0 +1,59 @@
+import pytest
+
+from recurrence import expand, materialize, occurrence_dates, parse_occurrence_id, validate_rule, with_exception, with_override
+
+
+def series(date, **rule):
+    return {'id': 7, 'date': date, 'title': 'Weekly tips', 'recurrence': validate_rule(rule)}
+
+
+def test_weekly_series_only_expands_inside_the_range():
+    dates = occurrence_dates('2023-01-02', {'freq': 'weekly', 'interval': 2}, '2024-03-01', '2024-03-31')
+    assert dates == ['2024-03-11', '2024-03-25']
+
+
+def test_until_and_exceptions_end_and_skip_occurrences():
+    rule = {'freq': 'daily', 'until': '2024-03-05', 'exceptions': ['2024-03-03']}
+    assert occurrence_dates('2024-03-01', rule, '2024-03-01', '2024-03-31') == ['2024-03-01', '2024-03-02', '2024-03-04', '2024-03-05']
+
+
+def test_monthly_skips_months_without_the_day():
+    dates = occurrence_dates('2024-01-31', {'freq': 'monthly'}, '2024-01-01', '2024-05-31')
+    assert dates == ['2024-01-31', '2024-03-31', '2024-05-31']
+
+
+def test_monthly_nth_keeps_the_weekday():
+    # A 5th Monday means the last Monday of each month
+    dates = occurrence_dates('2024-01-29', {'freq': 'monthly_nth'}, '2024-01-01', '2024-03-31')
+    assert dates == ['2024-01-29', '2024-02-26', '2024-03-25']
+    # The 2nd Tuesday
+    assert occurrence_dates('2024-01-09', {'freq': 'monthly_nth'}, '2024-02-01', '2024-02-29') == ['2024-02-13']
+
+
+def test_occurrences_carry_overrides_and_series_ids():
+    weekly = with_override(series('2024-03-04', freq='weekly'), '2024-03-11', {'title': 'Special', 'date': '2024-03-11'})
+    posts = expand(with_exception(weekly, '2024-03-18'), '2024-03-01', '2024-03-25')
+    assert [(post['date'], post['title']) for post in posts] == [
+        ('2024-03-04', 'Weekly tips'), ('2024-03-11', 'Special'), ('2024-03-25', 'Weekly tips'),
+    ]
+    assert parse_occurrence_id(posts[1]['id']) == (7, '2024-03-11')
+    assert posts[1]['series_id'] == 7 and 'recurrence' not in posts[1]
+
+
+def test_materialize_moves_occurrences_out_of_the_series():
+    weekly = series('2024-03-04', freq='weekly')
+    posts, updated = materialize(weekly, '2024-03-01', '2024-03-14')
+    assert [post['date'] for post in posts] == ['2024-03-04', '2024-03-11']
+    assert all('id' not in post and 'series_id' not in post for post in posts)
+    assert [post['date'] for post in expand(updated, '2024-03-01', '2024-03-31')] == ['2024-03-18', '2024-03-25']
+
+
+@pytest.mark.parametrize('rule', [
+    {'freq': 'yearly'},
+    {'freq': 'daily', 'interval': -1},
+    {'freq': 'daily', 'until': '01/03/2024'},
+    {'freq': 'daily', 'exceptions': '2024-03-01'},
+])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        validate_rule(rule)
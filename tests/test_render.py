@@ -0,0 +1,54 @@
+import re
+from datetime import date
+
+from render import day_cell_html, month_grid_html, post_card_html, quarter_html, week_grid_html
+
+
+def actions(html):
+    """(action, value) of every clickable link, in order"""
+    return re.findall(r"data-action='(\w+)' data-value='([^']*)'", html)
+
+
+def test_post_card_escapes_and_shortens_the_title():
+    html = post_card_html({'id': 4, 'title': '<b>' + 'x' * 40, 'platforms': ['Instagram', 'Mastodon']})
+    assert '<b>' not in html and '&lt;b&gt;' in html
+    assert '&lt;b&gt;' + 'x' * 32 + '...<' in html
+    assert '📷📱' in html
+    assert actions(html) == [('view', '4')]
+
+
+def test_series_occurrences_are_marked():
+    html = post_card_html({'id': '7@2024-03-04', 'title': 'Tips', 'series_id': 7})
+    assert '🔁' in html
+    assert actions(html) == [('view', '7@2024-03-04')]
+
+
+def test_day_cell_starts_a_post_then_lists_its_posts():
+    html = day_cell_html('2024-03-05', 5, [{'id': 1, 'title': 'Launch'}, {'id': 2, 'title': 'Recap'}])
+    assert actions(html) == [('add', '2024-03-05'), ('view', '1'), ('view', '2')]
+
+
+def test_month_grid_asks_for_each_day_once():
+    asked = []
+
+    def posts_for_date(date_str):
+        asked.append(date_str)
+        return [{'id': 1, 'title': 'Launch'}] if date_str == '2024-02-29' else []
+
+    html = month_grid_html(2024, 2, posts_for_date)
+    assert asked == [f'2024-02-{day:02d}' for day in range(1, 30)]
+    # February 2024 starts on a Thursday
+    assert html.count('calendar-day-empty') == 4 + 2
+    assert ('view', '1') in actions(html)
+
+
+def test_week_grid_spans_seven_days_across_months():
+    html = week_grid_html(date(2024, 3, 31), lambda date_str: [])
+    assert [value for action, value in actions(html)] == ['2024-03-31'] + [f'2024-04-{day:02d}' for day in range(1, 7)]
+
+
+def test_quarter_links_days_to_their_week_and_marks_busy_days():
+    html = quarter_html(date(2024, 11, 1), {'2024-12-25': 2})
+    assert all(name in html for name in ('November 2024', 'December 2024', 'January 2025'))
+    assert len(actions(html)) == 30 + 31 + 31
+    assert "class='mini-day has-posts' href='#' data-action='week' data-value='2024-12-25' title='2 posts'" in html
@@ -0,0 +1,144 @@
+from benchmark import SimulatedWorksheet
+from journal import MemoryJournal, create_entry, restore_target, update_entry
+from replica import ReplicaBackend
+from storage import MemoryBackend, SheetsBackend
+from write_queue import WriteQueue
+
+
+class ManualReplica(ReplicaBackend):
+    """A replica that only syncs when told to"""
+
+    def _run(self):
+        pass
+
+
+def post(post_id, date, **fields):
+    return {'id': post_id, 'date': date, 'title': f'Post {post_id}', 'platforms': [], 'version': 1, **fields}
+
+
+def replicas(tmp_path, count=2, snapshot_every=500):
+    remote, journal = MemoryBackend(), MemoryJournal()
+    return remote, journal, [
+        ManualReplica(str(tmp_path / f'replica{n}.db'), lambda: remote, lambda _: journal, snapshot_every=snapshot_every)
+        for n in range(count)
+    ]
+
+
+def test_replicas_share_the_remote_journal(tmp_path):
+    remote, journal, (first, second) = replicas(tmp_path)
+    first.insert(post(1, '2024-03-01'))
+    first.journal.append([create_entry(post(1, '2024-03-01'), 'Ana')])
+    # Nothing leaves the replica until it syncs
+    assert journal.head() == 0
+    first.sync()
+    second.sync()
+    assert second.get(1)['title'] == 'Post 1'
+
+    edited = post(1, '2024-03-01', title='Launch', version=2)
+    second.update(edited)
+    second.journal.append([update_entry(post(1, '2024-03-01'), edited, 'Bo')])
+    second.sync()
+    assert [entry['user'] for entry in first.journal.history(1)] == ['Ana', 'Bo']
+    assert remote.get(1)['title'] == 'Launch'
+
+
+def test_replica_journal_starts_from_a_snapshot_of_the_remote(tmp_path):
+    remote, journal, (replica,) = replicas(tmp_path, count=1)
+    remote.insert(post(1, '2024-03-01'))
+    replica.sync()
+    replica.insert(post(2, '2024-03-02'))
+    replica.journal.append([create_entry(post(2, '2024-03-02'), 'Ana')])
+    replica.sync()
+    seq, _, posts = journal.snapshot_before()
+    assert seq == 0 and [p['id'] for p in posts] == [1]
+    entry_ts = journal.entries()[0]['ts']
+    target, changed = restore_target(replica.journal, entry_ts)
+    assert set(target) == {1, 2} and changed == set()
+
+
+def test_replica_drops_the_journal_entry_of_an_edit_the_remote_refused(tmp_path):
+    remote, journal, (first, second) = replicas(tmp_path)
+    remote.insert(post(1, '2024-03-01'))
+    first.sync()
+    second.sync()
+    mine = post(1, '2024-03-01', title='Mine', version=2)
+    first.update(mine)
+    first.journal.append([update_entry(post(1, '2024-03-01'), mine, 'Ana')])
+    theirs = post(1, '2024-03-01', title='Theirs', version=2)
+    second.update(theirs)
+    second.journal.append([update_entry(post(1, '2024-03-01'), theirs, 'Bo')])
+    second.sync()
+    first.sync()
+    assert first.get(1)['title'] == 'Theirs'
+    assert [entry['user'] for entry in journal.history(1)] == ['Bo']
+
+
+def test_replica_hands_on_clashes_with_the_losing_edit(tmp_path):
+    remote, _, (first, second) = replicas(tmp_path)
+    remote.insert(post(1, '2024-03-01'))
+    first.sync()
+    second.sync()
+    first.update(post(1, '2024-03-01', title='Mine', version=2))
+    second.update(post(1, '2024-03-01', title='Theirs', version=2))
+    second.sync()
+    first.sync()
+    conflicts = first.take_conflicts()
+    assert conflicts[1]['mine']['title'] == 'Mine'
+    assert conflicts[1]['theirs']['title'] == 'Theirs'
+    assert conflicts[1]['base']['title'] == 'Post 1'
+    assert conflicts[1]['fields'] == ['title']
+    assert first.take_conflicts() == {}
+
+    queue = WriteQueue(first, flush_interval=3600)
+    queue.add_conflict(1, **conflicts[1])
+    assert 1 in queue.conflicts_for('anyone')
+    queue.keep_mine(1, owner='anyone')
+    queue.flush()
+    first.sync()
+    assert remote.get(1)['title'] == 'Mine'
+
+
+def test_replica_snapshots_the_shared_journal_as_it_grows(tmp_path):
+    remote, journal, (replica,) = replicas(tmp_path, count=1, snapshot_every=3)
+    replica.sync()
+    for post_id in range(1, 5):
+        replica.insert(post(post_id, '2024-03-01'))
+        replica.journal.append([create_entry(post(post_id, '2024-03-01'), 'Ana')])
+    replica.sync()
+    seq, _, posts = journal.snapshot_before()
+    assert seq == 4 and len(posts) == 4
+
+
+def test_replica_pushes_local_writes_and_pulls_remote_deletes(tmp_path):
+    remote, _, (replica,) = replicas(tmp_path, count=1)
+    remote.bulk_import([post(1, '2024-03-01'), post(2, '2024-03-02')])
+    replica.sync()
+    assert sorted(p['id'] for p in replica.load()) == [1, 2]
+
+    replica.insert(post(3, '2024-03-03'))
+    assert replica.status() == 'pending'
+    remote.delete(1)
+    replica.sync()
+    assert replica.status() == 'synced'
+    assert sorted(p['id'] for p in remote.load()) == [2, 3]
+    assert sorted(p['id'] for p in replica.load()) == [2, 3]
+
+
+def test_replica_bootstraps_from_a_large_sheet_in_a_few_reads(tmp_path):
+    sheet = SimulatedWorksheet()
+    remote = SheetsBackend(sheet)
+    remote.bulk_import([post(post_id, '2024-03-01') for post_id in range(1, 3001)])
+    sizes = []
+    batch_get = sheet.batch_get
+    sheet.batch_get = lambda ranges, **kwargs: sizes.append(len(ranges)) or batch_get(ranges, **kwargs)
+    replica = ManualReplica(str(tmp_path / 'replica.db'), lambda: remote)
+    replica.sync()
+    assert len(replica.load()) == 3000
+    assert sum(sizes) < 10
+
+    # Later pulls still fetch just the posts that changed
+    remote.update({**post(7, '2024-03-01', title='Renamed'), 'version': 2})
+    sizes.clear()
+    replica.sync()
+    assert replica.get(7)['title'] == 'Renamed'
+    assert sum(sizes) < 10
@@ -0,0 +1,23 @@
+from search import SearchIndex
+
+
+def post(post_id, title, version=1, **fields):
+    return {'id': post_id, 'date': f'2024-03-{post_id:02d}', 'title': title, 'status': 'Draft', 'version': version, **fields}
+
+
+def test_search_matches_prefixes_and_filters():
+    index = SearchIndex([post(1, 'Spring launch', platforms=['Instagram']), post(2, 'Launch recap', notes='Numbers are in')])
+    assert index.search('laun') == (2, [1, 2])
+    assert index.search('laun', {'platforms': 'Instagram'}) == (1, [1])
+    assert index.search('numbers') == (1, [2])
+    index.remove(1)
+    assert index.search('laun') == (1, [2])
+
+
+def test_outdated_only_counts_newer_copies():
+    index = SearchIndex([post(1, 'Launch', version=2), post(2, 'Recap')])
+    assert index.outdated([post(1, 'Launch', version=2), post(2, 'Recap')]) == []
+    # A session behind the index must not pull it back to an older copy
+    assert index.outdated([post(1, 'Launch', version=1)]) == []
+    assert index.outdated([post(1, 'Launch', version=3), post(3, 'New')]) == [1, 3]
+    assert index.missing([1]) == {2}
@@ -0,0 +1,13 @@
+import os
+import stat
+
+from startup import WarmCache
+
+
+def test_warm_cache_round_trip_is_private(tmp_path):
+    cache = WarmCache(str(tmp_path / 'calendar_warm_cache.json'))
+    assert cache.load() is None
+    cache.save('rev-1', [{'id': 1, 'date': '2024-03-01', 'title': 'Launch'}])
+    revision, _, posts = cache.load()
+    assert (revision, posts) == ('rev-1', [{'id': 1, 'date': '2024-03-01', 'title': 'Launch'}])
+    assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600
@@ -0,0 +1,188 @@
+import json
+
+import pytest
+
+from benchmark import SimulatedWorksheet
+from storage import ID_BLOCK_SIZE, MemoryBackend, SheetsBackend, SQLiteBackend
+
+
+def post(post_id, date='2024-03-01', **fields):
+    return {'id': post_id, 'date': date, 'title': f'Post {post_id}', 'status': 'Draft', 'platforms': [], 'version': 1, **fields}
+
+
+def ids(posts):
+    return sorted(post['id'] for post in posts)
+
+
+def test_sheets_writes_follow_rows_moved_by_another_process():
+    sheet = SimulatedWorksheet()
+    mine = SheetsBackend(sheet)
+    mine.bulk_import([post(1), post(2), post(3)])
+    theirs = SheetsBackend(sheet)
+    theirs.load()
+    theirs.delete(1)
+    # Rows shift up, so this process's index now points one row too far down
+    theirs.compact(theirs.load())
+
+    mine.update(post(2, title='Edited', version=2))
+    mine.delete(3)
+    assert [(row['id'], row['title']) for row in theirs.load()] == [(2, 'Edited')]
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'sheets'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend()
+    if request.param == 'sqlite':
+        return SQLiteBackend(str(tmp_path / 'calendar.db'))
+    return SheetsBackend(SimulatedWorksheet())
+
+
+def test_query_range_filters_by_date_status_and_platform(backend):
+    backend.bulk_import([
+        post(1, '2024-02-29', platforms=['Instagram']),
+        post(2, '2024-03-01', platforms=['Instagram', 'TikTok']),
+        post(3, '2024-03-15', status='Scheduled', platforms=['TikTok']),
+        post(4, '2024-03-31'),
+        post(5, '2024-04-01', platforms=['TikTok']),
+    ])
+    assert ids(backend.query_range('2024-03-01', '2024-03-31')) == [2, 3, 4]
+    assert ids(backend.query_range('2024-03-01', '2024-03-31', platform='TikTok')) == [2, 3]
+    assert ids(backend.query_range('2024-03-01', '2024-03-31', status='Scheduled', platform='TikTok')) == [3]
+
+
+def test_apply_batch_skips_writes_to_posts_changed_since(backend):
+    backend.bulk_import([post(1), post(2), post(3)])
+    backend.update(post(2, title='Theirs', version=2))
+    conflicts = backend.apply_batch(
+        [post(4)],
+        [(post(1, title='Mine', version=2), 1), (post(2, title='Mine', version=2), 1)],
+        [(3, 1)]
+    )
+    assert list(conflicts) == [2]
+    assert conflicts[2]['title'] == 'Theirs'
+    # The rest of the batch still lands
+    stored = {row['id']: row for row in backend.load()}
+    assert sorted(stored) == [1, 2, 4]
+    assert stored[1]['title'] == 'Mine' and stored[2]['title'] == 'Theirs'
+
+
+def test_apply_batch_reports_posts_deleted_since(backend):
+    backend.bulk_import([post(1), post(2)])
+    backend.delete(1)
+    backend.update(post(2, version=2))
+    conflicts = backend.apply_batch([], [(post(1, title='Mine', version=2), 1)], [(2, 1)])
+    assert conflicts == {1: None, 2: backend.get(2)}
+    assert ids(backend.load()) == [2]
+
+
+def test_sheets_reads_many_rows_in_bounded_requests():
+    sheet = SimulatedWorksheet()
+    storage = SheetsBackend(sheet)
+    storage.bulk_import([post(post_id) for post_id in range(1, 251)])
+    sizes = []
+    batch_get = sheet.batch_get
+    sheet.batch_get = lambda ranges, **kwargs: sizes.append(len(ranges)) or batch_get(ranges, **kwargs)
+    posts = storage.get_many(range(1, 251))
+    assert sorted(posts) == list(range(1, 251))
+    assert posts[250]['title'] == 'Post 250'
+    assert sizes == [100, 100, 50]
+
+
+def test_first_lease_starts_above_the_highest_id(backend):
+    backend.bulk_import([post(5), post(42)])
+    first = backend.lease_ids()
+    second = backend.lease_ids()
+    assert first.start == 43
+    assert len(first) == len(second) == ID_BLOCK_SIZE
+    assert second.start >= first.stop
+
+
+def test_sheets_leases_never_overlap_between_processes():
+    sheet = SimulatedWorksheet()
+    mine = SheetsBackend(sheet)
+    mine.bulk_import([post(7)])
+    theirs = SheetsBackend(sheet)
+    leased = [set(mine.lease_ids()), set(theirs.lease_ids()), set(mine.lease_ids())]
+    assert min(min(block) for block in leased) == 8
+    assert len(set.union(*leased)) == 3 * ID_BLOCK_SIZE
+
+
+def test_sheets_processes_racing_to_set_the_id_floor_agree_on_it():
+    sheet = SimulatedWorksheet()
+    mine = SheetsBackend(sheet)
+    mine.bulk_import([post(3), post(50)])
+    leases = sheet.spreadsheet.add_worksheet(SheetsBackend.ID_LEASE_SHEET)
+    acell = leases.acell
+    racing = []
+
+    def read_before_the_other_process_writes(label):
+        # The first read of each process finds no floor yet
+        return acell('Z99') if racing and racing.pop() else acell(label)
+
+    leases.acell = read_before_the_other_process_writes
+    racing.append(True)
+    first = mine.lease_ids()
+    # Their floor would come out lower
+    mine.delete(50)
+    mine.compact(mine.load())
+    racing.append(True)
+    second = SheetsBackend(sheet).lease_ids()
+    assert first.start == 51
+    assert not set(first) & set(second)
+
+
+def test_sheets_migrates_json_rows_to_columns():
+    sheet = SimulatedWorksheet()
+    sheet.rows = [
+        ['id', 'data'],
+        ['1', json.dumps(post(1, title='First'))],
+        # Tombstoned by the old layout
+        ['2', ''],
+        ['3', json.dumps(post(3, '2024-03-05', platforms=['Instagram']))],
+        ['4', 'not json'],
+    ]
+    storage = SheetsBackend(sheet)
+    assert sheet.rows[0][:len(SheetsBackend.COLUMNS)] == SheetsBackend.COLUMNS
+    posts = {row['id']: row for row in storage.load()}
+    assert sorted(posts) == [1, 3]
+    assert posts[1]['title'] == 'First'
+    assert posts[3]['platforms'] == ['Instagram']
+    # Leftover rows below the rewritten posts are cleared
+    assert not any(row and row[0] for row in sheet.rows[3:])
+
+
+def test_sheets_compact_rewrites_in_place_and_clears_the_rest():
+    sheet = SimulatedWorksheet()
+    storage = SheetsBackend(sheet)
+    storage.bulk_import([post(1), post(2), post(3)])
+    storage.delete(1)
+    revision = storage.revision()
+    storage.compact(storage.load())
+    assert [row[0] for row in sheet.rows[1:] if row and row[0]] == ['2', '3']
+    assert ids(SheetsBackend(sheet).load()) == [2, 3]
+    assert storage.revision() != revision
+
+
+def test_sheets_compact_that_fails_keeps_every_post():
+    sheet = SimulatedWorksheet()
+    storage = SheetsBackend(sheet)
+    storage.bulk_import([post(1), post(2), post(3)])
+    storage.delete(1)
+
+    def quota_exceeded(data, **kwargs):
+        raise OSError('quota exceeded')
+
+    sheet.batch_update = quota_exceeded
+    with pytest.raises(OSError):
+        storage.compact(storage.load())
+    del sheet.batch_update
+    assert ids(SheetsBackend(sheet).load()) == [2, 3]
+
+
+def test_summaries_carry_every_summary_field_and_nothing_else(backend):
+    backend.bulk_import([post(1, notes='Long brief', link='https://example.com', recurrence={'freq': 'weekly'})])
+    summary, = backend.load_summaries()
+    assert 'notes' not in summary and 'link' not in summary
+    assert summary['recurrence']['freq'] == 'weekly'
+    assert backend.get_many([1])[1]['notes'] == 'Long brief'
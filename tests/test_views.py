@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+from views import group_by_date, shift_anchor, view_title, visible_range
+
+
+@pytest.mark.parametrize('view, anchor, first, last', [
+    ('Month', datetime(2024, 2, 14), datetime(2024, 2, 1), datetime(2024, 2, 29)),
+    # Weeks start on Sunday
+    ('Week', datetime(2024, 3, 6), datetime(2024, 3, 3), datetime(2024, 3, 9)),
+    ('Week', datetime(2024, 3, 3), datetime(2024, 3, 3), datetime(2024, 3, 9)),
+    ('Agenda', datetime(2024, 3, 6, 15, 30), datetime(2024, 3, 6), datetime(2024, 3, 19)),
+    ('Quarter', datetime(2024, 12, 31), datetime(2024, 10, 1), datetime(2024, 12, 31)),
+])
+def test_visible_range(view, anchor, first, last):
+    assert visible_range(view, anchor) == (first, last)
+
+
+def test_shift_anchor_pages_each_view():
+    anchor = datetime(2024, 1, 31)
+    assert shift_anchor('Month', anchor, 1) == datetime(2024, 2, 1)
+    assert shift_anchor('Month', anchor, -1) == datetime(2023, 12, 1)
+    assert shift_anchor('Week', anchor, -1) == datetime(2024, 1, 24)
+    assert shift_anchor('Agenda', anchor, 1, agenda_days=30) == datetime(2024, 3, 1)
+    assert shift_anchor('Quarter', datetime(2024, 11, 15), 1) == datetime(2025, 1, 1)
+
+
+def test_view_title():
+    assert view_title('Month', datetime(2024, 3, 6)) == 'March 2024'
+    assert view_title('Quarter', datetime(2024, 8, 1)) == 'Q3 2024'
+    assert view_title('Week', datetime(2024, 3, 6)) == 'Mar 03 – Mar 09, 2024'
+    assert view_title('Week', datetime(2024, 12, 31)) == 'Dec 29, 2024 – Jan 04, 2025'
+
+
+def test_group_by_date_keeps_post_order():
+    posts = [{'id': 1, 'date': '2024-03-02'}, {'id': 2, 'date': '2024-03-01'}, {'id': 3, 'date': '2024-03-02'}]
+    grouped = group_by_date(posts)
+    assert {date: [post['id'] for post in day] for date, day in grouped.items()} == {'2024-03-02': [1, 3], '2024-03-01': [2]}
@@ -0,0 +1,104 @@
+from journal import MemoryJournal
+from storage import MemoryBackend
+from write_queue import WriteQueue, merge_posts
+
+
+def post(post_id, **fields):
+    return {'id': post_id, 'date': '2024-03-01', 'title': f'Post {post_id}', 'notes': '', 'version': 1, **fields}
+
+
+class FlakyBackend(MemoryBackend):
+    """Fails the next `failures` batch writes"""
+
+    def __init__(self, posts=None, failures=0):
+        super().__init__(posts)
+        self.failures = failures
+
+    def apply_batch(self, inserts, updates, deletes):
+        if self.failures:
+            self.failures -= 1
+            raise OSError('quota exceeded')
+        return super().apply_batch(inserts, updates, deletes)
+
+
+def queue_for(storage, journal=None):
+    # Flushed by the tests, never by the background thread
+    return WriteQueue(storage, flush_interval=3600, journal=journal)
+
+
+def test_writes_to_the_same_post_are_coalesced():
+    storage = MemoryBackend()
+    queue = queue_for(storage)
+    queue.insert(post(1))
+    queue.update(post(1, title='Renamed'))
+    queue.insert(post(2))
+    queue.delete(2)
+    assert queue.pending_count() == 1
+    assert queue.pending_post(1)['title'] == 'Renamed'
+    assert queue.pending_changes() == {1: post(1, title='Renamed')}
+    queue.flush()
+    assert queue.status() == 'synced'
+    assert storage.load() == [post(1, title='Renamed')]
+
+
+def test_failed_flush_is_requeued_under_newer_edits():
+    storage = FlakyBackend([post(1)], failures=1)
+    queue = queue_for(storage)
+    queue.update(post(1, title='First', version=2), base=post(1))
+    queue.insert(post(2))
+    try:
+        queue.flush()
+    except OSError:
+        pass
+    else:
+        raise AssertionError('the failed write should raise')
+    # Edited again before the retry; the base is still the stored copy
+    queue.update(post(1, title='Second', version=2), base=post(1, title='First', version=2))
+    queue.delete(2)
+    assert queue.pending_count() == 1
+    queue.flush()
+    assert queue.conflicts == {}
+    assert storage.get(1)['title'] == 'Second'
+    assert storage.get(2) is None
+
+
+def test_merge_posts_takes_each_side_changes_and_reports_clashes():
+    base = post(1)
+    merged, clashes = merge_posts(base, post(1, title='Mine', notes='Both'), post(1, notes='Other', status='Ready', version=2))
+    assert merged['title'] == 'Mine' and merged['status'] == 'Ready'
+    assert clashes == ['notes']
+
+
+def test_edits_to_different_fields_are_merged_and_retried():
+    storage = MemoryBackend([post(1)])
+    queue = queue_for(storage)
+    queue.update(post(1, title='Mine', version=2), base=post(1), owner='ana')
+    storage.update(post(1, notes='Theirs', version=2))
+    queue.flush()
+    assert queue.conflicts == {}
+    assert queue.pending_count() == 1
+    queue.flush()
+    stored = storage.get(1)
+    assert (stored['title'], stored['notes'], stored['version']) == ('Mine', 'Theirs', 3)
+
+
+def test_clashing_edit_is_parked_then_merged_by_its_owner():
+    storage = MemoryBackend([post(1)])
+    journal = MemoryJournal()
+    queue = queue_for(storage, journal)
+    queue.update(post(1, title='Mine', version=2), base=post(1), owner='ana')
+    storage.update(post(1, title='Theirs', version=2))
+    queue.flush()
+    assert queue.status() == 'conflict'
+    assert queue.conflicts_for('bo') == {}
+    conflict = queue.conflicts_for('ana')[1]
+    assert conflict['fields'] == ['title'] and conflict['theirs']['title'] == 'Theirs'
+    # Nothing was written, so nothing was journaled
+    assert journal.head() == 0
+
+    merged, _ = merge_posts(conflict['base'], conflict['mine'], conflict['theirs'])
+    queue.keep_mine(1, {**merged, 'title': 'Both'})
+    queue.flush()
+    assert storage.get(1)['title'] == 'Both'
+    assert storage.get(1)['version'] == 3
+    assert [entry['user'] for entry in journal.history(1)] == ['ana']
@@ -0,0 +1,57 @@
+import calendar
+from datetime import datetime, timedelta
+
+VIEWS = ['Month', 'Week', 'Agenda', 'Quarter']
+
+
+def add_months(day, months):
+    """First day of the month that is `months` away from day's month"""
+    index = day.year * 12 + day.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def visible_range(view, anchor, agenda_days=14):
+    """(first, last) datetimes shown by a view anchored on a date"""
+    if view == 'Week':
+        # Weeks start on Sunday like the month grid
+        start = datetime(anchor.year, anchor.month, anchor.day) - timedelta(days=(anchor.weekday() + 1) % 7)
+        return start, start + timedelta(days=6)
+    if view == 'Agenda':
+        start = datetime(anchor.year, anchor.month, anchor.day)
+        return start, start + timedelta(days=agenda_days - 1)
+    if view == 'Quarter':
+        start = add_months(anchor, -((anchor.month - 1) % 3))
+        return start, add_months(start, 3) - timedelta(days=1)
+    start = datetime(anchor.year, anchor.month, 1)
+    return start, start + timedelta(days=calendar.monthrange(anchor.year, anchor.month)[1] - 1)
+
+
+def shift_anchor(view, anchor, step, agenda_days=14):
+    """Anchor date one page forward (step=1) or back (step=-1) in a view"""
+    if view == 'Week':
+        return anchor + timedelta(days=7 * step)
+    if view == 'Agenda':
+        return anchor + timedelta(days=agenda_days * step)
+    if view == 'Quarter':
+        return add_months(visible_range(view, anchor)[0], 3 * step)
+    return add_months(anchor, step)
+
+
+def view_title(view, anchor, agenda_days=14):
+    """Heading for the visible range"""
+    start, end = visible_range(view, anchor, agenda_days)
+    if view == 'Month':
+        return start.strftime('%B %Y')
+    if view == 'Quarter':
+        return f"Q{(start.month - 1) // 3 + 1} {start.year}"
+    if start.year != end.year:
+        return f"{start.strftime('%b %d, %Y')} – {end.strftime('%b %d, %Y')}"
+    return f"{start.strftime('%b %d')} – {end.strftime('%b %d, %Y')}"
+
+
+def group_by_date(posts):
+    """{'YYYY-MM-DD': [posts]} for a list of posts"""
+    grouped = {}
+    for post in posts:
+        grouped.setdefault(post.get('date'), []).append(post)
+    return grouped
@@ -0,0 +1,252 @@
+import threading
+import time
+
+from journal import create_entry, delete_entry, update_entry
+from storage import version_of
+
+# Bookkeeping fields that never count as a conflicting edit
+MERGE_IGNORED_FIELDS = {'id', 'version', 'updated_at'}
+
+
+class WriteQueue:
+    """Buffers post mutations and flushes them to storage in batches from a background thread
+
+    Repeated writes to the same post id are coalesced so only the latest state is sent.
+    Failed flushes are put back in the queue and retried with exponential backoff.
+
+    Updates and deletes remember the post as it was before the first queued change
+    (the base) and are written compare-and-swap against the base's version. When
+    someone else changed the post in between, non-overlapping field edits are merged
+    and retried automatically; real clashes are parked in `conflicts` for the owner
+    to resolve.
+    """
+
+    def __init__(self, storage, flush_interval=2.0, max_batch=50, max_backoff=60.0, on_flush=None, journal=None):
+        self.storage = storage
+        # Every write that lands is recorded here, attributed to user_names[owner] (default: the owner)
+        self.journal = journal
+        self.user_names = {}
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_backoff = max_backoff
+        self.on_flush = on_flush
+        self.last_error = None
+        self.last_synced = None
+        # post_id -> {'owner', 'mine', 'theirs', 'base', 'fields'}
+        self.conflicts = {}
+        self._failures = 0
+        # post_id -> (op, post, base, owner); op is 'insert', 'update' or 'delete'. Dicts keep arrival order.
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='calendar-write-queue', daemon=True)
+        self._thread.start()
+
+    def insert(self, post, owner=None):
+        """Queue a new post"""
+        self._put(post['id'], 'insert', dict(post), None, owner)
+
+    def update(self, post, base=None, owner=None):
+        """Queue an edit to an existing post; base is the copy the edit started from"""
+        self._put(post['id'], 'update', dict(post), base, owner)
+
+    def delete(self, post_id, base=None, owner=None):
+        """Queue a post removal; base is the copy the user saw when deleting"""
+        self._put(post_id, 'delete', None, base, owner)
+
+    def pending_count(self):
+        """Number of posts with unsynced changes"""
+        with self._cond:
+            return len(self._pending)
+
+    def pending_post(self, post_id):
+        """The queued copy of a post that hasn't reached storage yet, or None"""
+        with self._cond:
+            entry = self._pending.get(post_id)
+        return dict(entry[1]) if entry and entry[1] is not None else None
+
+    def pending_changes(self):
+        """{post_id: queued copy, or None if it is being deleted} for every post with unsynced changes"""
+        with self._cond:
+            return {post_id: dict(post) if post is not None else None for post_id, (_, post, _, _) in self._pending.items()}
+
+    def conflicts_for(self, owner):
+        """Unresolved conflicts raised by one owner's edits, plus those nobody in particular raised"""
+        with self._cond:
+            return {post_id: conflict for post_id, conflict in self.conflicts.items() if conflict['owner'] in (owner, None)}
+
+    def add_conflict(self, post_id, mine, theirs, base, fields, owner=None):
+        """Park a clash for the owner to resolve; owner None shows it to everyone, e.g. one found while syncing a replica"""
+        with self._cond:
+            self.conflicts[post_id] = {'owner': owner, 'mine': mine, 'theirs': theirs, 'base': base, 'fields': fields}
+
+    def keep_mine(self, post_id, post=None, owner=None):
+        """Resolve a conflict by writing post (default: the conflicting edit) over the current copy
+
+        The write is made by the conflict's owner, or by owner if the conflict has none.
+        """
+        with self._cond:
+            conflict = self.conflicts.pop(post_id, None)
+        if conflict is None:
+            return
+        post = post if post is not None else conflict['mine']
+        theirs = conflict['theirs']
+        owner = conflict['owner'] if conflict['owner'] is not None else owner
+        if post is None:
+            self.delete(post_id, base=theirs, owner=owner)
+        elif theirs is None:
+            # The other editor deleted it, so bring it back
+            self.insert(post, owner=owner)
+        else:
+            self.update({**post, 'version': version_of(theirs) + 1}, base=theirs, owner=owner)
+
+    def accept_theirs(self, post_id):
+        """Resolve a conflict by dropping the conflicting edit; returns the current copy (None if deleted)"""
+        with self._cond:
+            conflict = self.conflicts.pop(post_id, None)
+        return conflict['theirs'] if conflict else None
+
+    def status(self):
+        """'conflict' with unresolved conflicts, 'error' while retrying a failed flush,
+        'pending' with unsynced changes, else 'synced'"""
+        with self._cond:
+            if self.conflicts:
+                return 'conflict'
+            if self.last_error and self._pending:
+                return 'error'
+            return 'pending' if self._pending else 'synced'
+
+    def flush(self):
+        """Write everything queued right now; raises if the storage write fails"""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            inserts = [post for op, post, _, _ in batch.values() if op == 'insert']
+            updates = [(post, version_of(base)) for op, post, base, _ in batch.values() if op == 'update']
+            deletes = [(post_id, version_of(base)) for post_id, (op, _, base, _) in batch.items() if op == 'delete']
+            try:
+                conflicts = self.storage.apply_batch(inserts, updates, deletes)
+            except Exception:
+                self._requeue(batch)
+                raise
+            self._handle_conflicts(batch, conflicts)
+            self.last_synced = time.time()
+            if self.journal:
+                self.journal.append(self._journal_entries(batch, conflicts))
+        if self.on_flush:
+            self.on_flush()
+
+    def _put(self, post_id, op, post, base, owner):
+        with self._cond:
+            previous = self._pending.pop(post_id, None)
+            if previous is None:
+                entry = (op, post, base, owner)
+            elif previous[0] == 'insert' and op == 'delete':
+                # Never reached storage, so there is nothing to delete
+                entry = None
+            elif previous[0] == 'insert':
+                entry = ('insert', post, None, owner)
+            elif previous[0] == 'delete' and op == 'insert':
+                entry = ('update', post, previous[2], owner)
+            else:
+                # Check against the state before the first queued change
+                entry = (op, post, previous[2], owner)
+            if entry is not None:
+                self._pending[post_id] = entry
+            if len(self._pending) >= self.max_batch and not self._failures:
+                self._cond.notify()
+
+    def _requeue(self, batch):
+        """Put a failed batch back without overwriting anything queued since"""
+        with self._cond:
+            for post_id, entry in batch.items():
+                newer = self._pending.get(post_id)
+                if newer is None:
+                    self._pending[post_id] = entry
+                elif entry[0] == 'insert' and newer[0] == 'delete':
+                    del self._pending[post_id]
+                elif entry[0] == 'insert':
+                    # A later edit of a post that was never stored is still an insert
+                    self._pending[post_id] = ('insert', newer[1], None, newer[3])
+                else:
+                    self._pending[post_id] = (newer[0], newer[1], entry[2], newer[3])
+
+    def _handle_conflicts(self, batch, conflicts):
+        """Retry cleanly mergeable edits against the current copy and park the rest"""
+        for post_id, theirs in conflicts.items():
+            op, mine, base, owner = batch[post_id]
+            clashes = None
+            if op == 'update' and theirs is not None and base is not None:
+                merged, clashes = merge_posts(base, mine, theirs)
+                if not clashes:
+                    with self._cond:
+                        newer = self._pending.get(post_id)
+                    if newer is not None:
+                        # A newer edit is already queued; it will be merged against the original base
+                        with self._cond:
+                            self._pending[post_id] = (newer[0], newer[1], base, newer[3])
+                    else:
+                        self._put(post_id, 'update', {**merged, 'version': version_of(theirs) + 1}, theirs, owner)
+                    continue
+            with self._cond:
+                self._pending.pop(post_id, None)
+            self.add_conflict(post_id, mine, theirs, base, clashes or [], owner)
+
+    def _journal_entries(self, batch, conflicts):
+        """Journal entries for the writes of a flushed batch that were not skipped as conflicts"""
+        entries = []
+        for post_id, (op, post, base, owner) in batch.items():
+            if post_id in conflicts:
+                continue
+            user = self.user_names.get(owner, owner)
+            if op == 'insert':
+                entries.append(create_entry(post, user))
+            elif op == 'update':
+                entries.append(update_entry(base, post, user))
+            else:
+                entries.append(delete_entry(post_id, base, user))
+        return entries
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=self._next_delay())
+                if not self._pending:
+                    continue
+            try:
+                self.flush()
+            except Exception as e:
+                self.last_error = str(e)
+                self._failures += 1
+            else:
+                self.last_error = None
+                self._failures = 0
+
+    def _next_delay(self):
+        """Regular flush interval, doubled for each consecutive failure up to max_backoff"""
+        if not self._failures:
+            return self.flush_interval
+        return min(self.flush_interval * 2 ** self._failures, self.max_backoff)
+
+
+def merge_posts(base, mine, theirs):
+    """Three-way merge of two edits of the same post
+
+    Returns (merged, clashes): merged takes each field from whichever side changed
+    it (mine wins where both did), and clashes lists fields both sides changed to
+    different values.
+    """
+    merged = dict(theirs)
+    clashes = []
+    for field in (set(base) | set(mine) | set(theirs)) - MERGE_IGNORED_FIELDS:
+        original, my_value, their_value = base.get(field), mine.get(field), theirs.get(field)
+        if my_value == original or my_value == their_value:
+            continue
+        merged[field] = my_value
+        if their_value != original:
+            clashes.append(field)
+    if 'updated_at' in mine:
+        merged['updated_at'] = mine['updated_at']
+    return merged, sorted(clashes)